@@ -0,0 +1,168 @@
+"""Per-request overhead of the data-route middlewares.
+
+Calls a trivial `/v/{id}` endpoint directly through ASGI, with and without
+ValueRateLimitMiddleware and ScheduledRefreshMiddleware, and prints the mean
+cost the two layers add to every authenticated data request. Redis is not used:
+the limiter runs on its memory fallback and refresh scheduling is disabled.
+
+Both middlewares used to subclass BaseHTTPMiddleware. The baseline runs the same
+two layers each behind a pass-through BaseHTTPMiddleware, which adds the
+`call_next` plumbing they used to pay, so before and after are measured side by
+side in one run.
+
+Run it from the repository root as a module, so the application modules are
+importable; running the file directly fails with ModuleNotFoundError:
+
+    python -m benchmarks.middleware_overhead [requests]
+"""
+
+import asyncio
+import sys
+import time
+from unittest.mock import patch
+
+from fastapi import FastAPI
+from fastapi.responses import Response
+from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from database import Base
+from memory_cache import MemoryBudget
+from models import AccountToken
+from scheduled_refresh import ScheduledRefreshMiddleware
+from security import create_sheets_access_token
+from token_cache import VerifiedTokenCache
+from value_rate_limit import UsageRecorder, ValueRateLimitMiddleware
+
+
+class _NoBroadcast:
+    def subscribe(self, channel, handler, *, on_reset=None):
+        pass
+
+
+class _PassThroughMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next: RequestResponseEndpoint):
+        return await call_next(request)
+
+
+def _build_app(
+    session_factory,
+    *,
+    middleware: bool,
+    base_http: bool = False,
+) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/v/{resource_id}")
+    async def value(resource_id: str):
+        return Response(content="42", media_type="text/csv")
+
+    if middleware:
+        app.add_middleware(ScheduledRefreshMiddleware)
+        if base_http:
+            app.add_middleware(_PassThroughMiddleware)
+        app.add_middleware(
+            ValueRateLimitMiddleware,
+            authenticated_limit=10**9,
+            session_factory=session_factory,
+            token_cache=VerifiedTokenCache(
+                broadcast=_NoBroadcast(),
+                budget=MemoryBudget(1024 * 1024),
+            ),
+            usage=UsageRecorder(session_factory=session_factory),
+        )
+        if base_http:
+            app.add_middleware(_PassThroughMiddleware)
+    return app
+
+
+async def _measure(app: FastAPI, query_string: bytes, requests: int) -> float:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "server": ("bench", 80),
+        "client": ("127.0.0.1", 1),
+        "root_path": "",
+        "path": "/v/AbCdEf123456",
+        "raw_path": b"/v/AbCdEf123456",
+        "query_string": query_string,
+        "headers": [(b"host", b"bench")],
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    statuses = []
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            statuses.append(message["status"])
+
+    for _ in range(min(requests, 200)):
+        await app(dict(scope), receive, send)
+    statuses.clear()
+    started = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    elapsed = time.perf_counter() - started
+    if set(statuses) != {200}:
+        raise RuntimeError(f"unexpected statuses: {sorted(set(statuses))}")
+    return elapsed / requests * 1_000_000
+
+
+async def main(requests: int) -> None:
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+    with session_factory() as db:
+        db.add(
+            AccountToken(
+                id="bench-sheets",
+                account_id="bench-account",
+                created_at=1,
+                is_active=True,
+                purpose="sheets",
+            )
+        )
+        db.commit()
+    token = create_sheets_access_token({"sub": "bench-account", "jti": "bench-sheets"})
+    query_string = f"auth_token={token}".encode()
+
+    with (
+        patch("value_rate_limit.get_redis_client", return_value=None),
+        patch("scheduled_refresh.get_redis_client", return_value=None),
+    ):
+        bare = await _measure(
+            _build_app(session_factory, middleware=False),
+            query_string,
+            requests,
+        )
+        wrapped = await _measure(
+            _build_app(session_factory, middleware=True),
+            query_string,
+            requests,
+        )
+        base_http = await _measure(
+            _build_app(session_factory, middleware=True, base_http=True),
+            query_string,
+            requests,
+        )
+    print(f"requests:               {requests}")
+    print(f"endpoint only:          {bare:8.1f} us/request")
+    print(f"pure ASGI middlewares:  {wrapped:8.1f} us/request")
+    print(f"BaseHTTPMiddleware:     {base_http:8.1f} us/request")
+    print(f"pure ASGI cost:         {wrapped - bare:8.1f} us/request")
+    print(f"BaseHTTPMiddleware cost:{base_http - bare:8.1f} us/request")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000))
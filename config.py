@@ -23,6 +23,25 @@ CSV_CACHE_STALE_TTL_SECONDS = max(
 CSV_CACHE_REFRESH_TIMEOUT_SECONDS = max(
     1, int(os.environ.get("CSV_CACHE_REFRESH_TIMEOUT_SECONDS", 8))
 )
+CSV_CACHE_READ_V1 = os.environ.get(
+    "CSV_CACHE_READ_V1", "true"
+).lower() not in {"0", "false", "no"}
+CSV_CACHE_COMPRESS_MIN_BYTES = max(
+    0, int(os.environ.get("CSV_CACHE_COMPRESS_MIN_BYTES", 1024))
+)
+CSV_CACHE_LOCAL_MAX_BYTES = max(
+    0, int(os.environ.get("CSV_CACHE_LOCAL_MAX_BYTES", 16 * 1024 * 1024))
+)
+CSV_CACHE_MEMORY_MAX_BYTES = max(
+    0, int(os.environ.get("CSV_CACHE_MEMORY_MAX_BYTES", 32 * 1024 * 1024))
+)
+MEMORY_CACHE_MAX_BYTES = max(
+    0, int(os.environ.get("MEMORY_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+)
+CSV_CACHE_POLICIES_JSON = os.environ.get("CSV_CACHE_POLICIES_JSON", "")
+CSV_CACHE_EARLY_REFRESH_BETA = max(
+    0.0, float(os.environ.get("CSV_CACHE_EARLY_REFRESH_BETA", 1.0))
+)
 SHEETS_REFRESH_ENABLED = os.environ.get(
     "SHEETS_REFRESH_ENABLED", "true"
 ).lower() not in {"0", "false", "no"}
@@ -39,6 +58,9 @@ OUTBOUND_QUEUE_ENABLED = os.environ.get(
 OUTBOUND_ANALYTICS_FLUSH_SECONDS = max(
     1, int(os.environ.get("OUTBOUND_ANALYTICS_FLUSH_SECONDS", 10))
 )
+USAGE_ANALYTICS_FLUSH_SECONDS = max(
+    1, int(os.environ.get("USAGE_ANALYTICS_FLUSH_SECONDS", 10))
+)
 OUTBOUND_QUEUE_MAX_WAIT_SECONDS = max(
     1, int(os.environ.get("OUTBOUND_QUEUE_MAX_WAIT_SECONDS", 120))
 )
@@ -46,8 +68,28 @@ OUTBOUND_QUEUE_429_RETRIES = max(
     0, min(5, int(os.environ.get("OUTBOUND_QUEUE_429_RETRIES", 2)))
 )
 OUTBOUND_API_LIMITS_JSON = os.environ.get("OUTBOUND_API_LIMITS_JSON", "")
+OUTBOUND_QUEUE_LEASE_MS = max(
+    0, int(os.environ.get("OUTBOUND_QUEUE_LEASE_MS", 250))
+)
+OUTBOUND_ADAPTIVE_RATE_ENABLED = os.environ.get(
+    "OUTBOUND_ADAPTIVE_RATE_ENABLED", "true"
+).lower() not in {"0", "false", "no"}
+OUTBOUND_ADAPTIVE_WINDOW_SECONDS = max(
+    1.0, float(os.environ.get("OUTBOUND_ADAPTIVE_WINDOW_SECONDS", 10))
+)
+OUTBOUND_KEEPALIVE_SECONDS = max(
+    1.0, float(os.environ.get("OUTBOUND_KEEPALIVE_SECONDS", 30))
+)
+OUTBOUND_HTTP2_PROVIDERS = frozenset(
+    provider.strip()
+    for provider in os.environ.get("OUTBOUND_HTTP2_PROVIDERS", "").split(",")
+    if provider.strip()
+)
 PORT = int(os.environ.get("PORT", 8111))
 DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///./data.db")
+DATABASE_THREAD_POOL_SIZE = max(
+    1, int(os.environ.get("DATABASE_THREAD_POOL_SIZE", 8))
+)
 SECRET_KEY = os.environ.get(
     "SECRET_KEY", "09d25e094faa6ca2556c818166b7a9563b93f7099f6f0f4caa6cf63b88e8d3e7"
 )
@@ -61,6 +103,15 @@ VALUE_RATE_LIMIT_WINDOW_SECONDS = max(
 VALUE_RATE_LIMIT_AUTHENTICATED = max(
     1, int(os.environ.get("VALUE_RATE_LIMIT_AUTHENTICATED", 120))
 )
+VALUE_RATE_LIMIT_LEASE_SIZE = max(
+    0, int(os.environ.get("VALUE_RATE_LIMIT_LEASE_SIZE", 0))
+)
+VALUE_RATE_LIMIT_LEASE_SECONDS = max(
+    0.1, float(os.environ.get("VALUE_RATE_LIMIT_LEASE_SECONDS", 1))
+)
+AUTH_TOKEN_CACHE_TTL_SECONDS = max(
+    0, int(os.environ.get("AUTH_TOKEN_CACHE_TTL_SECONDS", 30))
+)
 FEATURE_REQUEST_ADMIN_ADDRESSES = frozenset(
     address.strip().lower()
     for address in os.environ.get("FEATURE_REQUEST_ADMIN_ADDRESSES", "").split(",")
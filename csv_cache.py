@@ -1,22 +1,39 @@
 import asyncio
 import base64
+import gzip
 import hashlib
 import json
 import logging
+import math
+import random
+import re
 import secrets
 import time
-from collections import OrderedDict
-from dataclasses import dataclass
-from typing import Awaitable, Callable, Iterable
+from dataclasses import dataclass, replace
+from typing import Awaitable, Callable, Iterable, Mapping
 from urllib.parse import parse_qsl, urlencode
 
-from fastapi import Request, Response
+from fastapi import HTTPException, Request, Response
 from redis.asyncio import Redis
 from redis.exceptions import RedisError
 from starlette.responses import StreamingResponse
 from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-from redis_client import get_redis_client
+from config import (
+    COINMARKETCAP_CACHE_TTL_SECONDS,
+    CSV_CACHE_POLICIES_JSON,
+    CSV_CACHE_REFRESH_TIMEOUT_SECONDS,
+    CSV_CACHE_STALE_TTL_SECONDS,
+    CSV_CACHE_TTL_SECONDS,
+)
+from memory_cache import ByteLRUCache, MemoryBudget
+from outbound_queue import LANE_REFRESH, outbound_lane
+from redis_client import (
+    RedisBroadcast,
+    RedisScript,
+    get_redis_client,
+    redis_broadcast,
+)
 from value_rate_limit import (
     DATA_ACCESS_INTERNAL_HEADER,
     DATA_ACCESS_INTERNAL_TOKEN,
@@ -27,12 +44,177 @@ logger = logging.getLogger(__name__)
 CACHE_BUSTER_PARAMS = {"_", "cache_bust", "refresh", "auth_token"}
 CACHE_FORCE_REFRESH_HEADER = "x-datahunt-force-cache-refresh"
 DATA_UPDATED_AT_HEADER = "x-data-updated-at"
-RELEASE_LOCK_SCRIPT = """
-if redis.call('GET', KEYS[1]) == ARGV[1] then
-    return redis.call('DEL', KEYS[1])
+CSV_INVALIDATION_CHANNEL = "datahunt:csv:invalidate:v1"
+CSV_FLIGHT_CHANNEL = "datahunt:csv:flight:v1"
+# Releases the single-flight lock, wakes followers on every replica, and returns
+# how many followers waited on the flight (-1 when the lock was not ours).
+RELEASE_LOCK_SCRIPT = RedisScript("""
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return -1
 end
-return 0
-"""
+local followers = tonumber(redis.call('GET', KEYS[2]) or '0')
+redis.call('DEL', KEYS[1], KEYS[2])
+redis.call('PUBLISH', ARGV[2], ARGV[3])
+return followers
+""")
+
+
+@dataclass(frozen=True)
+class CSVCachePolicy:
+    ttl_seconds: int
+    stale_ttl_seconds: int
+    refresh_timeout_seconds: float
+    serve_stale: bool = True
+
+    def clamped(self) -> "CSVCachePolicy":
+        ttl_seconds = max(60, int(self.ttl_seconds))
+        return CSVCachePolicy(
+            ttl_seconds=ttl_seconds,
+            stale_ttl_seconds=max(3600, ttl_seconds, int(self.stale_ttl_seconds)),
+            refresh_timeout_seconds=max(0.01, float(self.refresh_timeout_seconds)),
+            serve_stale=bool(self.serve_stale),
+        )
+
+
+# Route prefixes whose data changes slower than the global TTL. Keys may also be
+# /value source aliases; override or extend them with CSV_CACHE_POLICIES_JSON.
+DEFAULT_CSV_CACHE_POLICIES: dict[str, dict[str, object]] = {
+    "/cmc/": {"ttl_seconds": COINMARKETCAP_CACHE_TTL_SECONDS},
+    "/pendle/": {"ttl_seconds": 600},
+    "/hyperliquid/": {"ttl_seconds": 60},
+}
+CSV_CACHE_POLICY_FIELDS = frozenset(
+    {"ttl_seconds", "stale_ttl_seconds", "refresh_timeout_seconds", "serve_stale"}
+)
+
+
+def _load_policy_overrides(raw_json: str) -> dict[str, dict[str, object]]:
+    overrides = {
+        name: dict(fields) for name, fields in DEFAULT_CSV_CACHE_POLICIES.items()
+    }
+    if not raw_json.strip():
+        return overrides
+    try:
+        configured = json.loads(raw_json)
+    except (TypeError, ValueError):
+        logger.error("CSV_CACHE_POLICIES_JSON is invalid; using defaults")
+        return overrides
+    if not isinstance(configured, dict):
+        logger.error("CSV_CACHE_POLICIES_JSON must be an object; using defaults")
+        return overrides
+    for name, fields in configured.items():
+        if not isinstance(fields, dict) or not set(fields) <= CSV_CACHE_POLICY_FIELDS:
+            logger.error("Invalid CSV cache policy for %s; ignoring it", name)
+            continue
+        overrides.setdefault(name, {}).update(fields)
+    return overrides
+
+
+class CSVCachePolicyTable:
+    """Per-route fresh TTL, stale window, refresh timeout and serve-stale flag.
+
+    Keys are route prefixes such as `/pendle/` or `/value` source aliases such as
+    `pendle`; the longest matching prefix wins and unset fields keep the defaults.
+    """
+
+    def __init__(
+        self,
+        default: CSVCachePolicy,
+        overrides: Mapping[str, Mapping[str, object]] | None = None,
+        *,
+        aliases: Mapping[str, str] | None = None,
+    ):
+        self.default = default.clamped()
+        self._overrides = {
+            name: dict(fields) for name, fields in (overrides or {}).items()
+        }
+        self._aliases = aliases
+        self._prefixes: tuple[tuple[str, CSVCachePolicy], ...] | None = None
+
+    @classmethod
+    def from_json(
+        cls,
+        raw_json: str,
+        default: CSVCachePolicy,
+    ) -> "CSVCachePolicyTable":
+        return cls(default, _load_policy_overrides(raw_json))
+
+    def _source_paths(self) -> Mapping[str, str]:
+        if self._aliases is None:
+            from routers.value import DIRECT_VALUE_SOURCES, VALUE_SOURCES
+
+            self._aliases = {
+                **{alias: source.path for alias, source in VALUE_SOURCES.items()},
+                **DIRECT_VALUE_SOURCES,
+            }
+        return self._aliases
+
+    def _build(self) -> tuple[tuple[str, CSVCachePolicy], ...]:
+        policies: dict[str, CSVCachePolicy] = {}
+        for name, fields in self._overrides.items():
+            prefix = name if name.startswith("/") else self._source_paths().get(name)
+            if prefix is None:
+                logger.error("Unknown CSV cache policy source %s; ignoring it", name)
+                continue
+            try:
+                policies[prefix] = replace(self.default, **fields).clamped()
+            except (TypeError, ValueError):
+                logger.error("Invalid CSV cache policy for %s; ignoring it", name)
+        return tuple(
+            sorted(policies.items(), key=lambda item: len(item[0]), reverse=True)
+        )
+
+    def for_path(self, path: str) -> CSVCachePolicy:
+        if self._prefixes is None:
+            self._prefixes = self._build()
+        for prefix, policy in self._prefixes:
+            if path.startswith(prefix):
+                return policy
+        return self.default
+
+
+csv_cache_policies = CSVCachePolicyTable.from_json(
+    CSV_CACHE_POLICIES_JSON,
+    CSVCachePolicy(
+        ttl_seconds=CSV_CACHE_TTL_SECONDS,
+        stale_ttl_seconds=CSV_CACHE_STALE_TTL_SECONDS,
+        refresh_timeout_seconds=CSV_CACHE_REFRESH_TIMEOUT_SECONDS,
+    ),
+)
+
+
+class CSVCacheStats:
+    """Process-wide single-flight counters for the admin queue dashboard."""
+
+    def __init__(self):
+        self.flights = 0
+        self.coalesced_followers = 0
+        self.max_followers = 0
+        self.pushed_wakeups = 0
+        self.polled_wakeups = 0
+        self.early_refreshes = 0
+
+    def record_flight(self, followers: int) -> None:
+        self.flights += 1
+        self.coalesced_followers += followers
+        self.max_followers = max(self.max_followers, followers)
+
+    def snapshot(self) -> dict[str, object]:
+        return {
+            "flights": self.flights,
+            "coalesced_followers": self.coalesced_followers,
+            "max_followers": self.max_followers,
+            "average_followers": round(
+                self.coalesced_followers / self.flights if self.flights else 0.0,
+                2,
+            ),
+            "pushed_wakeups": self.pushed_wakeups,
+            "polled_wakeups": self.polled_wakeups,
+            "early_refreshes": self.early_refreshes,
+        }
+
+
+csv_cache_stats = CSVCacheStats()
 
 
 @dataclass(frozen=True)
@@ -42,6 +224,9 @@ class CachedCSVResponse:
     status_code: int
     raw_headers: tuple[tuple[bytes, bytes], ...]
     updated_at: int | None = None
+    content_encoding: str | None = None
+    etag: str | None = None
+    recompute_seconds: float = 0.0
 
 
 @dataclass(frozen=True)
@@ -51,6 +236,140 @@ class CachedCSVPreview:
     cache_status: str
 
 
+def compress_csv_body(body: bytes, min_bytes: int) -> tuple[bytes, str | None]:
+    """Gzips bodies of at least `min_bytes` when that makes them smaller."""
+    if min_bytes <= 0 or len(body) < min_bytes:
+        return body, None
+    compressed = gzip.compress(body, compresslevel=6, mtime=0)
+    if len(compressed) >= len(body):
+        return body, None
+    return compressed, "gzip"
+
+
+def decompress_csv_body(body: bytes, encoding: str | None) -> bytes:
+    if encoding == "gzip":
+        return gzip.decompress(body)
+    return body
+
+
+def csv_etag(body: bytes) -> str:
+    """Returns a strong validator for the uncompressed CSV body."""
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weakly compares If-None-Match with an ETag, ignoring the coding suffix."""
+    opaque = etag.strip('"')
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        candidate = candidate.removeprefix("W/").strip('"')
+        if candidate and candidate.removesuffix("-gzip") == opaque:
+            return True
+    return False
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    for item in accept_encoding.split(","):
+        coding, _, parameters = item.partition(";")
+        if coding.strip().lower() not in {"gzip", "*"}:
+            continue
+        quality = parameters.strip().lower()
+        if quality.startswith("q="):
+            try:
+                return float(quality[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+CSVQueryCanonicalizer = Callable[[list[tuple[str, str]]], list[tuple[str, str]]]
+_csv_query_canonicalizers: dict[str, CSVQueryCanonicalizer] = {}
+_TRUE_VALUES = frozenset({"1", "on", "t", "true", "y", "yes"})
+_FALSE_VALUES = frozenset({"0", "f", "false", "n", "no", "off"})
+
+
+def canonical_bool(value: str) -> str:
+    normalized = value.strip().lower()
+    if normalized in _TRUE_VALUES:
+        return "true"
+    if normalized in _FALSE_VALUES:
+        return "false"
+    raise ValueError(f"Invalid boolean {value!r}")
+
+
+def canonical_int(value: str) -> str:
+    normalized = value.strip()
+    if not re.fullmatch(r"[+-]?[0-9]+", normalized):
+        raise ValueError(f"Invalid integer {value!r}")
+    return str(int(normalized))
+
+
+def canonical_float(value: str) -> str:
+    number = float(value.strip())
+    if not math.isfinite(number):
+        raise ValueError(f"Invalid number {value!r}")
+    return repr(number)
+
+
+def canonical_upper(value: str) -> str:
+    return value.strip().upper()
+
+
+def query_canonicalizer(
+    *,
+    values: Mapping[str, Callable[[str], str]] | None = None,
+    defaults: Mapping[str, str] | None = None,
+) -> CSVQueryCanonicalizer:
+    """Builds a canonicalizer that normalizes values and drops explicit defaults.
+
+    Repeated parameters are left untouched, since routes read only one of them.
+    """
+    values = dict(values or {})
+    defaults = dict(defaults or {})
+
+    def canonicalize(query_items: list[tuple[str, str]]) -> list[tuple[str, str]]:
+        names = [name for name, _ in query_items]
+        if len(set(names)) != len(names):
+            return query_items
+        canonical = []
+        for name, value in query_items:
+            normalizer = values.get(name)
+            if normalizer is not None:
+                value = normalizer(value)
+            if defaults.get(name) == value:
+                continue
+            canonical.append((name, value))
+        return canonical
+
+    return canonicalize
+
+
+def register_csv_query_canonicalizer(
+    path: str,
+    canonicalizer: CSVQueryCanonicalizer,
+) -> None:
+    """Collapses semantically identical queries for `path` onto one cache entry."""
+    _csv_query_canonicalizers[path] = canonicalizer
+
+
+def canonical_csv_query(
+    path: str,
+    query_items: Iterable[tuple[str, str]],
+) -> list[tuple[str, str]]:
+    items = list(query_items)
+    canonicalizer = _csv_query_canonicalizers.get(path)
+    if canonicalizer is None:
+        return items
+    try:
+        return canonicalizer(items)
+    except (HTTPException, ValueError):
+        # Invalid input is rejected by the route itself and never cached.
+        return items
+
+
 def csv_cache_digest(
     *,
     method: str,
@@ -59,11 +378,14 @@ def csv_cache_digest(
     authorization: str = "",
     cookie: str = "",
 ) -> str:
-    filtered_query = [
-        (key, value)
-        for key, value in query_items
-        if key.lower() not in CACHE_BUSTER_PARAMS
-    ]
+    filtered_query = canonical_csv_query(
+        path,
+        (
+            (key, value)
+            for key, value in query_items
+            if key.lower() not in CACHE_BUSTER_PARAMS
+        ),
+    )
     filtered_query.sort()
     key_material = "\n".join(
         [
@@ -77,7 +399,12 @@ def csv_cache_digest(
     return hashlib.sha256(key_material.encode()).hexdigest()
 
 
-def redis_csv_cache_key(digest: str, *, stale: bool = False) -> str:
+def redis_csv_cache_key(digest: str) -> str:
+    """Returns the v2 key holding the body, `fresh_until`, and the stale TTL."""
+    return f"datahunt:csv:v2:{digest}"
+
+
+def legacy_redis_csv_cache_key(digest: str, *, stale: bool = False) -> str:
     prefix = "datahunt:csv:stale:v1:" if stale else "datahunt:csv:v1:"
     return f"{prefix}{digest}"
 
@@ -86,13 +413,97 @@ def _mapping_value(mapping: dict, name: str):
     return mapping.get(name.encode()) or mapping.get(name)
 
 
+def _payload_encoding(payload: dict) -> str | None:
+    encoding = _mapping_value(payload, "encoding")
+    if isinstance(encoding, bytes):
+        encoding = encoding.decode()
+    return encoding if encoding == "gzip" else None
+
+
+def _payload_fresh_until(payload: dict) -> float | None:
+    fresh_until = _mapping_value(payload, "fresh_until")
+    if fresh_until is None:
+        return None
+    try:
+        return float(fresh_until)
+    except (TypeError, ValueError):
+        return None
+
+
+def _preview_from_payload(
+    payload: dict,
+    *,
+    fresh: bool,
+    updated_at_fallback: int | None = None,
+) -> CachedCSVPreview | None:
+    body = _mapping_value(payload, "body")
+    if body is None:
+        return None
+    if not isinstance(body, bytes):
+        body = str(body).encode()
+    try:
+        body = decompress_csv_body(body, _payload_encoding(payload))
+    except (OSError, EOFError):
+        return None
+    raw_updated_at = _mapping_value(payload, "updated_at")
+    try:
+        updated_at = int(raw_updated_at) if raw_updated_at is not None else None
+    except (TypeError, ValueError):
+        updated_at = None
+    return CachedCSVPreview(
+        body=body,
+        updated_at=updated_at if updated_at is not None else updated_at_fallback,
+        cache_status="fresh" if fresh else "stale",
+    )
+
+
+async def _load_legacy_previews(
+    client: Redis,
+    requests: list[tuple[str, str]],
+    *,
+    stale_ttl_seconds: int,
+) -> dict[str, CachedCSVPreview]:
+    async with client.pipeline(transaction=False) as pipeline:
+        for _, digest in requests:
+            pipeline.hgetall(legacy_redis_csv_cache_key(digest))
+            pipeline.hgetall(legacy_redis_csv_cache_key(digest, stale=True))
+            pipeline.ttl(legacy_redis_csv_cache_key(digest, stale=True))
+        results = await pipeline.execute()
+
+    now = int(time.time())
+    previews: dict[str, CachedCSVPreview] = {}
+    for index, (resource_id, _) in enumerate(requests):
+        fresh = results[index * 3]
+        stale = results[index * 3 + 1]
+        stale_ttl = int(results[index * 3 + 2])
+        payload = fresh or stale
+        if not payload:
+            continue
+        updated_at_fallback = None
+        if stale_ttl >= 0:
+            updated_at_fallback = now - max(0, stale_ttl_seconds - stale_ttl)
+        preview = _preview_from_payload(
+            payload,
+            fresh=bool(fresh),
+            updated_at_fallback=updated_at_fallback,
+        )
+        if preview is not None:
+            previews[resource_id] = preview
+    return previews
+
+
 async def load_cached_csv_previews(
     client: Redis,
     requests: list[tuple[str, str, list[tuple[str, str]]]],
     *,
     stale_ttl_seconds: int,
+    read_legacy: bool = True,
 ) -> dict[str, CachedCSVPreview]:
-    """Read cached one-cell CSV responses in one Redis round trip."""
+    """Read cached one-cell CSV responses with one command per resource.
+
+    Resources without a v2 entry are looked up in the v1 fresh/stale layout in a
+    second round trip while `read_legacy` is enabled.
+    """
     if not requests:
         return {}
 
@@ -103,36 +514,32 @@ async def load_cached_csv_previews(
     async with client.pipeline(transaction=False) as pipeline:
         for digest in digests:
             pipeline.hgetall(redis_csv_cache_key(digest))
-            pipeline.hgetall(redis_csv_cache_key(digest, stale=True))
-            pipeline.ttl(redis_csv_cache_key(digest, stale=True))
         results = await pipeline.execute()
 
-    now = int(time.time())
+    now = time.time()
     previews: dict[str, CachedCSVPreview] = {}
-    for index, (resource_id, _, _) in enumerate(requests):
-        fresh = results[index * 3]
-        stale = results[index * 3 + 1]
-        stale_ttl = int(results[index * 3 + 2])
-        payload = fresh or stale
+    missing: list[tuple[str, str]] = []
+    for (resource_id, _, _), digest, payload in zip(
+        requests, digests, results, strict=True
+    ):
         if not payload:
+            missing.append((resource_id, digest))
             continue
-        body = _mapping_value(payload, "body")
-        if body is None:
-            continue
-        if not isinstance(body, bytes):
-            body = str(body).encode()
-        raw_updated_at = _mapping_value(payload, "updated_at")
-        try:
-            updated_at = int(raw_updated_at) if raw_updated_at is not None else None
-        except (TypeError, ValueError):
-            updated_at = None
-        if updated_at is None and stale_ttl >= 0:
-            elapsed = max(0, stale_ttl_seconds - stale_ttl)
-            updated_at = now - elapsed
-        previews[resource_id] = CachedCSVPreview(
-            body=body,
-            updated_at=updated_at,
-            cache_status="fresh" if fresh else "stale",
+        fresh_until = _payload_fresh_until(payload)
+        preview = _preview_from_payload(
+            payload,
+            fresh=fresh_until is not None and fresh_until > now,
+        )
+        if preview is not None:
+            previews[resource_id] = preview
+
+    if missing and read_legacy:
+        previews.update(
+            await _load_legacy_previews(
+                client,
+                missing,
+                stale_ttl_seconds=stale_ttl_seconds,
+            )
         )
     return previews
 
@@ -140,11 +547,47 @@ async def load_cached_csv_previews(
 RequestResponseEndpoint = Callable[[Request], Awaitable[Response]]
 
 
+async def call_asgi_app(app: ASGIApp, scope: Scope) -> Response:
+    """Runs a bodiless request through `app` in process and buffers the response."""
+    response_start: Message | None = None
+    chunks: list[bytes] = []
+    request_sent = False
+
+    async def receive() -> Message:
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        return {"type": "http.disconnect"}
+
+    async def send(message: Message) -> None:
+        nonlocal response_start
+        if message["type"] == "http.response.start":
+            response_start = message
+        elif message["type"] == "http.response.body":
+            body = message.get("body", b"")
+            if body:
+                chunks.append(body)
+
+    await app(scope, receive, send)
+    if response_start is None:
+        raise RuntimeError("Cached route did not start an HTTP response")
+    response = Response(
+        content=b"".join(chunks),
+        status_code=response_start["status"],
+    )
+    response.raw_headers = list(response_start.get("headers", []))
+    return response
+
+
 class CSVCacheMiddleware:
     """Caches successful GET CSV responses in Redis with distributed single-flight.
 
-    A bounded in-memory cache and local single-flight are retained only as a safe
-    fallback when Redis is not configured or temporarily unavailable.
+    Each Redis entry is one hash that lives for the stale TTL and carries a
+    logical `fresh_until` timestamp, so a single read decides between HIT, STALE
+    and MISS. A bounded in-memory cache and local single-flight are retained
+    only as a safe fallback when Redis is not configured or temporarily
+    unavailable.
     """
 
     def __init__(
@@ -155,7 +598,16 @@ class CSVCacheMiddleware:
         flight_timeout_seconds: int = 180,
         stale_ttl_seconds: int = 86400,
         refresh_timeout_seconds: float = 8,
+        local_max_bytes: int = 16 * 1024 * 1024,
+        memory_max_bytes: int = 32 * 1024 * 1024,
+        read_legacy: bool = True,
+        compress_min_bytes: int = 1024,
+        early_refresh_beta: float = 1.0,
+        policies: CSVCachePolicyTable | None = None,
+        shared_identity: Callable[[str, list[tuple[str, str]]], bool] | None = None,
+        memory_budget: MemoryBudget | None = None,
         redis_client: Redis | None = None,
+        broadcast: RedisBroadcast | None = None,
     ):
         self.app: ASGIApp = app
         self.ttl_seconds = max(60, ttl_seconds)
@@ -163,19 +615,69 @@ class CSVCacheMiddleware:
         self.flight_timeout_seconds = max(30, flight_timeout_seconds)
         self.stale_ttl_seconds = max(3600, stale_ttl_seconds)
         self.refresh_timeout_seconds = max(0.01, refresh_timeout_seconds)
+        self.local_max_bytes = max(0, local_max_bytes)
+        self.read_legacy = read_legacy
+        self.compress_min_bytes = max(0, compress_min_bytes)
+        self.early_refresh_beta = max(0.0, early_refresh_beta)
+        self.policies = policies or CSVCachePolicyTable(
+            CSVCachePolicy(
+                ttl_seconds=self.ttl_seconds,
+                stale_ttl_seconds=self.stale_ttl_seconds,
+                refresh_timeout_seconds=self.refresh_timeout_seconds,
+            )
+        )
+        self.shared_identity = shared_identity
         self._redis_client = redis_client
-        self._cache: OrderedDict[str, CachedCSVResponse] = OrderedDict()
+        self.memory_max_bytes = max(0, memory_max_bytes)
+        budget = memory_budget or MemoryBudget(
+            self.memory_max_bytes + self.local_max_bytes
+        )
+        self._cache: ByteLRUCache = budget.namespace(
+            "csv-memory",
+            max_bytes=self.memory_max_bytes,
+            max_entries=self.max_entries,
+            sizeof=self._entry_size,
+        )
+        self._local: ByteLRUCache = budget.namespace(
+            "csv-local",
+            max_bytes=self.local_max_bytes,
+            sizeof=self._entry_size,
+        )
+        self._local_generation = 0
+        self._instance_id = secrets.token_hex(8)
+        self._broadcast = broadcast or redis_broadcast
+        if self.local_max_bytes:
+            self._broadcast.subscribe(
+                CSV_INVALIDATION_CHANNEL,
+                self._on_invalidation,
+                on_reset=self._clear_local,
+            )
+        self._broadcast.subscribe(CSV_FLIGHT_CHANNEL, self._on_flight_finished)
         self._inflight: dict[str, asyncio.Event] = {}
         self._inflight_lock = asyncio.Lock()
+        self._flight_waiters: dict[str, tuple[asyncio.Future[str], int]] = {}
         self._background_refreshes: set[asyncio.Task[Response]] = set()
+        self._early_refreshes: set[str] = set()
         self._last_redis_warning = 0.0
 
-    @staticmethod
-    def _cache_key(request: Request) -> str:
+    def _cache_key(self, request: Request) -> str:
+        path = request.url.path
+        query_items = parse_qsl(request.url.query, keep_blank_values=True)
+        # Requests reaching the cache were already authorized by
+        # ValueRateLimitMiddleware, so responses that cannot depend on the
+        # caller are shared by every account instead of keyed per session.
+        if self.shared_identity is not None and self.shared_identity(
+            path, query_items
+        ):
+            return csv_cache_digest(
+                method=request.method,
+                path=path,
+                query_items=query_items,
+            )
         return csv_cache_digest(
             method=request.method,
-            path=request.url.path,
-            query_items=parse_qsl(request.url.query, keep_blank_values=True),
+            path=path,
+            query_items=query_items,
             authorization=request.headers.get("authorization", ""),
             cookie=request.headers.get("cookie", ""),
         )
@@ -184,14 +686,14 @@ class CSVCacheMiddleware:
     def _redis_cache_key(key: str) -> str:
         return redis_csv_cache_key(key)
 
-    @staticmethod
-    def _redis_stale_key(key: str) -> str:
-        return redis_csv_cache_key(key, stale=True)
-
     @staticmethod
     def _redis_lock_key(key: str) -> str:
         return f"datahunt:csv:lock:v1:{key}"
 
+    @staticmethod
+    def _redis_followers_key(key: str) -> str:
+        return f"datahunt:csv:followers:v1:{key}"
+
     def _redis(self) -> Redis | None:
         return self._redis_client or get_redis_client()
 
@@ -208,61 +710,158 @@ class CSVCacheMiddleware:
         if cached is None:
             return None
         if cached.expires_at <= time.monotonic():
-            self._cache.pop(key, None)
+            self._cache.pop(key)
             return None
-        self._cache.move_to_end(key)
         return cached
 
     def _set_memory(self, key: str, cached: CachedCSVResponse) -> None:
         self._cache[key] = cached
-        self._cache.move_to_end(key)
-        while len(self._cache) > self.max_entries:
-            self._cache.popitem(last=False)
 
-    async def _get_redis(
+    @staticmethod
+    def _entry_size(cached: CachedCSVResponse) -> int:
+        return len(cached.body) + sum(
+            len(header) + len(value) for header, value in cached.raw_headers
+        )
+
+    def _get_local(self, key: str) -> CachedCSVResponse | None:
+        cached = self._local.get(key)
+        if cached is None:
+            return None
+        if (
+            cached.expires_at <= time.monotonic()
+            or not self._broadcast.is_subscribed(CSV_INVALIDATION_CHANNEL)
+        ):
+            self._drop_local(key)
+            return None
+        return cached
+
+    def _set_local(
         self,
         key: str,
-        *,
-        stale: bool = False,
+        cached: CachedCSVResponse,
+        generation: int,
+    ) -> None:
+        """Keeps a fresh Redis entry in process while invalidations are received.
+
+        An entry read before a concurrent invalidation arrived is discarded, since
+        it may be older than the body another replica has just written.
+        """
+        if (
+            generation != self._local_generation
+            or cached.expires_at == float("inf")
+            or cached.expires_at <= time.monotonic()
+            or not self._broadcast.is_subscribed(CSV_INVALIDATION_CHANNEL)
+        ):
+            return
+        self._local[key] = cached
+
+    def _drop_local(self, key: str) -> None:
+        self._local.pop(key)
+
+    def _clear_local(self) -> None:
+        self._local_generation += 1
+        self._local.clear()
+
+    def _on_invalidation(self, message: bytes) -> None:
+        origin, _, key = message.decode(errors="replace").partition(" ")
+        if origin == self._instance_id:
+            return
+        self._local_generation += 1
+        self._drop_local(key)
+
+    @staticmethod
+    def _decode_redis_payload(
+        payload: dict,
+        expires_at: float,
     ) -> CachedCSVResponse | None:
+        body = _mapping_value(payload, "body")
+        status_code = _mapping_value(payload, "status_code")
+        headers_payload = _mapping_value(payload, "headers")
+        updated_at = _mapping_value(payload, "updated_at")
+        etag = _mapping_value(payload, "etag")
+        recompute_seconds = _mapping_value(payload, "recompute_seconds")
+        if body is None or status_code is None or headers_payload is None:
+            return None
+        if not isinstance(body, bytes):
+            body = body.encode()
+        content_encoding = _payload_encoding(payload)
+        if etag is None:
+            etag = csv_etag(decompress_csv_body(body, content_encoding))
+        elif isinstance(etag, bytes):
+            etag = etag.decode()
+        if isinstance(headers_payload, bytes):
+            headers_payload = headers_payload.decode()
+        encoded_headers = json.loads(headers_payload)
+        raw_headers = tuple(
+            (
+                base64.b64decode(header),
+                base64.b64decode(value),
+            )
+            for header, value in encoded_headers
+        )
+        return CachedCSVResponse(
+            expires_at=expires_at,
+            body=body,
+            status_code=int(status_code),
+            raw_headers=raw_headers,
+            updated_at=int(updated_at) if updated_at is not None else None,
+            content_encoding=content_encoding,
+            etag=etag,
+            recompute_seconds=(
+                float(recompute_seconds) if recompute_seconds is not None else 0.0
+            ),
+        )
+
+    async def _get_legacy_redis(
+        self,
+        client: Redis,
+        key: str,
+    ) -> CachedCSVResponse | None:
+        async with client.pipeline(transaction=False) as pipeline:
+            pipeline.hgetall(legacy_redis_csv_cache_key(key))
+            pipeline.hgetall(legacy_redis_csv_cache_key(key, stale=True))
+            fresh, stale = await pipeline.execute()
+        if fresh:
+            return self._decode_redis_payload(fresh, float("inf"))
+        if stale:
+            return self._decode_redis_payload(stale, float("-inf"))
+        return None
+
+    async def _get_redis(self, key: str) -> CachedCSVResponse | None:
+        """Reads the entry; `expires_at` in the past marks it as STALE."""
         client = self._redis()
         if client is None:
             return None
         try:
-            redis_key = (
-                self._redis_stale_key(key) if stale else self._redis_cache_key(key)
-            )
-            payload = await client.hgetall(redis_key)
+            payload = await client.hgetall(self._redis_cache_key(key))
             if not payload:
+                if self.read_legacy:
+                    return await self._get_legacy_redis(client, key)
                 return None
-            body = _mapping_value(payload, "body")
-            status_code = _mapping_value(payload, "status_code")
-            headers_payload = _mapping_value(payload, "headers")
-            updated_at = _mapping_value(payload, "updated_at")
-            if body is None or status_code is None or headers_payload is None:
+            fresh_until = _payload_fresh_until(payload)
+            if fresh_until is None:
                 return None
-            if isinstance(headers_payload, bytes):
-                headers_payload = headers_payload.decode()
-            encoded_headers = json.loads(headers_payload)
-            raw_headers = tuple(
-                (
-                    base64.b64decode(header),
-                    base64.b64decode(value),
-                )
-                for header, value in encoded_headers
+            return self._decode_redis_payload(
+                payload,
+                time.monotonic() + fresh_until - time.time(),
             )
-            return CachedCSVResponse(
-                expires_at=float("inf"),
-                body=body if isinstance(body, bytes) else body.encode(),
-                status_code=int(status_code),
-                raw_headers=raw_headers,
-                updated_at=int(updated_at) if updated_at is not None else None,
-            )
-        except (RedisError, TypeError, ValueError, json.JSONDecodeError) as exc:
+        except (
+            RedisError,
+            TypeError,
+            ValueError,
+            json.JSONDecodeError,
+            OSError,
+            EOFError,
+        ) as exc:
             self._warn_redis(exc)
             return None
 
-    async def _set_redis(self, key: str, cached: CachedCSVResponse) -> bool:
+    async def _set_redis(
+        self,
+        key: str,
+        cached: CachedCSVResponse,
+        policy: CSVCachePolicy,
+    ) -> bool:
         client = self._redis()
         if client is None:
             return False
@@ -278,18 +877,24 @@ class CSVCacheMiddleware:
         )
         try:
             redis_key = self._redis_cache_key(key)
-            stale_key = self._redis_stale_key(key)
             mapping = {
                 "body": cached.body,
                 "status_code": str(cached.status_code),
                 "headers": headers_payload,
                 "updated_at": str(cached.updated_at or int(time.time())),
+                "fresh_until": f"{time.time() + policy.ttl_seconds:.3f}",
+                "encoding": cached.content_encoding or "identity",
+                "etag": cached.etag
+                or csv_etag(decompress_csv_body(cached.body, cached.content_encoding)),
+                "recompute_seconds": f"{cached.recompute_seconds:.3f}",
             }
             async with client.pipeline(transaction=True) as pipeline:
                 pipeline.hset(redis_key, mapping=mapping)
-                pipeline.expire(redis_key, self.ttl_seconds)
-                pipeline.hset(stale_key, mapping=mapping)
-                pipeline.expire(stale_key, self.stale_ttl_seconds)
+                pipeline.expire(redis_key, policy.stale_ttl_seconds)
+                pipeline.publish(
+                    CSV_INVALIDATION_CHANNEL,
+                    f"{self._instance_id} {key}",
+                )
                 await pipeline.execute()
             return True
         except RedisError as exc:
@@ -313,37 +918,110 @@ class CSVCacheMiddleware:
             self._warn_redis(exc)
             return None
 
-    async def _release_redis_lock(self, key: str, token: str) -> None:
+    async def _release_redis_lock(
+        self,
+        key: str,
+        token: str,
+        filled: bool = False,
+    ) -> None:
         client = self._redis()
         if client is None:
             return
         try:
-            await client.eval(
-                RELEASE_LOCK_SCRIPT,
-                1,
-                self._redis_lock_key(key),
-                token,
+            followers = await RELEASE_LOCK_SCRIPT(
+                client,
+                [self._redis_lock_key(key), self._redis_followers_key(key)],
+                [
+                    token,
+                    CSV_FLIGHT_CHANNEL,
+                    f"{key} {'filled' if filled else 'failed'}",
+                ],
             )
         except RedisError as exc:
             self._warn_redis(exc)
+            return
+        followers = int(followers or 0)
+        if followers < 0:
+            return
+        csv_cache_stats.record_flight(followers)
+        if followers:
+            logger.info(
+                "CSV cache flight %s coalesced %s followers",
+                key[:12],
+                followers,
+            )
+
+    def _on_flight_finished(self, message: bytes) -> None:
+        key, _, outcome = message.decode(errors="replace").partition(" ")
+        waiter = self._flight_waiters.pop(key, None)
+        if waiter is not None and not waiter[0].done():
+            waiter[0].set_result(outcome)
+
+    def _join_flight(self, key: str) -> asyncio.Future[str]:
+        future, waiters = self._flight_waiters.get(key, (None, 0))
+        if future is None or future.done():
+            future = asyncio.get_running_loop().create_future()
+            waiters = 0
+        self._flight_waiters[key] = (future, waiters + 1)
+        return future
+
+    def _leave_flight(self, key: str, future: asyncio.Future[str]) -> None:
+        current = self._flight_waiters.get(key)
+        if current is None or current[0] is not future:
+            return
+        if current[1] <= 1:
+            self._flight_waiters.pop(key, None)
+        else:
+            self._flight_waiters[key] = (future, current[1] - 1)
 
     async def _wait_for_redis_flight(self, key: str) -> CachedCSVResponse | None:
+        """Waits for another replica's fill, woken by its completion message.
+
+        Polling remains as a fallback for a lost message or a missing
+        subscription; it backs off further when completion is pushed.
+        """
         client = self._redis()
         if client is None:
             return None
         deadline = time.monotonic() + self.flight_timeout_seconds
-        delay = 0.05
+        future = self._join_flight(key)
         try:
+            async with client.pipeline(transaction=False) as pipeline:
+                pipeline.incr(self._redis_followers_key(key))
+                pipeline.expire(
+                    self._redis_followers_key(key),
+                    self.flight_timeout_seconds,
+                )
+                await pipeline.execute()
+            delay = 0.05
             while time.monotonic() < deadline:
-                await asyncio.sleep(delay)
+                pushed = self._broadcast.is_subscribed(CSV_FLIGHT_CHANNEL)
+                if pushed:
+                    delay = max(delay, 0.25)
+                try:
+                    outcome = await asyncio.wait_for(
+                        asyncio.shield(future),
+                        timeout=min(delay, max(0.0, deadline - time.monotonic())),
+                    )
+                except asyncio.TimeoutError:
+                    outcome = None
+                    csv_cache_stats.polled_wakeups += 1
+                else:
+                    csv_cache_stats.pushed_wakeups += 1
+                if outcome == "failed":
+                    return None
                 cached = await self._get_redis(key)
-                if cached is not None:
+                if cached is not None and cached.expires_at > time.monotonic():
                     return cached
+                if outcome is not None:
+                    return None
                 if not await client.exists(self._redis_lock_key(key)):
                     return None
-                delay = min(0.25, delay * 1.5)
+                delay = min(2.0 if pushed else 0.25, delay * (2 if pushed else 1.5))
         except RedisError as exc:
             self._warn_redis(exc)
+        finally:
+            self._leave_flight(key, future)
         return None
 
     @staticmethod
@@ -351,9 +1029,45 @@ class CSVCacheMiddleware:
         cached: CachedCSVResponse,
         backend: str,
         cache_status: str = "HIT",
+        *,
+        request: Request,
     ) -> Response:
-        response = Response(content=cached.body, status_code=cached.status_code)
-        response.raw_headers = list(cached.raw_headers)
+        """Serves compressed bodies as stored and answers matching validators.
+
+        A client that accepts gzip receives the stored bytes unchanged, and a
+        matching If-None-Match is answered with 304 without reading the body.
+        """
+        encoding = None
+        if cached.content_encoding is not None and accepts_gzip(
+            request.headers.get("accept-encoding", "")
+        ):
+            encoding = cached.content_encoding
+        raw_headers = [
+            (header, value)
+            for header, value in cached.raw_headers
+            if header.lower() not in {b"content-length", b"content-encoding", b"etag"}
+        ]
+        if cached.etag is not None and etag_matches(
+            request.headers.get("if-none-match", ""),
+            cached.etag,
+        ):
+            response = Response(status_code=304)
+            response.raw_headers = raw_headers
+        else:
+            body = cached.body
+            if cached.content_encoding is not None and encoding is None:
+                body = decompress_csv_body(body, cached.content_encoding)
+            response = Response(content=body, status_code=cached.status_code)
+            response.raw_headers = raw_headers
+            response.headers["Content-Length"] = str(len(body))
+            if encoding is not None:
+                response.headers["Content-Encoding"] = encoding
+        if cached.etag is not None:
+            response.headers["ETag"] = (
+                f'{cached.etag[:-1]}-{encoding}"' if encoding else cached.etag
+            )
+        if cached.content_encoding is not None:
+            response.headers.add_vary_header("Accept-Encoding")
         response.headers["X-CSV-Cache"] = cache_status
         response.headers["X-CSV-Cache-Backend"] = backend
         if cached.updated_at is not None:
@@ -384,10 +1098,68 @@ class CSVCacheMiddleware:
         key: str,
         lock_token: str,
     ) -> Response:
+        filled = False
         try:
-            return await self._call_and_cache(request, call_next, key, "redis")
+            response = await self._call_and_cache(request, call_next, key, "redis")
+            filled = response.headers.get("X-CSV-Cache-Backend") == "redis"
+            return response
         finally:
-            await self._release_redis_lock(key, lock_token)
+            await self._release_redis_lock(key, lock_token, filled)
+
+    def _maybe_refresh_early(
+        self,
+        request: Request,
+        call_next: RequestResponseEndpoint,
+        key: str,
+        cached: CachedCSVResponse,
+    ) -> None:
+        """Starts a background refresh of a fresh entry shortly before it expires.
+
+        This is XFetch: the refresh fires once `now - delta * beta * ln(rand)`
+        passes the expiry, where delta is the measured recompute time of the key.
+        Slow keys therefore refresh earlier, and hot keys are refreshed by one
+        reader before the TTL boundary instead of by every reader after it.
+        """
+        if (
+            self.early_refresh_beta <= 0
+            or cached.recompute_seconds <= 0
+            or key in self._early_refreshes
+        ):
+            return
+        lead = (
+            -cached.recompute_seconds
+            * self.early_refresh_beta
+            * math.log(1.0 - random.random())
+        )
+        if time.monotonic() + lead < cached.expires_at:
+            return
+        self._early_refreshes.add(key)
+        refresh = asyncio.create_task(self._refresh_early(request, call_next, key))
+        self._retain_background_refresh(refresh)
+
+    async def _refresh_early(
+        self,
+        request: Request,
+        call_next: RequestResponseEndpoint,
+        key: str,
+    ) -> Response | None:
+        try:
+            lock_token = await self._acquire_redis_lock(key)
+            if not lock_token:
+                return None
+            csv_cache_stats.early_refreshes += 1
+            # Nobody waits on an early refresh, so it yields to user requests.
+            with outbound_lane(LANE_REFRESH):
+                response = await self._refresh_redis(
+                    request, call_next, key, lock_token
+                )
+            # The response is never sent, so its background tasks run here.
+            if response.background is not None:
+                background, response.background = response.background, None
+                await background()
+            return response
+        finally:
+            self._early_refreshes.discard(key)
 
     @staticmethod
     async def _read_body(response: StreamingResponse) -> bytes:
@@ -406,8 +1178,10 @@ class CSVCacheMiddleware:
         key: str,
         backend: str,
     ) -> Response:
+        started_at = time.monotonic()
         response = await call_next(request)
         body = await self._read_body(response)
+        recompute_seconds = time.monotonic() - started_at
         content_type = response.headers.get("content-type", "").lower()
         if response.status_code != 200 or not content_type.startswith("text/csv"):
             uncached_response = Response(
@@ -428,30 +1202,39 @@ class CSVCacheMiddleware:
             updated_at = int(reported_updated_at) if reported_updated_at else int(time.time())
         except ValueError:
             updated_at = int(time.time())
+        stored_body, content_encoding = compress_csv_body(
+            body,
+            self.compress_min_bytes,
+        )
+        policy = self.policies.for_path(request.url.path)
         cached = CachedCSVResponse(
-            expires_at=time.monotonic() + self.ttl_seconds,
-            body=body,
+            expires_at=time.monotonic() + policy.ttl_seconds,
+            body=stored_body,
             status_code=response.status_code,
             raw_headers=raw_headers,
             updated_at=updated_at,
+            content_encoding=content_encoding,
+            etag=csv_etag(body),
+            recompute_seconds=recompute_seconds,
         )
         if backend == "redis":
-            stored_in_redis = await self._set_redis(key, cached)
-            if not stored_in_redis:
+            generation = self._local_generation
+            stored_in_redis = await self._set_redis(key, cached, policy)
+            if stored_in_redis:
+                self._set_local(key, cached, generation)
+            else:
                 self._set_memory(key, cached)
                 backend = "memory"
         else:
             self._set_memory(key, cached)
 
-        fresh_response = Response(
-            content=body,
-            status_code=response.status_code,
-            background=response.background,
+        fresh_response = self._response_from_cache(
+            cached,
+            backend,
+            "MISS",
+            request=request,
         )
-        fresh_response.raw_headers = list(raw_headers)
-        fresh_response.headers["X-CSV-Cache"] = "MISS"
-        fresh_response.headers["X-CSV-Cache-Backend"] = backend
-        fresh_response.headers[DATA_UPDATED_AT_HEADER] = str(updated_at)
+        fresh_response.background = response.background
         return fresh_response
 
     async def _dispatch_memory(
@@ -462,12 +1245,16 @@ class CSVCacheMiddleware:
     ) -> Response:
         cached = self._get_memory(key)
         if cached is not None:
-            return self._response_from_cache(cached, "memory")
+            return self._response_from_cache(cached, "memory", request=request)
 
         async with self._inflight_lock:
             cached = self._get_memory(key)
             if cached is not None:
-                return self._response_from_cache(cached, "memory")
+                return self._response_from_cache(
+                    cached,
+                    "memory",
+                    request=request,
+                )
             flight = self._inflight.get(key)
             is_leader = flight is None
             if flight is None:
@@ -478,7 +1265,11 @@ class CSVCacheMiddleware:
             await flight.wait()
             cached = self._get_memory(key)
             if cached is not None:
-                return self._response_from_cache(cached, "memory")
+                return self._response_from_cache(
+                    cached,
+                    "memory",
+                    request=request,
+                )
             return await call_next(request)
 
         try:
@@ -517,7 +1308,11 @@ class CSVCacheMiddleware:
             if lock_token == "":
                 cached = await self._wait_for_redis_flight(key)
                 if cached is not None:
-                    return self._response_from_cache(cached, "redis")
+                    return self._response_from_cache(
+                        cached,
+                        "redis",
+                        request=request,
+                    )
                 lock_token = await self._acquire_redis_lock(key)
                 if not lock_token:
                     return await self._call_and_cache(
@@ -529,20 +1324,38 @@ class CSVCacheMiddleware:
         if client is None:
             return await self._dispatch_memory(request, call_next, key)
 
-        cached = await self._get_redis(key)
+        cached = self._get_local(key)
         if cached is not None:
-            return self._response_from_cache(cached, "redis")
-        stale = await self._get_redis(key, stale=True)
+            self._maybe_refresh_early(request, call_next, key, cached)
+            return self._response_from_cache(cached, "local", request=request)
+        generation = self._local_generation
+        stale = await self._get_redis(key)
+        if stale is not None and stale.expires_at > time.monotonic():
+            self._set_local(key, stale, generation)
+            self._maybe_refresh_early(request, call_next, key, stale)
+            return self._response_from_cache(stale, "redis", request=request)
+        policy = self.policies.for_path(request.url.path)
+        if not policy.serve_stale:
+            stale = None
 
         lock_token = await self._acquire_redis_lock(key)
         if lock_token is None:
             return await self._dispatch_memory(request, call_next, key)
         if lock_token == "":
             if stale is not None:
-                return self._response_from_cache(stale, "redis", "STALE")
+                return self._response_from_cache(
+                    stale,
+                    "redis",
+                    "STALE",
+                    request=request,
+                )
             cached = await self._wait_for_redis_flight(key)
             if cached is not None:
-                return self._response_from_cache(cached, "redis")
+                return self._response_from_cache(
+                    cached,
+                    "redis",
+                    request=request,
+                )
             lock_token = await self._acquire_redis_lock(key)
             if not lock_token:
                 return await self._dispatch_memory(request, call_next, key)
@@ -557,47 +1370,34 @@ class CSVCacheMiddleware:
         try:
             refreshed = await asyncio.wait_for(
                 asyncio.shield(refresh),
-                timeout=self.refresh_timeout_seconds,
+                timeout=policy.refresh_timeout_seconds,
             )
         except asyncio.TimeoutError:
-            return self._response_from_cache(stale, "redis", "STALE")
+            return self._response_from_cache(
+                stale,
+                "redis",
+                "STALE",
+                request=request,
+            )
         except Exception:
-            return self._response_from_cache(stale, "redis", "STALE")
+            return self._response_from_cache(
+                stale,
+                "redis",
+                "STALE",
+                request=request,
+            )
 
         if refreshed.status_code >= 500:
-            return self._response_from_cache(stale, "redis", "STALE")
+            return self._response_from_cache(
+                stale,
+                "redis",
+                "STALE",
+                request=request,
+            )
         return refreshed
 
     async def _call_app(self, scope: Scope) -> Response:
-        response_start: Message | None = None
-        chunks: list[bytes] = []
-        request_sent = False
-
-        async def receive() -> Message:
-            nonlocal request_sent
-            if not request_sent:
-                request_sent = True
-                return {"type": "http.request", "body": b"", "more_body": False}
-            return {"type": "http.disconnect"}
-
-        async def send(message: Message) -> None:
-            nonlocal response_start
-            if message["type"] == "http.response.start":
-                response_start = message
-            elif message["type"] == "http.response.body":
-                body = message.get("body", b"")
-                if body:
-                    chunks.append(body)
-
-        await self.app(scope, receive, send)
-        if response_start is None:
-            raise RuntimeError("Cached route did not start an HTTP response")
-        response = Response(
-            content=b"".join(chunks),
-            status_code=response_start["status"],
-        )
-        response.raw_headers = list(response_start.get("headers", []))
-        return response
+        return await call_asgi_app(self.app, scope)
 
     async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         if scope["type"] != "http" or scope.get("method", "").upper() != "GET":
@@ -1,16 +1,184 @@
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+from collections.abc import AsyncIterator, Callable
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import TypeVar
+
 from sqlalchemy import create_engine
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from config import DATABASE_URL
+from sqlalchemy.orm import Session, sessionmaker
+from config import DATABASE_THREAD_POOL_SIZE, DATABASE_URL
 
 engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+T = TypeVar("T")
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+class DatabaseExecutor:
+    """Bounded thread pool for blocking database work started from async code.
+
+    Queries run here instead of on the event loop, so a slow database delays only
+    the requests waiting on it. The pool is smaller than the engine's connection
+    pool, and `stats()` reports how long calls queued and ran.
+    """
+
+    def __init__(self, max_workers: int = DATABASE_THREAD_POOL_SIZE):
+        self.max_workers = max(1, max_workers)
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._wait_seconds = 0.0
+        self._max_wait_seconds = 0.0
+        self._run_seconds = 0.0
+        self._max_run_seconds = 0.0
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="database",
+            )
+        return self._executor
+
+    def _call(self, submitted_at: float, function: Callable[[], T]) -> T:
+        started_at = time.perf_counter()
+        waited = started_at - submitted_at
+        with self._lock:
+            self._waiting -= 1
+            self._running += 1
+            self._wait_seconds += waited
+            self._max_wait_seconds = max(self._max_wait_seconds, waited)
+        failed = True
+        try:
+            result = function()
+            failed = False
+            return result
+        finally:
+            elapsed = time.perf_counter() - started_at
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+                self._failed += failed
+                self._run_seconds += elapsed
+                self._max_run_seconds = max(self._max_run_seconds, elapsed)
+
+    async def run(self, function: Callable[..., T], /, *args, **kwargs) -> T:
+        """Runs `function(*args, **kwargs)` on the pool and waits for its result."""
+        context = contextvars.copy_context()
+        call = functools.partial(context.run, function, *args, **kwargs)
+        with self._lock:
+            self._waiting += 1
+        try:
+            future = self._pool().submit(self._call, time.perf_counter(), call)
+        except BaseException:
+            with self._lock:
+                self._waiting -= 1
+            raise
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> dict:
+        with self._lock:
+            completed = self._completed
+            return {
+                "max_workers": self.max_workers,
+                "waiting": self._waiting,
+                "running": self._running,
+                "completed": completed,
+                "failed": self._failed,
+                "avg_wait_ms": round(self._wait_seconds / completed * 1000, 3)
+                if completed
+                else 0.0,
+                "max_wait_ms": round(self._max_wait_seconds * 1000, 3),
+                "avg_run_ms": round(self._run_seconds / completed * 1000, 3)
+                if completed
+                else 0.0,
+                "max_run_ms": round(self._max_run_seconds * 1000, 3),
+            }
+
+    def shutdown(self) -> None:
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+db_executor = DatabaseExecutor()
+
+
+@asynccontextmanager
+async def open_session(
+    session_factory: Callable[[], Session] = SessionLocal,
+    executor: DatabaseExecutor = db_executor,
+) -> AsyncIterator[Session]:
+    """Opens a session for async code and closes it without blocking the loop.
+
+    Closing rolls back and returns a checked-out connection, so that runs on
+    `executor`; a session that never touched the database is closed inline.
+    """
+    db = session_factory()
+    try:
+        yield db
+    finally:
+        if db.in_transaction():
+            await executor.run(db.close)
+        else:
+            db.close()
+
+
+def add_daily_counts(
+    db: Session,
+    model,
+    dimensions: tuple[str, ...],
+    rows: list[dict],
+) -> None:
+    """Adds `request_count` of each row to its daily counter in one statement.
+
+    Rows are keyed by the unique `dimensions` columns of `model`; missing counters
+    are inserted. The caller commits.
+    """
+    if not rows:
+        return
+    table = model.__table__
+    dialect = db.get_bind().dialect.name
+    if dialect in {"postgresql", "sqlite"}:
+        insert = postgresql_insert if dialect == "postgresql" else sqlite_insert
+        statement = insert(table).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c[name] for name in dimensions],
+            set_={
+                "request_count": (
+                    table.c.request_count + statement.excluded.request_count
+                )
+            },
+        )
+        db.execute(statement)
+        return
+    for row in rows:
+        updated = (
+            db.query(model)
+            .filter(*(getattr(model, name) == row[name] for name in dimensions))
+            .update(
+                {model.request_count: model.request_count + row["request_count"]},
+                synchronize_session=False,
+            )
+        )
+        if not updated:
+            db.add(model(**row))
@@ -4,7 +4,8 @@ import jwt
 from sqlalchemy.orm import Session
 from config import SECRET_KEY, ALGORITHM
 from database import get_db
-from models import AccountToken, Account
+from models import Account
+from token_cache import verified_tokens
 
 security = HTTPBearer(auto_error=False)
 
@@ -47,7 +48,7 @@ def get_current_account(
     account_id = payload.get("sub")
 
     # Check if token exists and is active in DB
-    db_token = db.query(AccountToken).filter(AccountToken.id == token_id).first()
+    db_token = verified_tokens.lookup(token_id, db)
     if not db_token:
         print(f"Auth Failed: Token {token_id} not found in database.")
         raise HTTPException(
@@ -105,17 +106,13 @@ def get_optional_current_account(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    db_token = (
-        db.query(AccountToken)
-        .filter(
-            AccountToken.id == token_id,
-            AccountToken.account_id == account_id,
-            AccountToken.is_active.is_(True),
-            AccountToken.purpose == "session",
-        )
-        .first()
-    )
-    if db_token is None:
+    db_token = verified_tokens.lookup(token_id, db)
+    if (
+        db_token is None
+        or db_token.account_id != account_id
+        or not db_token.is_active
+        or db_token.purpose != "session"
+    ):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token is invalid or revoked",
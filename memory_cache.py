@@ -0,0 +1,236 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Iterator
+from typing import Any
+
+from config import MEMORY_CACHE_MAX_BYTES
+
+
+_MISSING = object()
+
+
+def _default_size(value: Any) -> int:
+    return sys.getsizeof(value)
+
+
+class ByteLRUCache:
+    """One namespace of a MemoryBudget: an LRU bounded by bytes and entries.
+
+    Supports the dict operations the routers used on their ad hoc caches.
+    Entries larger than the namespace quota are not stored at all. Every
+    operation holds the budget's lock, so threadpool callers may share it.
+    """
+
+    def __init__(
+        self,
+        budget: "MemoryBudget",
+        name: str,
+        *,
+        max_bytes: int,
+        max_entries: int | None = None,
+        ttl_seconds: float | None = None,
+        sizeof: Callable[[Any], int] = _default_size,
+    ):
+        self.name = name
+        self.max_bytes = max(0, max_bytes)
+        self.max_entries = max(1, max_entries) if max_entries is not None else None
+        self.ttl_seconds = ttl_seconds
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.evicted_bytes = 0
+        self.expirations = 0
+        self.rejected = 0
+        self._budget = budget
+        self._sizeof = sizeof
+        self._entries: OrderedDict[Hashable, tuple[Any, int, float]] = OrderedDict()
+
+    def _live_entry(self, key: Hashable) -> tuple[Any, int, float] | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[2] <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            return None
+        return entry
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._budget._lock:
+            entry = self._live_entry(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._entries.move_to_end(key)
+            self._budget._touch(self, key)
+            return entry[0]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._budget._lock:
+            self._remove(key)
+            size = self._sizeof(value)
+            if size > self.max_bytes or size > self._budget.max_bytes:
+                self.rejected += 1
+                return
+            while self._entries and (
+                self.bytes + size > self.max_bytes
+                or (
+                    self.max_entries is not None
+                    and len(self._entries) >= self.max_entries
+                )
+            ):
+                self._evict(next(iter(self._entries)))
+            self._budget._reserve(size)
+            expires_at = (
+                time.monotonic() + self.ttl_seconds
+                if self.ttl_seconds is not None
+                else float("inf")
+            )
+            self._entries[key] = (value, size, expires_at)
+            self.bytes += size
+            self._budget._add(self, key, size)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._budget._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            self._remove(key)
+            return entry[0]
+
+    def clear(self) -> None:
+        with self._budget._lock:
+            for key in list(self._entries):
+                self._remove(key)
+
+    def _evict(self, key: Hashable) -> None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return
+        self.evictions += 1
+        self.evicted_bytes += entry[1]
+        self._remove(key)
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self.bytes -= entry[1]
+        self._budget._discard(self, key, entry[1])
+
+    def __getitem__(self, key: Hashable) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        self.set(key, value)
+
+    def __delitem__(self, key: Hashable) -> None:
+        with self._budget._lock:
+            if key not in self._entries:
+                raise KeyError(key)
+            self._remove(key)
+
+    def __contains__(self, key: object) -> bool:
+        with self._budget._lock:
+            return self._live_entry(key) is not None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[Hashable]:
+        with self._budget._lock:
+            return iter(list(self._entries))
+
+    def stats(self) -> dict[str, int | None]:
+        with self._budget._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "evicted_bytes": self.evicted_bytes,
+                "expirations": self.expirations,
+                "rejected": self.rejected,
+            }
+
+
+class MemoryBudget:
+    """Process-wide byte budget shared by every in-process cache namespace.
+
+    Each namespace evicts its own least recently used entries to stay within its
+    quota; when the namespaces together exceed the budget, the least recently
+    used entry of any namespace is evicted. Evicting for one namespace mutates
+    the others, so all of them share one lock: sync dependencies use the caches
+    from FastAPI's threadpool while the event loop uses them too.
+    """
+
+    def __init__(self, max_bytes: int = MEMORY_CACHE_MAX_BYTES):
+        self.max_bytes = max(0, max_bytes)
+        self.bytes = 0
+        self._namespaces: dict[str, ByteLRUCache] = {}
+        self._order: OrderedDict[tuple[str, Hashable], None] = OrderedDict()
+        self._lock = threading.RLock()
+
+    def namespace(
+        self,
+        name: str,
+        *,
+        max_bytes: int | None = None,
+        max_entries: int | None = None,
+        ttl_seconds: float | None = None,
+        sizeof: Callable[[Any], int] = _default_size,
+    ) -> ByteLRUCache:
+        """Returns the namespace `name`, creating it with the given quota."""
+        with self._lock:
+            cache = self._namespaces.get(name)
+            if cache is None:
+                cache = ByteLRUCache(
+                    self,
+                    name,
+                    max_bytes=self.max_bytes if max_bytes is None else max_bytes,
+                    max_entries=max_entries,
+                    ttl_seconds=ttl_seconds,
+                    sizeof=sizeof,
+                )
+                self._namespaces[name] = cache
+            return cache
+
+    def _touch(self, cache: ByteLRUCache, key: Hashable) -> None:
+        self._order.move_to_end((cache.name, key))
+
+    def _add(self, cache: ByteLRUCache, key: Hashable, size: int) -> None:
+        self._order[(cache.name, key)] = None
+        self.bytes += size
+
+    def _discard(self, cache: ByteLRUCache, key: Hashable, size: int) -> None:
+        self._order.pop((cache.name, key), None)
+        self.bytes -= size
+
+    def _reserve(self, size: int) -> None:
+        while self._order and self.bytes + size > self.max_bytes:
+            name, key = next(iter(self._order))
+            self._namespaces[name]._evict(key)
+
+    def stats(self) -> dict[str, object]:
+        with self._lock:
+            return {
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "namespaces": {
+                    name: cache.stats()
+                    for name, cache in sorted(self._namespaces.items())
+                },
+            }
+
+
+memory_budget = MemoryBudget()
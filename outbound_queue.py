@@ -1,31 +1,37 @@
 import asyncio
+import importlib.util
 import json
 import logging
 import math
 import os
 import re
 import time
-from collections.abc import AsyncIterator, Callable
-from contextlib import asynccontextmanager
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterator
+from contextlib import AsyncExitStack, asynccontextmanager, contextmanager
+from contextvars import ContextVar
 from dataclasses import dataclass, replace
 from email.utils import parsedate_to_datetime
 
 import httpx
 from redis.exceptions import RedisError
-from sqlalchemy.dialects.postgresql import insert as postgresql_insert
-from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 
 from config import (
+    OUTBOUND_ADAPTIVE_RATE_ENABLED,
+    OUTBOUND_ADAPTIVE_WINDOW_SECONDS,
     OUTBOUND_ANALYTICS_FLUSH_SECONDS,
     OUTBOUND_API_LIMITS_JSON,
+    OUTBOUND_HTTP2_PROVIDERS,
+    OUTBOUND_KEEPALIVE_SECONDS,
     OUTBOUND_QUEUE_429_RETRIES,
     OUTBOUND_QUEUE_ENABLED,
+    OUTBOUND_QUEUE_LEASE_MS,
     OUTBOUND_QUEUE_MAX_WAIT_SECONDS,
 )
-from database import SessionLocal
+from database import SessionLocal, add_daily_counts, db_executor
 from models import ExternalRequestDaily
-from redis_client import get_redis_client
+from redis_client import RedisScript, get_redis_client
 
 logger = logging.getLogger(__name__)
 
@@ -37,14 +43,23 @@ class ProviderPolicy:
     requests: int
     period_seconds: float
     concurrency: int
+    # Highest rate the adaptive controller may reach; defaults to `requests`.
+    max_requests: int | None = None
 
     @property
     def interval_ms(self) -> float:
         return self.period_seconds * 1000 / self.requests
 
+    @property
+    def ceiling(self) -> int:
+        return self.max_requests or self.requests
+
 
 # Published limits get headroom. Providers without public limits use deliberately
 # conservative defaults and can be adjusted without code via OUTBOUND_API_LIMITS_JSON.
+# Those that tolerate more traffic than the default get a higher `max_requests`
+# ceiling, which the adaptive controller probes towards while responses are
+# healthy.
 DEFAULT_POLICIES = (
     ProviderPolicy("coinmarketcap", ("pro-api.coinmarketcap.com",), 45, 60, 2),
     ProviderPolicy("coinbase", ("api.coinbase.com",), 8, 1, 4),
@@ -81,7 +96,7 @@ DEFAULT_POLICIES = (
     ProviderPolicy("fluid_lite", ("api.fluid-lite.instadapp.ai",), 3, 1, 2),
     ProviderPolicy("aave_v3", ("api.v3.aave.com",), 3, 1, 2),
     ProviderPolicy("aave_v4", ("api.v4.aave.com",), 3, 1, 2),
-    ProviderPolicy("ethereum_rpc", ("ethereum-rpc.publicnode.com",), 4, 1, 4),
+    ProviderPolicy("ethereum_rpc", ("ethereum-rpc.publicnode.com",), 4, 1, 4, 12),
     ProviderPolicy("bsc_rpc", ("bsc-dataseed.bnbchain.org",), 20, 1, 4),
     ProviderPolicy("monad_rpc", ("rpc.monad.xyz",), 4, 1, 4),
     ProviderPolicy(
@@ -107,11 +122,19 @@ DEFAULT_POLICIES = (
         3,
         1,
         2,
+        10,
     ),
     ProviderPolicy("curve", ("api.curve.finance",), 2, 1, 2),
     ProviderPolicy("morpho", ("api.morpho.org",), 3, 1, 2),
-    ProviderPolicy("base_rpc", ("base-rpc.publicnode.com",), 4, 1, 4),
-    ProviderPolicy("arbitrum_rpc", ("arbitrum-one-rpc.publicnode.com",), 4, 1, 4),
+    ProviderPolicy("base_rpc", ("base-rpc.publicnode.com",), 4, 1, 4, 12),
+    ProviderPolicy(
+        "arbitrum_rpc",
+        ("arbitrum-one-rpc.publicnode.com",),
+        4,
+        1,
+        4,
+        12,
+    ),
     ProviderPolicy("euler", ("v3.euler.finance",), 3, 1, 2),
     ProviderPolicy("lido", ("eth-api.lido.fi",), 3, 1, 2),
     ProviderPolicy("jupiter_perps", ("perps-api.jup.ag",), 3, 1, 2),
@@ -122,6 +145,7 @@ DEFAULT_POLICIES = (
         4,
         1,
         4,
+        12,
     ),
     ProviderPolicy("pendle", ("api-v2.pendle.finance",), 10, 60, 2),
     ProviderPolicy("trongrid", ("api.trongrid.io",), 2, 1, 2),
@@ -135,38 +159,357 @@ DEFAULT_POLICIES = (
 )
 FALLBACK_POLICY = ProviderPolicy("other", (), 2, 1, 2)
 
-RATE_SLOT_SCRIPT = """
+# Reserves `cost` consecutive units of the provider's slot timeline, starting
+# after any active cooldown. Returns the wait before the first unit and the
+# stored end of the timeline, which identifies the block when it is returned.
+# Lower-priority lanes pass a backlog limit and reserve nothing while the
+# timeline is booked further ahead than that. Units are spaced by the shared
+# adaptive interval when one is stored, bounded by the provider's ceiling, and
+# that interval is returned as well.
+RATE_SLOT_SCRIPT = RedisScript("""
 local now_parts = redis.call('TIME')
 local now_ms = (tonumber(now_parts[1]) * 1000) + math.floor(tonumber(now_parts[2]) / 1000)
 local interval_ms = tonumber(ARGV[1])
 local cost = tonumber(ARGV[2])
 local max_wait_ms = tonumber(ARGV[3])
+local max_backlog_ms = tonumber(ARGV[4])
+local adaptive_ms = tonumber(redis.call('HGET', KEYS[3], 'interval_ms'))
+if adaptive_ms then
+    interval_ms = math.max(tonumber(ARGV[5]), adaptive_ms)
+end
+local cooldown_ms = math.max(0, redis.call('PTTL', KEYS[2]))
 local current = tonumber(redis.call('GET', KEYS[1])) or now_ms
-local scheduled = math.max(now_ms, current)
+local scheduled = math.max(now_ms + cooldown_ms, current)
 local wait_ms = scheduled - now_ms
-if wait_ms > max_wait_ms then
+if wait_ms - cooldown_ms > max_wait_ms then
     return {-1, wait_ms}
 end
-local next_slot = scheduled + (interval_ms * cost)
-local ttl_ms = math.max(1000, math.ceil(next_slot - now_ms + max_wait_ms))
-redis.call('SET', KEYS[1], tostring(next_slot), 'PX', ttl_ms)
-return {math.floor(wait_ms), math.floor(next_slot)}
-"""
+if max_backlog_ms >= 0 and wait_ms > max_backlog_ms then
+    return {-2, wait_ms}
+end
+local next_slot = tostring(scheduled + (interval_ms * cost))
+local ttl_ms = math.max(1000, math.ceil(tonumber(next_slot) - now_ms + max_wait_ms))
+redis.call('SET', KEYS[1], next_slot, 'PX', ttl_ms)
+return {math.floor(wait_ms), next_slot, tostring(interval_ms)}
+""")
 
-COOLDOWN_SCRIPT = """
+# Gives back the unused tail of a reserved block, but only while no other
+# reservation has been made after it, so no unit is ever handed out twice.
+RETURN_SLOTS_SCRIPT = RedisScript("""
+local current = redis.call('GET', KEYS[1])
+if current ~= ARGV[1] then
+    return 0
+end
+local now_parts = redis.call('TIME')
+local now_ms = (tonumber(now_parts[1]) * 1000) + math.floor(tonumber(now_parts[2]) / 1000)
+local returned = tonumber(current) - tonumber(ARGV[2])
+if returned <= now_ms then
+    redis.call('DEL', KEYS[1])
+else
+    redis.call('SET', KEYS[1], tostring(returned), 'KEEPTTL')
+end
+return 1
+""")
+
+# Pushes the start of the provider's free timeline to at least ARGV[1] ms from
+# now, when the provider reports less quota left than the timeline would spend.
+RESERVE_UNTIL_SCRIPT = RedisScript("""
+local now_parts = redis.call('TIME')
+local now_ms = (tonumber(now_parts[1]) * 1000) + math.floor(tonumber(now_parts[2]) / 1000)
+local target = now_ms + tonumber(ARGV[1])
+local current = tonumber(redis.call('GET', KEYS[1])) or 0
+if current >= target then
+    return 0
+end
+local ttl_ms = math.ceil(tonumber(ARGV[1]) + tonumber(ARGV[2]))
+redis.call('SET', KEYS[1], tostring(target), 'PX', ttl_ms)
+return 1
+""")
+
+COOLDOWN_SCRIPT = RedisScript("""
 local requested_ttl = tonumber(ARGV[1])
 local current_ttl = redis.call('PTTL', KEYS[1])
 if current_ttl < requested_ttl then
     redis.call('SET', KEYS[1], '1', 'PX', requested_ttl)
 end
 return math.max(current_ttl, requested_ttl)
-"""
+""")
+QUEUE_METRICS_PUBLISH_SECONDS = 0.25
+
+# Moves a provider's shared rate: `cut` multiplies it by ARGV[6] at most once per
+# hold period, anything else adds ARGV[6] at most once per hold period after the
+# last change, so replicas reporting the same window do not each raise it.
+ADJUST_RATE_SCRIPT = RedisScript("""
+local now_parts = redis.call('TIME')
+local now_ms = (tonumber(now_parts[1]) * 1000) + math.floor(tonumber(now_parts[2]) / 1000)
+local floor_rate = tonumber(ARGV[2])
+local ceiling = tonumber(ARGV[3])
+local period_ms = tonumber(ARGV[4])
+local amount = tonumber(ARGV[6])
+local hold_ms = tonumber(ARGV[7])
+local rate = tonumber(redis.call('HGET', KEYS[1], 'rate')) or tonumber(ARGV[1])
+local cut_at = tonumber(redis.call('HGET', KEYS[1], 'cut_at')) or 0
+local raised_at = tonumber(redis.call('HGET', KEYS[1], 'raised_at')) or 0
+rate = math.min(ceiling, rate)
+if ARGV[5] == 'cut' then
+    if now_ms - cut_at >= hold_ms then
+        rate = math.max(floor_rate, rate * amount)
+        redis.call('HSET', KEYS[1], 'cut_at', tostring(now_ms))
+    end
+elseif now_ms - math.max(cut_at, raised_at) >= hold_ms then
+    rate = math.min(ceiling, rate + amount)
+    redis.call('HSET', KEYS[1], 'raised_at', tostring(now_ms))
+end
+redis.call(
+    'HSET', KEYS[1],
+    'rate', tostring(rate),
+    'interval_ms', tostring(period_ms / rate)
+)
+redis.call('PEXPIRE', KEYS[1], tonumber(ARGV[8]))
+return tostring(rate)
+""")
+# The additive step is a share of the provider's default rate per healthy window;
+# a cut halves the rate, down to a tenth of the default.
+ADAPTIVE_INCREASE_SHARE = 0.05
+ADAPTIVE_DECREASE_FACTOR = 0.5
+ADAPTIVE_MIN_SHARE = 0.1
+ADAPTIVE_CUT_HOLD_SECONDS = 2.0
+ADAPTIVE_MIN_SAMPLES = 5
+ADAPTIVE_SERVER_ERROR_BURST = 3
+ADAPTIVE_LATENCY_TOLERANCE = 1.5
+ADAPTIVE_STATE_TTL_SECONDS = 3600
+
+LANE_INTERACTIVE = "interactive"
+LANE_VALIDATION = "validation"
+LANE_REFRESH = "refresh"
+# Lanes in priority order, with how far ahead a provider's shared timeline may
+# already be booked before the lane waits for it to drain. Interactive requests
+# can always queue, so background work never delays them by more than this.
+OUTBOUND_LANES: dict[str, float | None] = {
+    LANE_INTERACTIVE: None,
+    LANE_VALIDATION: 5.0,
+    LANE_REFRESH: 1.0,
+}
+_outbound_lane: ContextVar[str] = ContextVar(
+    "outbound_lane",
+    default=LANE_INTERACTIVE,
+)
+
+
+@contextmanager
+def outbound_lane(lane: str) -> Iterator[None]:
+    """Sends outbound requests made inside the block through `lane`."""
+    if lane not in OUTBOUND_LANES:
+        raise ValueError(f"Unknown outbound lane: {lane}")
+    token = _outbound_lane.set(lane)
+    try:
+        yield
+    finally:
+        _outbound_lane.reset(token)
+
+
+def current_outbound_lane() -> str:
+    return _outbound_lane.get()
 
 
 class OutboundQueueTimeout(httpx.PoolTimeout):
     pass
 
 
+class _LaneSemaphore:
+    """A semaphore that wakes waiters from the most urgent lane first."""
+
+    def __init__(self, value: int):
+        self._value = value
+        self._waiters: dict[str, deque[asyncio.Future[None]]] = {
+            lane: deque() for lane in OUTBOUND_LANES
+        }
+
+    async def acquire(self, lane: str) -> None:
+        if self._value > 0 and not any(self._waiters.values()):
+            self._value -= 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[lane].append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The permit was handed over just before the cancellation.
+                self.release()
+            elif future in self._waiters[lane]:
+                # release() already dropped it if it ran after the cancellation.
+                self._waiters[lane].remove(future)
+            raise
+
+    def release(self) -> None:
+        for waiters in self._waiters.values():
+            while waiters:
+                future = waiters.popleft()
+                if not future.done():
+                    future.set_result(None)
+                    return
+        self._value += 1
+
+
+# Weight budgets behind Binance's per-minute X-MBX-USED-WEIGHT-1M counters, which
+# are kept separately for spot and futures.
+BINANCE_WEIGHT_LIMITS = {"api.binance.com": 6000, "fapi.binance.com": 2400}
+# Share of a provider-reported quota the queue leaves unspent until it resets.
+PROVIDER_QUOTA_RESERVE = 0.1
+
+
+@dataclass(frozen=True)
+class _ReportedUsage:
+    """A provider's own rate-limit counter, read from response headers."""
+
+    scope: str
+    used: int
+    limit: int
+    reset_after: float
+    window: int
+
+
+@dataclass
+class _ObservedWeight:
+    """Weights the provider charged for one endpoint, next to our static cost."""
+
+    static_cost: int
+    samples: int = 0
+    min_cost: int | None = None
+    max_cost: int = 0
+
+
+@dataclass
+class _RateWindow:
+    """Responses from one provider since its rate was last evaluated here."""
+
+    started_at: float
+    successes: int = 0
+    server_errors: int = 0
+    latency_total: float = 0.0
+
+
+@dataclass
+class _SlotLease:
+    """Consecutive slots reserved in Redis and handed out by this replica."""
+
+    next_at: float
+    units: int
+    interval: float
+    end: bytes
+
+    def take(self, cost: int) -> float:
+        scheduled = self.next_at
+        self.next_at += cost * self.interval
+        self.units -= cost
+        return scheduled
+
+
+class OutboundClientRegistry:
+    """Process-wide keep-alive connection pools, one per provider.
+
+    Routers still open a short-lived `queued_async_client` per request, but while
+    the registry is started its transport sends through these shared pools, so
+    repeated calls to a provider reuse warm TCP and TLS connections. Each pool
+    holds at most `ProviderPolicy.concurrency` connections, which is also how
+    many requests the queue lets run at once. Before `start()` and after
+    `aclose()`, for example in scripts and tests, every client gets a private
+    transport that is closed with it.
+    """
+
+    def __init__(
+        self,
+        *,
+        keepalive_seconds: float = OUTBOUND_KEEPALIVE_SECONDS,
+        http2_providers: frozenset[str] = OUTBOUND_HTTP2_PROVIDERS,
+        transport_factory: Callable[..., httpx.AsyncBaseTransport] = (
+            httpx.AsyncHTTPTransport
+        ),
+    ):
+        self.keepalive_seconds = max(1.0, keepalive_seconds)
+        self._http2_providers = http2_providers
+        self._transport_factory = transport_factory
+        self._transports: dict[tuple[str, bool], httpx.AsyncBaseTransport] = {}
+        self._limits: dict[tuple[str, bool], int] = {}
+        self._http2: dict[tuple[str, bool], bool] = {}
+        self._requests: dict[tuple[str, bool], int] = {}
+        self._started = False
+        self._http2_available = importlib.util.find_spec("h2") is not None
+        if http2_providers and not self._http2_available:
+            logger.warning(
+                "OUTBOUND_HTTP2_PROVIDERS is set but the h2 package is missing; "
+                "using HTTP/1.1"
+            )
+
+    @property
+    def started(self) -> bool:
+        return self._started
+
+    def start(self) -> None:
+        self._started = True
+
+    def transport(
+        self,
+        policy: ProviderPolicy,
+        trust_env: bool,
+    ) -> httpx.AsyncBaseTransport | None:
+        """Returns the shared pool for `policy`, or None when not started."""
+        if not self._started:
+            return None
+        key = (policy.name, trust_env)
+        transport = self._transports.get(key)
+        if transport is None:
+            http2 = self._http2_available and policy.name in self._http2_providers
+            transport = self._transport_factory(
+                trust_env=trust_env,
+                retries=0,
+                http2=http2,
+                limits=httpx.Limits(
+                    max_connections=policy.concurrency,
+                    max_keepalive_connections=policy.concurrency,
+                    keepalive_expiry=self.keepalive_seconds,
+                ),
+            )
+            self._transports[key] = transport
+            self._limits[key] = policy.concurrency
+            self._http2[key] = http2
+        self._requests[key] = self._requests.get(key, 0) + 1
+        return transport
+
+    async def aclose(self) -> None:
+        self._started = False
+        transports = list(self._transports.values())
+        self._transports.clear()
+        for transport in transports:
+            try:
+                await transport.aclose()
+            except Exception:
+                logger.exception("Could not close an outbound connection pool")
+
+    def stats(self) -> list[dict[str, object]]:
+        result = []
+        for (provider, trust_env), transport in sorted(self._transports.items()):
+            # httpx exposes no public pool view; read the httpcore pool if present.
+            connections = list(
+                getattr(getattr(transport, "_pool", None), "connections", ())
+            )
+            idle = sum(1 for connection in connections if connection.is_idle())
+            result.append(
+                {
+                    "provider": provider,
+                    "trust_env": trust_env,
+                    "http2": self._http2[(provider, trust_env)],
+                    "max_connections": self._limits[(provider, trust_env)],
+                    "connections": len(connections),
+                    "active": len(connections) - idle,
+                    "idle": idle,
+                    "requests": self._requests.get((provider, trust_env), 0),
+                }
+            )
+        return result
+
+
 def _load_policies() -> tuple[ProviderPolicy, ...]:
     if not OUTBOUND_API_LIMITS_JSON.strip():
         return DEFAULT_POLICIES
@@ -186,15 +529,22 @@ def _load_policies() -> tuple[ProviderPolicy, ...]:
             policies.append(policy)
             continue
         try:
+            requests = max(1, int(raw.get("requests", policy.requests)))
+            if "max_requests" in raw:
+                max_requests = max(1, int(raw["max_requests"]))
+                requests = min(requests, max_requests)
+            else:
+                max_requests = max(requests, policy.ceiling)
             policies.append(
                 replace(
                     policy,
-                    requests=max(1, int(raw.get("requests", policy.requests))),
+                    requests=requests,
                     period_seconds=max(
                         0.1,
                         float(raw.get("period_seconds", policy.period_seconds)),
                     ),
                     concurrency=max(1, int(raw.get("concurrency", policy.concurrency))),
+                    max_requests=max_requests,
                 )
             )
         except (TypeError, ValueError):
@@ -217,6 +567,47 @@ def _retry_after_seconds(response: httpx.Response, attempt: int) -> float:
     return min(2**attempt, 30.0)
 
 
+def _reported_usage(
+    provider: str,
+    request: httpx.Request,
+    response: httpx.Response,
+) -> _ReportedUsage | None:
+    headers = response.headers
+    try:
+        if provider == "binance":
+            used = headers.get("x-mbx-used-weight-1m") or headers.get(
+                "x-mbx-used-weight"
+            )
+            limit = BINANCE_WEIGHT_LIMITS.get(request.url.host)
+            if used is None or limit is None:
+                return None
+            now = time.time()
+            return _ReportedUsage(
+                scope=request.url.host,
+                used=int(used),
+                limit=limit,
+                reset_after=60 - now % 60,
+                window=int(now // 60),
+            )
+        if provider == "bybit":
+            remaining = headers.get("x-bapi-limit-status")
+            limit = headers.get("x-bapi-limit")
+            reset_at = headers.get("x-bapi-limit-reset-timestamp")
+            if remaining is None or limit is None or reset_at is None:
+                return None
+            # Bybit counts each endpoint separately.
+            return _ReportedUsage(
+                scope=request.url.path,
+                used=int(limit) - int(remaining),
+                limit=int(limit),
+                reset_after=max(0.0, int(reset_at) / 1000 - time.time()),
+                window=int(reset_at),
+            )
+    except ValueError:
+        return None
+    return None
+
+
 def _request_cost(provider: str, request: httpx.Request, content: bytes) -> int:
     if provider == "binance":
         return {
@@ -251,13 +642,18 @@ class OutboundRequestQueue:
         *,
         session_factory: Callable[[], Session] = SessionLocal,
         analytics_flush_seconds: float = OUTBOUND_ANALYTICS_FLUSH_SECONDS,
+        clients: OutboundClientRegistry | None = None,
+        lease_ms: int = OUTBOUND_QUEUE_LEASE_MS,
+        adaptive: bool = OUTBOUND_ADAPTIVE_RATE_ENABLED,
+        adaptive_window_seconds: float = OUTBOUND_ADAPTIVE_WINDOW_SECONDS,
     ):
         self.policies = _load_policies()
+        self.clients = clients or OutboundClientRegistry()
         self.by_host = {
             host: policy for policy in self.policies for host in policy.hosts
         }
         self._semaphores = {
-            policy.name: asyncio.Semaphore(policy.concurrency)
+            policy.name: _LaneSemaphore(policy.concurrency)
             for policy in (*self.policies, FALLBACK_POLICY)
         }
         self._local_locks = {
@@ -267,6 +663,21 @@ class OutboundRequestQueue:
         self._local_cooldown: dict[str, float] = {}
         self._local_waiting: dict[str, int] = {}
         self._local_in_flight: dict[str, int] = {}
+        self._lane_metrics: dict[tuple[str, str, str], int] = {}
+        self.lease_ms = max(0, lease_ms)
+        self._slot_leases: dict[tuple[str, str], _SlotLease] = {}
+        self._slot_demand: dict[tuple[str, str], int] = {}
+        self._slot_returns: set[asyncio.Task[None]] = set()
+        self.adaptive = adaptive
+        self._adaptive_window_seconds = adaptive_window_seconds
+        self._effective_rates: dict[str, float] = {}
+        self._rate_windows: dict[str, _RateWindow] = {}
+        self._rate_baselines: dict[str, float] = {}
+        self._local_rate_changes: dict[str, tuple[float, float]] = {}
+        self._reported_counters: dict[tuple[str, str], tuple[int, int]] = {}
+        self._observed_weights: dict[tuple[str, str], _ObservedWeight] = {}
+        self._dirty_metrics: set[str] = set()
+        self._metrics_publisher: asyncio.Task[None] | None = None
         instance_name = os.getenv("HOSTNAME") or f"process-{id(self):x}"
         self._instance_name = re.sub(r"[^a-zA-Z0-9_-]", "-", instance_name)
         self._metrics_ttl_seconds = max(
@@ -292,63 +703,272 @@ class OutboundRequestQueue:
             )
             self._last_redis_warning = now
 
-    async def _reserve_redis(self, policy: ProviderPolicy, cost: int) -> float | None:
+    def _interval_ms(self, policy: ProviderPolicy) -> float:
+        """The spacing between units at the provider's last known effective rate."""
+        rate = self._effective_rates.get(policy.name)
+        if rate is None:
+            return policy.interval_ms
+        return policy.period_seconds * 1000 / rate
+
+    def _lease_units(self, policy: ProviderPolicy, cost: int, lane: str) -> int:
+        """Sizes a reservation to the units this replica's lane is waiting for.
+
+        Blocks never span more than `lease_ms` of the provider's timeline, so
+        slow providers still reserve one request at a time.
+        """
+        most = max(cost, math.floor(self.lease_ms / self._interval_ms(policy)))
+        return max(cost, min(most, self._slot_demand.get((policy.name, lane), 0)))
+
+    def _return_slots(self, client, policy: ProviderPolicy, lease: _SlotLease) -> None:
+        if lease.units <= 0 or lease.next_at <= time.monotonic():
+            return
+
+        async def give_back() -> None:
+            try:
+                await RETURN_SLOTS_SCRIPT(
+                    client,
+                    [f"datahunt:queue:slot:{policy.name}"],
+                    [lease.end, lease.units * lease.interval * 1000],
+                )
+            except RedisError as exc:
+                self._warn_redis(exc)
+
+        task = asyncio.create_task(give_back())
+        self._slot_returns.add(task)
+        task.add_done_callback(self._slot_returns.discard)
+
+    async def _reserve_redis(
+        self,
+        policy: ProviderPolicy,
+        cost: int,
+        lane: str = LANE_INTERACTIVE,
+    ) -> float | None:
+        """Returns the wait for a slot on the shared timeline, or None without Redis.
+
+        Requests of one lane waiting here at the same time share one reservation:
+        the first reserves a block for all of them in one script call and the
+        rest take their consecutive slots locally. Units left over when nothing
+        else is waiting are returned, so the global rate stays exact. Background
+        lanes wait without reserving while the timeline is booked beyond their
+        backlog limit.
+        """
         client = get_redis_client()
         if client is None:
             return None
-        try:
-            cooldown_ms = await client.pttl(f"datahunt:queue:cooldown:{policy.name}")
-            if cooldown_ms > 0:
-                await asyncio.sleep(cooldown_ms / 1000)
-            result = await client.eval(
-                RATE_SLOT_SCRIPT,
-                1,
-                f"datahunt:queue:slot:{policy.name}",
-                policy.interval_ms,
-                cost,
-                OUTBOUND_QUEUE_MAX_WAIT_SECONDS * 1000,
+        backlog = OUTBOUND_LANES[lane]
+        deadline = time.monotonic() + OUTBOUND_QUEUE_MAX_WAIT_SECONDS
+        lease_key = (policy.name, lane)
+        while True:
+            self._slot_demand[lease_key] = self._slot_demand.get(lease_key, 0) + cost
+            try:
+                async with self._local_locks[policy.name]:
+                    lease = self._slot_leases.get(lease_key)
+                    if lease is not None and (
+                        lease.units < cost
+                        or lease.next_at < time.monotonic() - lease.interval
+                    ):
+                        # Slots already in the past cannot be used without a burst.
+                        del self._slot_leases[lease_key]
+                        self._return_slots(client, policy, lease)
+                        lease = None
+                    if lease is None:
+                        units = self._lease_units(policy, cost, lane)
+                        try:
+                            result = await RATE_SLOT_SCRIPT(
+                                client,
+                                [
+                                    f"datahunt:queue:slot:{policy.name}",
+                                    f"datahunt:queue:cooldown:{policy.name}",
+                                    f"datahunt:queue:rate:{policy.name}",
+                                ],
+                                [
+                                    policy.interval_ms,
+                                    units,
+                                    OUTBOUND_QUEUE_MAX_WAIT_SECONDS * 1000,
+                                    -1 if backlog is None else backlog * 1000,
+                                    policy.period_seconds * 1000 / policy.ceiling,
+                                ],
+                            )
+                        except RedisError as exc:
+                            self._warn_redis(exc)
+                            return None
+                        booked = int(result[0])
+                        if booked == -1:
+                            raise OutboundQueueTimeout(
+                                f"{policy.name} queue wait would exceed "
+                                f"{OUTBOUND_QUEUE_MAX_WAIT_SECONDS}s"
+                            )
+                        if booked == -2:
+                            drain = int(result[1]) / 1000 - (backlog or 0)
+                            lease = None
+                        else:
+                            interval_ms = float(result[2])
+                            self._effective_rates[policy.name] = (
+                                policy.period_seconds * 1000 / interval_ms
+                            )
+                            lease = _SlotLease(
+                                next_at=time.monotonic() + booked / 1000,
+                                units=units,
+                                interval=interval_ms / 1000,
+                                end=result[1],
+                            )
+                            self._slot_leases[lease_key] = lease
+                    if lease is not None:
+                        scheduled = lease.take(cost)
+                        if lease.units <= 0 or self._slot_demand[lease_key] <= cost:
+                            del self._slot_leases[lease_key]
+                            self._return_slots(client, policy, lease)
+                        return max(0.0, scheduled - time.monotonic())
+            finally:
+                self._slot_demand[lease_key] -= cost
+            await self._wait_for_backlog(policy, drain, deadline)
+
+    @staticmethod
+    async def _wait_for_backlog(
+        policy: ProviderPolicy,
+        seconds: float,
+        deadline: float,
+    ) -> None:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise OutboundQueueTimeout(
+                f"{policy.name} queue wait would exceed "
+                f"{OUTBOUND_QUEUE_MAX_WAIT_SECONDS}s"
             )
-            if int(result[0]) < 0:
-                raise OutboundQueueTimeout(
-                    f"{policy.name} queue wait would exceed "
-                    f"{OUTBOUND_QUEUE_MAX_WAIT_SECONDS}s"
+        await asyncio.sleep(min(remaining, max(seconds, policy.interval_ms / 1000)))
+
+    async def observe(
+        self,
+        policy: ProviderPolicy,
+        status_code: int | None,
+        latency: float,
+    ) -> None:
+        """Feeds one upstream result to the provider's adaptive rate.
+
+        A 429 cuts the rate at once and a burst of 5xx responses or timeouts
+        (`status_code` None) within a window cuts it as well. A window of
+        healthy responses whose latency stays near the provider's baseline
+        raises it by one step, up to the policy's ceiling.
+        """
+        if not self.adaptive:
+            return
+        now = time.monotonic()
+        window = self._rate_windows.setdefault(policy.name, _RateWindow(now))
+        if status_code == 429:
+            self._rate_windows[policy.name] = _RateWindow(now)
+            await self._adjust_rate(policy, cut=True)
+            return
+        if status_code is None or status_code >= 500:
+            window.server_errors += 1
+            if window.server_errors >= ADAPTIVE_SERVER_ERROR_BURST:
+                self._rate_windows[policy.name] = _RateWindow(now)
+                await self._adjust_rate(policy, cut=True)
+            return
+        window.successes += 1
+        window.latency_total += latency
+        if now - window.started_at < self._adaptive_window_seconds:
+            return
+        self._rate_windows[policy.name] = _RateWindow(now)
+        if window.successes < ADAPTIVE_MIN_SAMPLES:
+            return
+        mean = window.latency_total / window.successes
+        baseline = self._rate_baselines.get(policy.name, mean)
+        self._rate_baselines[policy.name] = baseline * 0.8 + mean * 0.2
+        if window.server_errors or mean > baseline * ADAPTIVE_LATENCY_TOLERANCE:
+            return
+        if self._effective_rates.get(policy.name, policy.requests) >= policy.ceiling:
+            return
+        await self._adjust_rate(policy, cut=False)
+
+    async def _adjust_rate(self, policy: ProviderPolicy, *, cut: bool) -> None:
+        amount = (
+            ADAPTIVE_DECREASE_FACTOR
+            if cut
+            else policy.requests * ADAPTIVE_INCREASE_SHARE
+        )
+        hold = ADAPTIVE_CUT_HOLD_SECONDS if cut else self._adaptive_window_seconds
+        floor = policy.requests * ADAPTIVE_MIN_SHARE
+        client = get_redis_client()
+        if client is not None:
+            try:
+                rate = await ADJUST_RATE_SCRIPT(
+                    client,
+                    [f"datahunt:queue:rate:{policy.name}"],
+                    [
+                        policy.requests,
+                        floor,
+                        policy.ceiling,
+                        policy.period_seconds * 1000,
+                        "cut" if cut else "raise",
+                        amount,
+                        hold * 1000,
+                        ADAPTIVE_STATE_TTL_SECONDS * 1000,
+                    ],
                 )
-            return int(result[0]) / 1000
-        except OutboundQueueTimeout:
-            raise
-        except RedisError as exc:
-            self._warn_redis(exc)
-            return None
+                self._effective_rates[policy.name] = float(rate)
+                return
+            except RedisError as exc:
+                self._warn_redis(exc)
+        now = time.monotonic()
+        cut_at, raised_at = self._local_rate_changes.get(policy.name, (-math.inf,) * 2)
+        rate = min(
+            policy.ceiling,
+            self._effective_rates.get(policy.name, policy.requests),
+        )
+        if cut and now - cut_at >= hold:
+            rate = max(floor, rate * amount)
+            cut_at = now
+        elif not cut and now - max(cut_at, raised_at) >= hold:
+            rate = min(policy.ceiling, rate + amount)
+            raised_at = now
+        self._effective_rates[policy.name] = rate
+        self._local_rate_changes[policy.name] = (cut_at, raised_at)
 
-    async def _reserve_local(self, policy: ProviderPolicy, cost: int) -> float:
-        async with self._local_locks[policy.name]:
-            now = time.monotonic()
-            cooldown = max(0.0, self._local_cooldown.get(policy.name, 0.0) - now)
-            scheduled = max(
-                now + cooldown,
-                self._local_next_slot.get(policy.name, now),
-            )
-            wait = scheduled - now
-            if wait > OUTBOUND_QUEUE_MAX_WAIT_SECONDS:
-                raise OutboundQueueTimeout(
-                    f"{policy.name} queue wait would exceed "
-                    f"{OUTBOUND_QUEUE_MAX_WAIT_SECONDS}s"
+    async def _reserve_local(
+        self,
+        policy: ProviderPolicy,
+        cost: int,
+        lane: str = LANE_INTERACTIVE,
+    ) -> float:
+        backlog = OUTBOUND_LANES[lane]
+        deadline = time.monotonic() + OUTBOUND_QUEUE_MAX_WAIT_SECONDS
+        while True:
+            async with self._local_locks[policy.name]:
+                now = time.monotonic()
+                cooldown = max(0.0, self._local_cooldown.get(policy.name, 0.0) - now)
+                scheduled = max(
+                    now + cooldown,
+                    self._local_next_slot.get(policy.name, now),
                 )
-            self._local_next_slot[policy.name] = (
-                scheduled + policy.interval_ms * cost / 1000
-            )
-            return wait
+                wait = scheduled - now
+                if wait - cooldown > OUTBOUND_QUEUE_MAX_WAIT_SECONDS:
+                    raise OutboundQueueTimeout(
+                        f"{policy.name} queue wait would exceed "
+                        f"{OUTBOUND_QUEUE_MAX_WAIT_SECONDS}s"
+                    )
+                if backlog is None or wait <= backlog:
+                    self._local_next_slot[policy.name] = (
+                        scheduled + self._interval_ms(policy) * cost / 1000
+                    )
+                    return wait
+            await self._wait_for_backlog(policy, wait - backlog, deadline)
+
+    def _drop_leases(self, client, policy: ProviderPolicy) -> None:
+        for lane in OUTBOUND_LANES:
+            lease = self._slot_leases.pop((policy.name, lane), None)
+            if lease is not None:
+                self._return_slots(client, policy, lease)
 
     async def _set_cooldown(self, policy: ProviderPolicy, seconds: float) -> None:
         ttl_ms = max(100, math.ceil(seconds * 1000))
         client = get_redis_client()
         if client is not None:
+            self._drop_leases(client, policy)
             try:
-                await client.eval(
-                    COOLDOWN_SCRIPT,
-                    1,
-                    f"datahunt:queue:cooldown:{policy.name}",
-                    ttl_ms,
+                await COOLDOWN_SCRIPT(
+                    client,
+                    [f"datahunt:queue:cooldown:{policy.name}"],
+                    [ttl_ms],
                 )
                 return
             except RedisError as exc:
@@ -358,23 +978,131 @@ class OutboundRequestQueue:
             time.monotonic() + seconds,
         )
 
+    async def reconcile(
+        self,
+        policy: ProviderPolicy,
+        request: httpx.Request,
+        cost: int,
+        usage: _ReportedUsage,
+    ) -> None:
+        """Aligns the shared timeline with the counter the provider reported.
+
+        The timeline only knows what this service reserved, at its static
+        costs. When the provider says less quota is left than the timeline
+        would hand out before the counter resets, the next free slot moves
+        back so the remainder, minus a reserve, lasts until the reset.
+        """
+        self._record_weight(policy, request.url.path, cost, usage)
+        available = usage.limit * (1 - PROVIDER_QUOTA_RESERVE) - usage.used
+        delay_ms = (
+            usage.reset_after * 1000 - max(0.0, available) * self._interval_ms(policy)
+        )
+        if delay_ms <= 0:
+            return
+        client = get_redis_client()
+        if client is not None:
+            try:
+                moved = await RESERVE_UNTIL_SCRIPT(
+                    client,
+                    [f"datahunt:queue:slot:{policy.name}"],
+                    [math.ceil(delay_ms), OUTBOUND_QUEUE_MAX_WAIT_SECONDS * 1000],
+                )
+                if moved:
+                    self._drop_leases(client, policy)
+                return
+            except RedisError as exc:
+                self._warn_redis(exc)
+        self._local_next_slot[policy.name] = max(
+            self._local_next_slot.get(policy.name, 0.0),
+            time.monotonic() + delay_ms / 1000,
+        )
+
+    def _record_weight(
+        self,
+        policy: ProviderPolicy,
+        endpoint: str,
+        cost: int,
+        usage: _ReportedUsage,
+    ) -> None:
+        # Concurrent requests can only inflate the difference between two
+        # readings of a counter, so the smallest one seen is the endpoint's weight.
+        counter = (policy.name, usage.scope)
+        previous = self._reported_counters.get(counter)
+        self._reported_counters[counter] = (usage.window, usage.used)
+        observed = self._observed_weights.setdefault(
+            (policy.name, endpoint),
+            _ObservedWeight(static_cost=cost),
+        )
+        if previous is None or previous[0] != usage.window:
+            return
+        charged = usage.used - previous[1]
+        if charged <= 0:
+            return
+        observed.samples += 1
+        observed.min_cost = min(observed.min_cost or charged, charged)
+        observed.max_cost = max(observed.max_cost, charged)
+
+    def reported_weights(self) -> list[dict[str, object]]:
+        return [
+            {
+                "provider": provider,
+                "endpoint": endpoint,
+                "static_cost": observed.static_cost,
+                "observed_cost": observed.min_cost,
+                "max_observed_cost": observed.max_cost or None,
+                "samples": observed.samples,
+            }
+            for (provider, endpoint), observed in sorted(self._observed_weights.items())
+        ]
+
     async def _change_metric(
         self,
         policy: ProviderPolicy,
         metric: str,
         delta: int,
+        lane: str = LANE_INTERACTIVE,
     ) -> None:
         local = self._local_waiting if metric == "waiting" else self._local_in_flight
         local[policy.name] = max(0, local.get(policy.name, 0) + delta)
+        key = (policy.name, lane, metric)
+        self._lane_metrics[key] = max(0, self._lane_metrics.get(key, 0) + delta)
+        if get_redis_client() is None:
+            return
+        self._dirty_metrics.add(policy.name)
+        if self._metrics_publisher is None or self._metrics_publisher.done():
+            self._metrics_publisher = asyncio.create_task(self._publish_metrics())
+
+    async def _publish_metrics(self) -> None:
+        """Writes this instance's current counts for every changed provider.
 
+        Changes are coalesced for `QUEUE_METRICS_PUBLISH_SECONDS` and written as
+        absolute values in one pipeline instead of a round trip per request.
+        """
+        await asyncio.sleep(QUEUE_METRICS_PUBLISH_SECONDS)
+        providers, self._dirty_metrics = self._dirty_metrics, set()
         client = get_redis_client()
-        if client is None:
+        if client is None or not providers:
             return
-        key = f"datahunt:queue:metrics:{policy.name}:{self._instance_name}"
         try:
             pipeline = client.pipeline(transaction=False)
-            pipeline.hincrby(key, metric, delta)
-            pipeline.expire(key, self._metrics_ttl_seconds)
+            for provider in sorted(providers):
+                key = f"datahunt:queue:metrics:{provider}:{self._instance_name}"
+                pipeline.hset(
+                    key,
+                    mapping={
+                        "waiting": self._local_waiting.get(provider, 0),
+                        "in_flight": self._local_in_flight.get(provider, 0),
+                        **{
+                            f"{metric}:{lane}": self._lane_metrics.get(
+                                (provider, lane, metric),
+                                0,
+                            )
+                            for lane in OUTBOUND_LANES
+                            for metric in ("waiting", "in_flight")
+                        },
+                    },
+                )
+                pipeline.expire(key, self._metrics_ttl_seconds)
             await pipeline.execute()
         except RedisError as exc:
             self._warn_redis(exc)
@@ -388,18 +1116,17 @@ class OutboundRequestQueue:
                 count=100,
             )
         ]
-        values = await asyncio.gather(
-            *(client.hmget(key, "waiting", "in_flight") for key in keys)
-        )
-        for key, (waiting, in_flight) in zip(keys, values, strict=True):
+        values = await asyncio.gather(*(client.hgetall(key) for key in keys))
+        for key, fields in zip(keys, values, strict=True):
             decoded_key = key.decode() if isinstance(key, bytes) else key
             provider = decoded_key.split(":")[-2]
-            provider_metrics = metrics.setdefault(
-                provider,
-                {"waiting": 0, "in_flight": 0},
-            )
-            provider_metrics["waiting"] += max(0, int(waiting or 0))
-            provider_metrics["in_flight"] += max(0, int(in_flight or 0))
+            provider_metrics = metrics.setdefault(provider, {})
+            for field, value in fields.items():
+                name = field.decode() if isinstance(field, bytes) else field
+                provider_metrics[name] = provider_metrics.get(name, 0) + max(
+                    0,
+                    int(value or 0),
+                )
         return metrics
 
     @asynccontextmanager
@@ -411,31 +1138,32 @@ class OutboundRequestQueue:
         if not OUTBOUND_QUEUE_ENABLED:
             yield
             return
+        lane = current_outbound_lane()
         waiting = True
         acquired = False
         in_flight = False
         semaphore = self._semaphores[policy.name]
-        await self._change_metric(policy, "waiting", 1)
+        await self._change_metric(policy, "waiting", 1, lane)
         try:
-            wait = await self._reserve_redis(policy, cost)
+            wait = await self._reserve_redis(policy, cost, lane)
             if wait is None:
-                wait = await self._reserve_local(policy, cost)
+                wait = await self._reserve_local(policy, cost, lane)
             if wait > 0:
                 await asyncio.sleep(wait)
-            await semaphore.acquire()
+            await semaphore.acquire(lane)
             acquired = True
-            await self._change_metric(policy, "waiting", -1)
+            await self._change_metric(policy, "waiting", -1, lane)
             waiting = False
-            await self._change_metric(policy, "in_flight", 1)
+            await self._change_metric(policy, "in_flight", 1, lane)
             in_flight = True
             yield
         finally:
             if in_flight:
-                await self._change_metric(policy, "in_flight", -1)
+                await self._change_metric(policy, "in_flight", -1, lane)
             if acquired:
                 semaphore.release()
             if waiting:
-                await self._change_metric(policy, "waiting", -1)
+                await self._change_metric(policy, "waiting", -1, lane)
 
     async def cooldown(self, policy: ProviderPolicy, seconds: float) -> None:
         await self._set_cooldown(policy, seconds)
@@ -458,51 +1186,8 @@ class OutboundRequestQueue:
         ]
         if not rows:
             return
-        table = ExternalRequestDaily.__table__
         with self._session_factory() as db:
-            dialect = db.get_bind().dialect.name
-            if dialect == "postgresql":
-                statement = postgresql_insert(table).values(rows)
-                statement = statement.on_conflict_do_update(
-                    index_elements=[table.c.day, table.c.provider],
-                    set_={
-                        "request_count": (
-                            table.c.request_count + statement.excluded.request_count
-                        )
-                    },
-                )
-                db.execute(statement)
-            elif dialect == "sqlite":
-                statement = sqlite_insert(table).values(rows)
-                statement = statement.on_conflict_do_update(
-                    index_elements=[table.c.day, table.c.provider],
-                    set_={
-                        "request_count": (
-                            table.c.request_count + statement.excluded.request_count
-                        )
-                    },
-                )
-                db.execute(statement)
-            else:
-                for row in rows:
-                    updated = (
-                        db.query(ExternalRequestDaily)
-                        .filter(
-                            ExternalRequestDaily.day == row["day"],
-                            ExternalRequestDaily.provider == row["provider"],
-                        )
-                        .update(
-                            {
-                                ExternalRequestDaily.request_count: (
-                                    ExternalRequestDaily.request_count
-                                    + row["request_count"]
-                                )
-                            },
-                            synchronize_session=False,
-                        )
-                    )
-                    if not updated:
-                        db.add(ExternalRequestDaily(**row))
+            add_daily_counts(db, ExternalRequestDaily, ("day", "provider"), rows)
             db.commit()
 
     async def flush_external_activity(self) -> None:
@@ -512,7 +1197,7 @@ class OutboundRequestQueue:
         if not activity:
             return
         try:
-            await asyncio.to_thread(self._persist_external_activity, activity)
+            await db_executor.run(self._persist_external_activity, activity)
         except Exception:
             async with self._external_activity_lock:
                 for dimension, count in activity.items():
@@ -559,10 +1244,12 @@ class OutboundRequestQueue:
                 for policy in policies:
                     pipeline.get(f"datahunt:queue:slot:{policy.name}")
                     pipeline.pttl(f"datahunt:queue:cooldown:{policy.name}")
+                    pipeline.hget(f"datahunt:queue:rate:{policy.name}", "rate")
                 values = await pipeline.execute()
                 for index, policy in enumerate(policies):
-                    next_slot = values[index * 2]
-                    cooldown_ms = values[index * 2 + 1]
+                    next_slot, cooldown_ms, rate = values[index * 3 : index * 3 + 3]
+                    if rate is not None:
+                        self._effective_rates[policy.name] = float(rate)
                     next_slot_delay_ms = 0
                     if next_slot is not None:
                         next_slot_delay_ms = max(
@@ -614,6 +1301,14 @@ class OutboundRequestQueue:
                 "requests": policy.requests,
                 "period_seconds": policy.period_seconds,
                 "concurrency": policy.concurrency,
+                "max_requests": policy.ceiling,
+                "effective_requests": round(
+                    min(
+                        policy.ceiling,
+                        self._effective_rates.get(policy.name, policy.requests),
+                    ),
+                    2,
+                ),
                 "next_slot_delay_ms": next_slot_delay_ms,
                 "cooldown_ms": cooldown_ms,
             }
@@ -626,6 +1321,19 @@ class OutboundRequestQueue:
                             min(1, in_flight / policy.concurrency) * 100,
                             1,
                         ),
+                        "lanes": {
+                            lane: {
+                                metric: max(
+                                    provider_metrics.get(f"{metric}:{lane}", 0),
+                                    self._lane_metrics.get(
+                                        (policy.name, lane, metric),
+                                        0,
+                                    ),
+                                )
+                                for metric in ("waiting", "in_flight")
+                            }
+                            for lane in OUTBOUND_LANES
+                        },
                     }
                 )
             result.append(provider_status)
@@ -640,6 +1348,35 @@ class OutboundRequestQueue:
 outbound_queue = OutboundRequestQueue()
 
 
+class _SlotReleasingStream(httpx.AsyncByteStream):
+    """Response body that keeps its request's queue slot until it is closed.
+
+    The pooled connection stays checked out until the body is read, so the
+    slot is held as long, and the queue never lets more requests through than
+    the provider's pool has connections.
+    """
+
+    def __init__(
+        self,
+        stream: httpx.AsyncByteStream,
+        release: Callable[[], Awaitable[object]],
+    ):
+        self._stream = stream
+        self._release: Callable[[], Awaitable[object]] | None = release
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            release, self._release = self._release, None
+            if release is not None:
+                await release()
+
+
 class QueuedAsyncHTTPTransport(httpx.AsyncBaseTransport):
     def __init__(
         self,
@@ -647,10 +1384,22 @@ class QueuedAsyncHTTPTransport(httpx.AsyncBaseTransport):
         trust_env: bool = True,
         transport: httpx.AsyncBaseTransport | None = None,
     ):
-        self._transport = transport or httpx.AsyncHTTPTransport(
-            trust_env=trust_env,
-            retries=0,
-        )
+        self._trust_env = trust_env
+        self._transport = transport
+        self._private: httpx.AsyncHTTPTransport | None = None
+
+    def _transport_for(self, policy: ProviderPolicy) -> httpx.AsyncBaseTransport:
+        if self._transport is not None:
+            return self._transport
+        shared = outbound_queue.clients.transport(policy, self._trust_env)
+        if shared is not None:
+            return shared
+        if self._private is None:
+            self._private = httpx.AsyncHTTPTransport(
+                trust_env=self._trust_env,
+                retries=0,
+            )
+        return self._private
 
     async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
         content = await request.aread()
@@ -665,9 +1414,31 @@ class QueuedAsyncHTTPTransport(httpx.AsyncBaseTransport):
                 content=content,
                 extensions=request.extensions,
             )
-            async with outbound_queue.slot(policy, cost):
+            async with AsyncExitStack() as stack:
+                await stack.enter_async_context(outbound_queue.slot(policy, cost))
                 await outbound_queue.record_external_request(policy.name)
-                response = await self._transport.handle_async_request(queued_request)
+                started = time.monotonic()
+                try:
+                    response = await self._transport_for(
+                        policy
+                    ).handle_async_request(queued_request)
+                except httpx.TimeoutException:
+                    await outbound_queue.observe(policy, None, 0.0)
+                    raise
+                slot = stack.pop_all()
+            if response.is_closed:
+                # The transport already read the body, e.g. a mock transport.
+                await slot.aclose()
+            else:
+                response.stream = _SlotReleasingStream(response.stream, slot.aclose)
+            await outbound_queue.observe(
+                policy,
+                response.status_code,
+                time.monotonic() - started,
+            )
+            usage = _reported_usage(policy.name, request, response)
+            if usage is not None:
+                await outbound_queue.reconcile(policy, request, cost, usage)
             if response.status_code != 429:
                 return response
 
@@ -680,7 +1451,11 @@ class QueuedAsyncHTTPTransport(httpx.AsyncBaseTransport):
         raise RuntimeError("unreachable")
 
     async def aclose(self) -> None:
-        await self._transport.aclose()
+        # Shared pools belong to the registry and outlive this client.
+        if self._transport is not None:
+            await self._transport.aclose()
+        if self._private is not None:
+            await self._private.aclose()
 
 
 def queued_async_client(
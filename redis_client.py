@@ -1,6 +1,11 @@
+import asyncio
+import hashlib
 import logging
+import time
+from collections.abc import Callable
 
 from redis.asyncio import Redis
+from redis.exceptions import NoScriptError, RedisError
 
 from config import REDIS_URL
 
@@ -37,3 +42,154 @@ async def close_redis_client() -> None:
         return
     await _redis_client.aclose()
     _redis_client = None
+
+
+class RedisScript:
+    """A Lua script run by SHA with EVALSHA instead of sending its body each time.
+
+    The script is loaded on first use on each server, and again after a Redis
+    restart or SCRIPT FLUSH.
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        self.sha = hashlib.sha1(source.encode()).hexdigest()
+
+    async def __call__(self, client: Redis, keys: list[str], args: list) -> object:
+        try:
+            return await client.evalsha(self.sha, len(keys), *keys, *args)
+        except NoScriptError:
+            await client.script_load(self.source)
+            return await client.evalsha(self.sha, len(keys), *keys, *args)
+
+
+class RedisBroadcast:
+    """Delivers Redis pub/sub messages to in-process handlers over one connection.
+
+    Handlers run on the event loop and must not block. Reset handlers run whenever
+    the subscription is (re)established or lost, so callers can drop local state
+    that may have missed a message.
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[], Redis | None] = get_redis_client,
+        *,
+        retry_seconds: float = 1.0,
+    ):
+        self._client_factory = client_factory
+        self.retry_seconds = max(0.1, retry_seconds)
+        self._handlers: dict[str, list[Callable[[bytes], None]]] = {}
+        self._reset_handlers: dict[str, list[Callable[[], None]]] = {}
+        self._subscribed: set[str] = set()
+        self._channels_changed = asyncio.Event()
+        self._stop = asyncio.Event()
+        self._worker: asyncio.Task[None] | None = None
+        self._last_redis_warning = 0.0
+
+    def subscribe(
+        self,
+        channel: str,
+        handler: Callable[[bytes], None],
+        *,
+        on_reset: Callable[[], None] | None = None,
+    ) -> None:
+        self._handlers.setdefault(channel, []).append(handler)
+        if on_reset is not None:
+            self._reset_handlers.setdefault(channel, []).append(on_reset)
+        self._channels_changed.set()
+
+    def is_subscribed(self, channel: str) -> bool:
+        return channel in self._subscribed
+
+    def _warn_redis(self, exc: Exception) -> None:
+        now = time.monotonic()
+        if now - self._last_redis_warning >= 30:
+            logger.warning("Redis broadcast subscription unavailable: %s", exc)
+            self._last_redis_warning = now
+
+    def _reset(self, channels) -> None:
+        for channel in channels:
+            for handler in self._reset_handlers.get(channel, ()):
+                try:
+                    handler()
+                except Exception:  # pragma: no cover - defensive logging
+                    logger.exception("Redis broadcast reset handler failed")
+
+    def _deliver(self, message: dict) -> None:
+        channel = message.get("channel")
+        if isinstance(channel, bytes):
+            channel = channel.decode()
+        data = message.get("data")
+        if isinstance(data, str):
+            data = data.encode()
+        if not isinstance(data, bytes):
+            return
+        for handler in self._handlers.get(channel, ()):
+            try:
+                handler(data)
+            except Exception:  # pragma: no cover - defensive logging
+                logger.exception("Redis broadcast handler failed for %s", channel)
+
+    async def _listen(self, pubsub) -> None:
+        while not self._stop.is_set():
+            pending = set(self._handlers) - self._subscribed
+            if pending:
+                self._channels_changed.clear()
+                await pubsub.subscribe(*sorted(pending))
+                self._subscribed |= pending
+                self._reset(pending)
+            if not self._subscribed:
+                try:
+                    await asyncio.wait_for(
+                        self._channels_changed.wait(),
+                        timeout=self.retry_seconds,
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            message = await pubsub.get_message(
+                ignore_subscribe_messages=True,
+                timeout=1.0,
+            )
+            if message is not None and message.get("type") == "message":
+                self._deliver(message)
+
+    async def _run(self) -> None:
+        while not self._stop.is_set():
+            client = self._client_factory()
+            if client is None:
+                return
+            pubsub = client.pubsub()
+            try:
+                await self._listen(pubsub)
+            except (RedisError, OSError) as exc:
+                self._warn_redis(exc)
+            finally:
+                lost = self._subscribed
+                self._subscribed = set()
+                self._reset(lost)
+                try:
+                    await pubsub.aclose()
+                except (RedisError, OSError):
+                    pass
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=self.retry_seconds)
+            except asyncio.TimeoutError:
+                continue
+
+    async def start(self) -> None:
+        if self._worker is not None or self._client_factory() is None:
+            return
+        self._stop.clear()
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._worker is not None:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+        self._worker = None
+
+
+redis_broadcast = RedisBroadcast()
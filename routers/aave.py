@@ -13,6 +13,11 @@ from fastapi import APIRouter, HTTPException, Query
 from fastapi.responses import Response
 from web3 import Web3
 
+from csv_cache import (
+    canonical_int,
+    query_canonicalizer,
+    register_csv_query_canonicalizer,
+)
 from outbound_queue import queued_async_client
 
 
@@ -981,3 +986,15 @@ async def get_aave_positions_csv(
         media_type="text/csv",
         headers={"Cache-Control": f"public, max-age={AAVE_CACHE_TTL_SECONDS}"},
     )
+
+
+register_csv_query_canonicalizer(
+    "/aave/positions.csv",
+    query_canonicalizer(
+        values={
+            "address": _normalize_wallet,
+            "chain_id": canonical_int,
+        },
+        defaults={"chain_id": "1"},
+    ),
+)
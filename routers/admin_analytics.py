@@ -6,7 +6,9 @@ from sqlalchemy import case, distinct, func
 from sqlalchemy.orm import Session
 
 from config import FEATURE_REQUEST_ADMIN_ADDRESSES
-from database import get_db
+from csv_cache import csv_cache_stats
+from database import db_executor, get_db
+from memory_cache import memory_budget
 from dependencies import get_current_account
 from models import Account, AuthFunnelEvent, ExternalRequestDaily, UsageDaily
 from outbound_queue import outbound_queue
@@ -51,7 +53,12 @@ async def get_admin_queue_status(
 ):
     response.headers["Cache-Control"] = "private, no-store"
     status_payload = await outbound_queue.status(include_activity=True)
+    status_payload["connection_pools"] = outbound_queue.clients.stats()
+    status_payload["reported_weights"] = outbound_queue.reported_weights()
     status_payload["scheduled_refresh"] = await scheduled_refresh.status()
+    status_payload["csv_cache"] = csv_cache_stats.snapshot()
+    status_payload["memory_cache"] = memory_budget.stats()
+    status_payload["database"] = db_executor.stats()
     return status_payload
 
 
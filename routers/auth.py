@@ -10,6 +10,7 @@ from sqlalchemy.orm import Session
 from database import get_db
 from models import Account, AccountAddress, AccountToken
 from security import create_access_token, create_sheets_access_token
+from token_cache import verified_tokens
 from utils import get_valid_chain_ids
 from dependencies import (
     get_current_account,
@@ -156,6 +157,7 @@ async def logout(
     if token:
         token.is_active = False
         db.commit()
+        await verified_tokens.revoke(token.id)
     return {"message": "Logged out successfully"}
 
 
@@ -430,4 +432,5 @@ async def deactivate_token(
 
     token.is_active = False
     db.commit()
+    await verified_tokens.revoke(token.id)
     return {"message": "Token deactivated successfully"}
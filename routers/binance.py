@@ -19,7 +19,7 @@ from binance_capsule import (
     decrypt_binance_credentials,
     encrypt_binance_credentials,
 )
-from outbound_queue import queued_async_client
+from outbound_queue import LANE_VALIDATION, outbound_lane, queued_async_client
 
 
 BINANCE_SPOT_BASE_URL = "https://api.binance.com"
@@ -585,8 +585,11 @@ async def create_binance_capsule(request: BinanceCapsuleRequest):
         raise HTTPException(
             status_code=400, detail="Binance API key and secret are required"
         )
-    async with queued_async_client(timeout=20.0, trust_env=False) as client:
-        permissions = await _validate_read_only_credentials(client, api_key, api_secret)
+    with outbound_lane(LANE_VALIDATION):
+        async with queued_async_client(timeout=20.0, trust_env=False) as client:
+            permissions = await _validate_read_only_credentials(
+                client, api_key, api_secret
+            )
     capsule = encrypt_binance_credentials(api_key, api_secret)
     return Response(
         content=json.dumps(
@@ -19,7 +19,7 @@ from bybit_capsule import (
     decrypt_bybit_credentials,
     encrypt_bybit_credentials,
 )
-from outbound_queue import queued_async_client
+from outbound_queue import LANE_VALIDATION, outbound_lane, queued_async_client
 
 
 BYBIT_API_REGIONS = {
@@ -520,10 +520,11 @@ async def create_bybit_capsule(request: BybitCapsuleRequest):
     if not api_key or not api_secret:
         raise HTTPException(status_code=400, detail="Bybit API key and secret are required")
     base_url = _api_base_url(request.region)
-    async with queued_async_client(timeout=20.0, trust_env=False) as client:
-        permissions = await _validate_view_only_credentials(
-            client, base_url, api_key, api_secret
-        )
+    with outbound_lane(LANE_VALIDATION):
+        async with queued_async_client(timeout=20.0, trust_env=False) as client:
+            permissions = await _validate_view_only_credentials(
+                client, base_url, api_key, api_secret
+            )
     capsule = encrypt_bybit_credentials(api_key, api_secret)
     return Response(
         content=json.dumps(
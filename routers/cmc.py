@@ -4,6 +4,12 @@ import httpx
 from fastapi import APIRouter, HTTPException, Query
 from fastapi.responses import Response
 
+from csv_cache import (
+    canonical_int,
+    canonical_upper,
+    query_canonicalizer,
+    register_csv_query_canonicalizer,
+)
 from outbound_queue import queued_async_client
 
 from config import (
@@ -116,3 +122,16 @@ async def get_price_csv(
         _set_cached_price(cache_key, price)
 
     return Response(content=str(price), media_type="text/csv")
+
+
+register_csv_query_canonicalizer(
+    "/cmc/price.csv",
+    query_canonicalizer(
+        values={
+            "symbol": canonical_upper,
+            "id": canonical_int,
+            "convert": canonical_upper,
+        },
+        defaults={"convert": "USD"},
+    ),
+)
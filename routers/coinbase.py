@@ -17,7 +17,7 @@ from coinbase_capsule import (
     decrypt_coinbase_credentials,
     encrypt_coinbase_credentials,
 )
-from outbound_queue import queued_async_client
+from outbound_queue import LANE_VALIDATION, outbound_lane, queued_async_client
 
 
 COINBASE_API_BASE_URL = "https://api.coinbase.com"
@@ -772,12 +772,13 @@ async def create_coinbase_capsule(request: CoinbaseCapsuleRequest):
     if not key_name:
         raise HTTPException(status_code=400, detail="Coinbase key_name is required")
 
-    async with queued_async_client(timeout=20.0) as client:
-        permissions = await _validate_view_only_credentials(
-            client,
-            key_name,
-            key_secret,
-        )
+    with outbound_lane(LANE_VALIDATION):
+        async with queued_async_client(timeout=20.0) as client:
+            permissions = await _validate_view_only_credentials(
+                client,
+                key_name,
+                key_secret,
+            )
 
     capsule = encrypt_coinbase_credentials(key_name, key_secret)
     return Response(
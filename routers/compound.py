@@ -12,6 +12,11 @@ from fastapi import APIRouter, HTTPException, Query
 from fastapi.responses import Response
 from web3 import Web3
 
+from csv_cache import (
+    canonical_int,
+    query_canonicalizer,
+    register_csv_query_canonicalizer,
+)
 from outbound_queue import queued_async_client
 
 
@@ -431,3 +436,15 @@ async def get_compound_positions_csv(
         media_type="text/csv",
         headers={"Cache-Control": f"public, max-age={COMPOUND_CACHE_TTL_SECONDS}"},
     )
+
+
+register_csv_query_canonicalizer(
+    "/compound/positions.csv",
+    query_canonicalizer(
+        values={
+            "address": _normalize_wallet,
+            "chain_id": canonical_int,
+        },
+        defaults={"chain_id": "1"},
+    ),
+)
@@ -2,7 +2,6 @@ import asyncio
 import csv
 import io
 import re
-import time
 from decimal import Decimal, InvalidOperation
 from typing import Any
 
@@ -10,6 +9,12 @@ import httpx
 from fastapi import APIRouter, HTTPException, Query
 from fastapi.responses import Response
 
+from csv_cache import (
+    canonical_int,
+    query_canonicalizer,
+    register_csv_query_canonicalizer,
+)
+from memory_cache import memory_budget
 from outbound_queue import queued_async_client
 
 
@@ -25,6 +30,7 @@ FLUID_SUPPORTED_CHAINS = {
 }
 FLUID_CACHE_TTL_SECONDS = 60
 FLUID_CACHE_MAX_SIZE = 256
+FLUID_CACHE_MAX_BYTES = 4 * 1024 * 1024
 FLUID_APR_PRECISION = Decimal("0.0001")
 FLUID_CSV_HEADER = [
     "wallet",
@@ -57,7 +63,12 @@ FLUID_CSV_HEADER = [
 
 router = APIRouter(prefix="/fluid", tags=["fluid"])
 
-_fluid_csv_cache: dict[tuple[str, int], tuple[float, str]] = {}
+_fluid_csv_cache = memory_budget.namespace(
+    "fluid",
+    max_bytes=FLUID_CACHE_MAX_BYTES,
+    max_entries=FLUID_CACHE_MAX_SIZE,
+    ttl_seconds=FLUID_CACHE_TTL_SECONDS,
+)
 
 
 def _normalize_wallet(address: str) -> str:
@@ -628,24 +639,11 @@ def _render_csv(rows: list[dict[str, str]]) -> str:
 
 
 def _get_cached_csv(wallet: str, chain_id: int) -> str | None:
-    cached = _fluid_csv_cache.get((wallet, chain_id))
-    if cached is None:
-        return None
-    cached_at, content = cached
-    if time.monotonic() - cached_at >= FLUID_CACHE_TTL_SECONDS:
-        _fluid_csv_cache.pop((wallet, chain_id), None)
-        return None
-    return content
+    return _fluid_csv_cache.get((wallet, chain_id))
 
 
 def _set_cached_csv(wallet: str, chain_id: int, content: str) -> None:
-    key = (wallet, chain_id)
-    if key in _fluid_csv_cache:
-        _fluid_csv_cache.pop(key)
-    elif len(_fluid_csv_cache) >= FLUID_CACHE_MAX_SIZE:
-        oldest_key = min(_fluid_csv_cache, key=lambda item: _fluid_csv_cache[item][0])
-        _fluid_csv_cache.pop(oldest_key)
-    _fluid_csv_cache[key] = (time.monotonic(), content)
+    _fluid_csv_cache[(wallet, chain_id)] = content
 
 
 @router.get(
@@ -681,3 +679,15 @@ async def get_fluid_positions_csv(
         media_type="text/csv",
         headers={"Cache-Control": f"public, max-age={FLUID_CACHE_TTL_SECONDS}"},
     )
+
+
+register_csv_query_canonicalizer(
+    "/fluid/positions.csv",
+    query_canonicalizer(
+        values={
+            "address": _normalize_wallet,
+            "chain_id": canonical_int,
+        },
+        defaults={"chain_id": "1"},
+    ),
+)
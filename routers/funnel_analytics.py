@@ -13,10 +13,9 @@ from redis.exceptions import RedisError
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
-from database import get_db
+from database import db_executor, get_db
 from models import AuthFunnelEvent
-from redis_client import get_redis_client
-from value_rate_limit import INCREMENT_RATE_LIMIT_SCRIPT
+from redis_client import RedisScript, get_redis_client
 
 
 router = APIRouter(tags=["anonymous analytics"])
@@ -33,6 +32,14 @@ AttributionSource: TypeAlias = Literal[
 ]
 AttributionMedium: TypeAlias = Literal["cpc", "organic", "social", "referral"]
 CAMPAIGN_PATTERN = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+){0,3}$")
+INCREMENT_RATE_LIMIT_SCRIPT = RedisScript("""
+local count = redis.call('INCR', KEYS[1])
+if count == 1 then
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+end
+local ttl = redis.call('TTL', KEYS[1])
+return {count, ttl}
+""")
 
 
 class FunnelEventInput(BaseModel):
@@ -120,11 +127,11 @@ class _AnonymousEventRateLimit:
         redis = get_redis_client()
         if redis is not None:
             try:
-                result = await redis.eval(
-                    INCREMENT_RATE_LIMIT_SCRIPT, 1, session_key, self.window_seconds
+                result = await INCREMENT_RATE_LIMIT_SCRIPT(
+                    redis, [session_key], [self.window_seconds]
                 )
-                global_result = await redis.eval(
-                    INCREMENT_RATE_LIMIT_SCRIPT, 1, global_key, self.window_seconds
+                global_result = await INCREMENT_RATE_LIMIT_SCRIPT(
+                    redis, [global_key], [self.window_seconds]
                 )
                 return (
                     int(result[0]),
@@ -143,6 +150,26 @@ class _AnonymousEventRateLimit:
 _rate_limiter = _AnonymousEventRateLimit()
 
 
+def _store_funnel_event(db: Session, payload: FunnelEventInput) -> bool:
+    """Stores the event and returns whether it was already recorded today."""
+    db.add(
+        AuthFunnelEvent(
+            anonymous_session_id=str(payload.session_id),
+            day=int(time.time()) // 86400,
+            event_name=payload.event,
+            utm_source=payload.utm_source,
+            utm_medium=payload.utm_medium,
+            utm_campaign=payload.utm_campaign,
+        )
+    )
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return True
+    return False
+
+
 @router.post("/analytics/funnel/events", status_code=status.HTTP_202_ACCEPTED)
 @router.post("/product-events", status_code=status.HTTP_202_ACCEPTED)
 async def record_funnel_event(
@@ -171,18 +198,5 @@ async def record_funnel_event(
             headers=dict(response.headers),
         )
 
-    item = AuthFunnelEvent(
-        anonymous_session_id=str(payload.session_id),
-        day=int(time.time()) // 86400,
-        event_name=payload.event,
-        utm_source=payload.utm_source,
-        utm_medium=payload.utm_medium,
-        utm_campaign=payload.utm_campaign,
-    )
-    db.add(item)
-    try:
-        db.commit()
-    except IntegrityError:
-        db.rollback()
-        return {"accepted": True, "deduplicated": True}
-    return {"accepted": True, "deduplicated": False}
+    deduplicated = await db_executor.run(_store_funnel_event, db, payload)
+    return {"accepted": True, "deduplicated": deduplicated}
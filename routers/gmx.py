@@ -9,6 +9,11 @@ import httpx
 from fastapi import APIRouter, HTTPException, Query
 from fastapi.responses import Response
 
+from csv_cache import (
+    canonical_int,
+    query_canonicalizer,
+    register_csv_query_canonicalizer,
+)
 from outbound_queue import queued_async_client
 
 
@@ -340,3 +345,15 @@ async def get_gmx_positions_csv(
         media_type="text/csv",
         headers={"Cache-Control": f"public, max-age={GMX_CACHE_TTL_SECONDS}"},
     )
+
+
+register_csv_query_canonicalizer(
+    "/gmx/positions.csv",
+    query_canonicalizer(
+        values={
+            "address": _normalize_wallet,
+            "chain_id": canonical_int,
+        },
+        defaults={"chain_id": "42161"},
+    ),
+)
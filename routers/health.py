@@ -5,7 +5,7 @@ from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
 from config import REDIS_URL
-from database import get_db
+from database import db_executor, get_db
 from outbound_queue import outbound_queue
 from redis_client import redis_ping
 
@@ -29,7 +29,7 @@ def liveness():
 async def readiness(db: Session = Depends(get_db)):
     try:
         # Simple query to check DB connection
-        db.execute(text("SELECT 1"))
+        await db_executor.run(db.execute, text("SELECT 1"))
     except SQLAlchemyError as exc:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
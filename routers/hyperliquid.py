@@ -6,6 +6,11 @@ import httpx
 from fastapi import APIRouter, HTTPException, Query
 from fastapi.responses import Response
 
+from csv_cache import (
+    canonical_bool,
+    query_canonicalizer,
+    register_csv_query_canonicalizer,
+)
 from outbound_queue import queued_async_client
 
 
@@ -391,3 +396,16 @@ async def get_hyperliquid_balance(
         )
 
     return Response(content=output.getvalue(), media_type="text/csv")
+
+
+register_csv_query_canonicalizer(
+    "/hyperliquid/balance",
+    query_canonicalizer(
+        values={
+            "address": _normalize_address,
+            "account": _normalize_address,
+            "aggregate": canonical_bool,
+        },
+        defaults={"field": "account_value", "aggregate": "false"},
+    ),
+)
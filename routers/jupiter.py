@@ -9,6 +9,7 @@ import httpx
 from fastapi import APIRouter, HTTPException, Query
 from fastapi.responses import Response
 
+from csv_cache import query_canonicalizer, register_csv_query_canonicalizer
 from outbound_queue import queued_async_client
 from routers.solana import SOLANA_RPC_ENDPOINT, _is_solana_address, _solana_rpc_request
 
@@ -172,3 +173,13 @@ async def get_jupiter_jlp_csv(
         media_type="text/csv",
         headers={"Cache-Control": f"public, max-age={JUPITER_CACHE_TTL_SECONDS}"},
     )
+
+
+register_csv_query_canonicalizer(
+    "/jupiter/jlp.csv",
+    query_canonicalizer(
+        values={
+            "wallet": _normalize_wallet,
+        },
+    ),
+)
@@ -12,6 +12,7 @@ from fastapi import APIRouter, HTTPException, Query
 from fastapi.responses import Response
 from web3 import Web3
 
+from csv_cache import query_canonicalizer, register_csv_query_canonicalizer
 from outbound_queue import queued_async_client
 
 
@@ -271,3 +272,13 @@ async def get_lido_positions_csv(
         media_type="text/csv",
         headers={"Cache-Control": f"public, max-age={LIDO_CACHE_TTL_SECONDS}"},
     )
+
+
+register_csv_query_canonicalizer(
+    "/lido/positions.csv",
+    query_canonicalizer(
+        values={
+            "address": _normalize_wallet,
+        },
+    ),
+)
@@ -3,6 +3,12 @@ from typing import Any
 from fastapi import APIRouter, Query
 from fastapi.responses import Response
 
+from csv_cache import (
+    canonical_bool,
+    canonical_int,
+    query_canonicalizer,
+    register_csv_query_canonicalizer,
+)
 from routers.uniswap import (
     ETHEREUM_USD_STABLECOINS,
     UNISWAP_CSV_HEADER,
@@ -99,3 +105,16 @@ async def get_pancakeswap_positions_csv(
         media_type="text/csv",
         headers={"Cache-Control": f"public, max-age={PANCAKESWAP_CACHE_TTL_SECONDS}"},
     )
+
+
+register_csv_query_canonicalizer(
+    "/pancakeswap/positions.csv",
+    query_canonicalizer(
+        values={
+            "address": _normalize_wallet,
+            "chain_id": canonical_int,
+            "include_closed": canonical_bool,
+        },
+        defaults={"chain_id": "56", "include_closed": "false"},
+    ),
+)
@@ -8,6 +8,11 @@ import httpx
 from fastapi import APIRouter, HTTPException, Query
 from fastapi.responses import Response
 
+from csv_cache import (
+    canonical_bool,
+    query_canonicalizer,
+    register_csv_query_canonicalizer,
+)
 from outbound_queue import queued_async_client
 
 
@@ -382,3 +387,15 @@ async def get_pendle_positions_csv(
         media_type="text/csv",
         headers={"Cache-Control": f"public, max-age={PENDLE_CACHE_TTL_SECONDS}"},
     )
+
+
+register_csv_query_canonicalizer(
+    "/pendle/positions.csv",
+    query_canonicalizer(
+        values={
+            "address": _normalize_wallet,
+            "include_closed": canonical_bool,
+        },
+        defaults={"include_closed": "false"},
+    ),
+)
@@ -10,6 +10,11 @@ import httpx
 from fastapi import APIRouter, HTTPException, Query
 from fastapi.responses import Response
 
+from csv_cache import (
+    canonical_float,
+    query_canonicalizer,
+    register_csv_query_canonicalizer,
+)
 from outbound_queue import queued_async_client
 
 
@@ -372,3 +377,15 @@ async def get_polymarket_positions_csv(
         media_type="text/csv",
         headers={"Cache-Control": f"public, max-age={POLYMARKET_CACHE_TTL_SECONDS}"},
     )
+
+
+register_csv_query_canonicalizer(
+    "/polymarket/positions.csv",
+    query_canonicalizer(
+        values={
+            "address": _normalize_wallet,
+            "size_threshold": canonical_float,
+        },
+        defaults={"size_threshold": "1.0"},
+    ),
+)
@@ -12,6 +12,7 @@ import httpx
 from fastapi import APIRouter, HTTPException, Query
 from fastapi.responses import Response
 
+from memory_cache import memory_budget
 from outbound_queue import queued_async_client
 
 
@@ -38,6 +39,7 @@ OPTIONAL_POSITION_TIMEOUT = 8.0
 OPTIONAL_LOOKUP_TIMEOUT = 6.0
 GMTRADE_CSV_CACHE_MAX_SIZE = 256
 KAMINO_CSV_CACHE_MAX_SIZE = 256
+SOLANA_CSV_CACHE_MAX_BYTES = 4 * 1024 * 1024
 GMTRADE_MARKET_DECIMALS = 20
 GMTRADE_PRICE_DECIMALS = 30
 SOLANA_ADDRESS_RE = re.compile(r"^[1-9A-HJ-NP-Za-km-z]{32,44}$")
@@ -148,10 +150,26 @@ KAMINO_PORTFOLIO_CSV_HEADER = [
 ]
 
 router = APIRouter(prefix="/solana", tags=["solana"])
-_gmtrade_csv_cache: dict[str, str] = {}
-_gmtrade_perp_csv_cache: dict[str, str] = {}
-_kamino_csv_cache: dict[str, str] = {}
-_kamino_portfolio_csv_cache: dict[str, str] = {}
+_gmtrade_csv_cache = memory_budget.namespace(
+    "solana-gmtrade",
+    max_bytes=SOLANA_CSV_CACHE_MAX_BYTES,
+    max_entries=GMTRADE_CSV_CACHE_MAX_SIZE,
+)
+_gmtrade_perp_csv_cache = memory_budget.namespace(
+    "solana-gmtrade-perps",
+    max_bytes=SOLANA_CSV_CACHE_MAX_BYTES,
+    max_entries=GMTRADE_CSV_CACHE_MAX_SIZE,
+)
+_kamino_csv_cache = memory_budget.namespace(
+    "solana-kamino",
+    max_bytes=SOLANA_CSV_CACHE_MAX_BYTES,
+    max_entries=KAMINO_CSV_CACHE_MAX_SIZE,
+)
+_kamino_portfolio_csv_cache = memory_budget.namespace(
+    "solana-kamino-portfolio",
+    max_bytes=SOLANA_CSV_CACHE_MAX_BYTES,
+    max_entries=KAMINO_CSV_CACHE_MAX_SIZE,
+)
 
 
 async def _query_graphql(client: httpx.AsyncClient, query: str) -> dict[str, Any]:
@@ -1730,68 +1748,34 @@ def _build_glv_rows(
 
 
 def _get_cached_gmtrade_csv(wallet: str) -> str | None:
-    cached = _gmtrade_csv_cache.get(wallet)
-    if cached is not None:
-        _gmtrade_csv_cache[wallet] = _gmtrade_csv_cache.pop(wallet)
-    return cached
+    return _gmtrade_csv_cache.get(wallet)
 
 
 def _set_cached_gmtrade_csv(wallet: str, content: str) -> None:
-    if wallet in _gmtrade_csv_cache:
-        _gmtrade_csv_cache.pop(wallet)
-    elif len(_gmtrade_csv_cache) >= GMTRADE_CSV_CACHE_MAX_SIZE:
-        _gmtrade_csv_cache.pop(next(iter(_gmtrade_csv_cache)))
-
     _gmtrade_csv_cache[wallet] = content
 
 
 def _get_cached_gmtrade_perp_csv(wallet: str) -> str | None:
-    cached = _gmtrade_perp_csv_cache.get(wallet)
-    if cached is not None:
-        _gmtrade_perp_csv_cache[wallet] = _gmtrade_perp_csv_cache.pop(wallet)
-    return cached
+    return _gmtrade_perp_csv_cache.get(wallet)
 
 
 def _set_cached_gmtrade_perp_csv(wallet: str, content: str) -> None:
-    if wallet in _gmtrade_perp_csv_cache:
-        _gmtrade_perp_csv_cache.pop(wallet)
-    elif len(_gmtrade_perp_csv_cache) >= GMTRADE_CSV_CACHE_MAX_SIZE:
-        _gmtrade_perp_csv_cache.pop(next(iter(_gmtrade_perp_csv_cache)))
-
     _gmtrade_perp_csv_cache[wallet] = content
 
 
 def _get_cached_kamino_csv(wallet: str) -> str | None:
-    cached = _kamino_csv_cache.get(wallet)
-    if cached is not None:
-        _kamino_csv_cache[wallet] = _kamino_csv_cache.pop(wallet)
-    return cached
+    return _kamino_csv_cache.get(wallet)
 
 
 def _set_cached_kamino_csv(wallet: str, content: str) -> None:
-    if wallet in _kamino_csv_cache:
-        _kamino_csv_cache.pop(wallet)
-    elif len(_kamino_csv_cache) >= KAMINO_CSV_CACHE_MAX_SIZE:
-        _kamino_csv_cache.pop(next(iter(_kamino_csv_cache)))
-
     _kamino_csv_cache[wallet] = content
 
 
 def _get_cached_kamino_portfolio_csv(cache_key: str) -> str | None:
-    cached = _kamino_portfolio_csv_cache.get(cache_key)
-    if cached is not None:
-        _kamino_portfolio_csv_cache[cache_key] = _kamino_portfolio_csv_cache.pop(
-            cache_key
-        )
-    return cached
+    return _kamino_portfolio_csv_cache.get(cache_key)
 
 
 def _set_cached_kamino_portfolio_csv(cache_key: str, content: str) -> None:
-    if cache_key in _kamino_portfolio_csv_cache:
-        _kamino_portfolio_csv_cache.pop(cache_key)
-    elif len(_kamino_portfolio_csv_cache) >= KAMINO_CSV_CACHE_MAX_SIZE:
-        _kamino_portfolio_csv_cache.pop(next(iter(_kamino_portfolio_csv_cache)))
-
     _kamino_portfolio_csv_cache[cache_key] = content
 
 
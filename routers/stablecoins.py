@@ -11,6 +11,11 @@ import httpx
 from fastapi import APIRouter, HTTPException, Query
 from fastapi.responses import Response
 
+from csv_cache import (
+    canonical_int,
+    query_canonicalizer,
+    register_csv_query_canonicalizer,
+)
 from outbound_queue import queued_async_client
 
 from routers.solana import (
@@ -593,3 +598,27 @@ async def get_stablecoin_balances_csv(
             "Cache-Control": f"public, max-age={STABLECOINS_CACHE_TTL_SECONDS}"
         },
     )
+
+
+def _canonical_wallets(
+    normalizer: Callable[[str], str],
+    wallet_type: str,
+) -> Callable[[str], str]:
+    def canonicalize(value: str) -> str:
+        return ",".join(_split_wallets(value, normalizer, wallet_type))
+
+    return canonicalize
+
+
+register_csv_query_canonicalizer(
+    "/stablecoins/balances.csv",
+    query_canonicalizer(
+        values={
+            "address": _canonical_wallets(_normalize_evm_address, "EVM"),
+            "wallet": _canonical_wallets(_normalize_solana_wallet, "Solana"),
+            "tron_address": _canonical_wallets(_normalize_tron_wallet, "TRON"),
+            "chain_id": canonical_int,
+        },
+        defaults={"address": "", "wallet": "", "tron_address": "", "chain_id": "1"},
+    ),
+)
@@ -10,6 +10,11 @@ import httpx
 from fastapi import APIRouter, HTTPException, Query
 from fastapi.responses import Response
 
+from csv_cache import (
+    canonical_int,
+    query_canonicalizer,
+    register_csv_query_canonicalizer,
+)
 from outbound_queue import queued_async_client
 
 
@@ -868,3 +873,15 @@ async def get_stakedao_positions_csv(
             "Cache-Control": f"public, max-age={STAKEDAO_CACHE_TTL_SECONDS}"
         },
     )
+
+
+register_csv_query_canonicalizer(
+    "/stakedao/positions.csv",
+    query_canonicalizer(
+        values={
+            "address": _normalize_wallet,
+            "chain_id": canonical_int,
+        },
+        defaults={"chain_id": "1"},
+    ),
+)
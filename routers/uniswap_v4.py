@@ -9,6 +9,12 @@ from fastapi import APIRouter, HTTPException, Query
 from fastapi.responses import Response
 from web3 import Web3
 
+from csv_cache import (
+    canonical_bool,
+    canonical_int,
+    query_canonicalizer,
+    register_csv_query_canonicalizer,
+)
 from outbound_queue import queued_async_client
 from routers.stablecoins import ARBITRUM_TOKENS, BASE_TOKENS, ETHEREUM_TOKENS
 from routers.uniswap import (
@@ -593,3 +599,16 @@ async def get_uniswap_v4_positions_csv(
         media_type="text/csv",
         headers={"Cache-Control": f"public, max-age={UNISWAP_V4_CACHE_TTL_SECONDS}"},
     )
+
+
+register_csv_query_canonicalizer(
+    "/uniswap/v4/positions.csv",
+    query_canonicalizer(
+        values={
+            "address": _normalize_wallet,
+            "chain_id": canonical_int,
+            "include_closed": canonical_bool,
+        },
+        defaults={"chain_id": "1", "include_closed": "false"},
+    ),
+)
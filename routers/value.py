@@ -1,30 +1,47 @@
+import asyncio
 import base64
 import csv
 import hashlib
 import io
 import json
 import re
+import sys
 import time
 from dataclasses import dataclass
 from typing import Literal
+from urllib.parse import urlencode
 
 import httpx
 from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response
 from pydantic import BaseModel, Field
 from redis.exceptions import RedisError
+from sqlalchemy import insert
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-
-from config import CSV_CACHE_STALE_TTL_SECONDS
-from csv_cache import DATA_UPDATED_AT_HEADER, load_cached_csv_previews
-from database import get_db
+from starlette.types import ASGIApp
+
+from config import CSV_CACHE_READ_V1, CSV_CACHE_STALE_TTL_SECONDS
+from csv_cache import (
+    CACHE_BUSTER_PARAMS,
+    DATA_UPDATED_AT_HEADER,
+    CSVCacheMiddleware,
+    call_asgi_app,
+    canonical_csv_query,
+    csv_etag,
+    load_cached_csv_previews,
+    register_csv_query_canonicalizer,
+)
+from database import db_executor, get_db
 from dependencies import get_current_account
+from memory_cache import memory_budget
 from models import Account, AccountValueResource, ValueResource
 from redis_client import get_redis_client
 from value_rate_limit import (
     DATA_ACCESS_INTERNAL_HEADER,
     DATA_ACCESS_INTERNAL_TOKEN,
+    charge_rate_limit,
 )
+from value_resource_cache import ValueResourceDescriptor, value_resource_cache
 
 
 @dataclass(frozen=True)
@@ -99,13 +116,43 @@ RESOURCE_CREDENTIAL_PARAMS = {
     "bybit": frozenset({"capsule"}),
     "binance": frozenset({"capsule"}),
 }
+CREDENTIAL_FREE_SOURCE_PATHS = frozenset(
+    path
+    for source, path in (
+        *((name, config.path) for name, config in VALUE_SOURCES.items()),
+        *DIRECT_VALUE_SOURCES.items(),
+    )
+    if not RESOURCE_CREDENTIAL_PARAMS.get(source)
+)
+SOURCE_REQUEST_TIMEOUT_SECONDS = 30.0
+SOURCE_ROW_INDEX_MAX_BYTES = 8 * 1024 * 1024
 RESOURCE_ID_MIN_BYTES = 9
 RESOURCE_ID_MAX_BYTES = 16
 RESOURCE_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{12,22}$")
+VALUE_BATCH_MAX_IDS = 500
+VALUE_RESOURCE_BULK_MAX_ITEMS = 500
+VALUE_BATCH_CONTROL_PARAMS = {"ids", "layout", "auth_token"}
+VALUE_BATCH_SOURCE_CONCURRENCY = 8
 
 router = APIRouter(tags=["values"])
 
 
+@dataclass(frozen=True)
+class SourceRowIndex:
+    """Pre-split rows of one source CSV body, grouped by key-column value."""
+
+    columns: dict[str, int]
+    rows: dict[str, tuple[tuple[str, ...], ...]]
+    size: int
+
+
+_source_row_indexes = memory_budget.namespace(
+    "value-row-index",
+    max_bytes=SOURCE_ROW_INDEX_MAX_BYTES,
+    sizeof=lambda index: index.size,
+)
+
+
 class CreateValueResource(BaseModel):
     source: str = Field(min_length=1, max_length=64)
     key: str | None = Field(default=None, max_length=1024)
@@ -113,6 +160,27 @@ class CreateValueResource(BaseModel):
     parameters: dict[str, str] = Field(default_factory=dict)
 
 
+class CreateValueResourcesBulk(BaseModel):
+    resources: list[CreateValueResource] = Field(
+        min_length=1,
+        max_length=VALUE_RESOURCE_BULK_MAX_ITEMS,
+    )
+
+
+class CreatedValueResource(BaseModel):
+    id: str
+    credential_parameters: list[str]
+
+
+class CreatedValueResources(BaseModel):
+    items: list[CreatedValueResource]
+
+
+class ValueBatchRequest(BaseModel):
+    ids: list[str] = Field(min_length=1, max_length=VALUE_BATCH_MAX_IDS)
+    layout: Literal["column", "row"] = "column"
+
+
 class CopiedValueResourceItem(BaseModel):
     id: str
     source: str
@@ -173,6 +241,85 @@ def _copied_resource_item(
     )
 
 
+def _copied_resources(
+    db: Session,
+    account_id: str,
+    resource_ids: list[str],
+) -> list[ValueResource]:
+    return (
+        db.query(ValueResource)
+        .join(
+            AccountValueResource,
+            AccountValueResource.resource_id == ValueResource.id,
+        )
+        .filter(
+            AccountValueResource.account_id == account_id,
+            ValueResource.id.in_(resource_ids),
+        )
+        .all()
+    )
+
+
+def _record_copy(
+    db: Session,
+    account_id: str,
+    resource_id: str,
+) -> CopiedValueResourceItem | None:
+    resource = db.get(ValueResource, resource_id)
+    if resource is None:
+        return None
+
+    now = int(time.time())
+    filters = (
+        AccountValueResource.account_id == account_id,
+        AccountValueResource.resource_id == resource.id,
+    )
+    updated = (
+        db.query(AccountValueResource)
+        .filter(*filters)
+        .update(
+            {
+                AccountValueResource.last_copied_at: now,
+                AccountValueResource.copy_count: AccountValueResource.copy_count + 1,
+            },
+            synchronize_session=False,
+        )
+    )
+    if updated == 0:
+        db.add(
+            AccountValueResource(
+                account_id=account_id,
+                resource_id=resource.id,
+                first_copied_at=now,
+                last_copied_at=now,
+                copy_count=1,
+            )
+        )
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            (
+                db.query(AccountValueResource)
+                .filter(*filters)
+                .update(
+                    {
+                        AccountValueResource.last_copied_at: now,
+                        AccountValueResource.copy_count: (
+                            AccountValueResource.copy_count + 1
+                        ),
+                    },
+                    synchronize_session=False,
+                )
+            )
+            db.commit()
+    else:
+        db.commit()
+
+    history = db.query(AccountValueResource).filter(*filters).one()
+    return _copied_resource_item(history, resource)
+
+
 def _resource_source_path(source: str) -> str | None:
     source_config = VALUE_SOURCES.get(source)
     if source_config is not None:
@@ -315,6 +462,145 @@ def _get_or_create_resource(
     )
 
 
+def _get_or_create_resources(
+    db: Session,
+    requests: list[tuple[str, str | None, str | None, dict[str, str]]],
+) -> dict[str, ValueResourceDescriptor]:
+    """Returns the resources for many normalized requests, keyed by fingerprint.
+
+    Existing fingerprints are read with one query, and IDs for the rest are
+    allocated and inserted in one transaction. A concurrent insert of the same
+    resource rolls it back and falls back to `_get_or_create_resource`.
+    Descriptors are taken before committing, so expired rows are not reloaded.
+    """
+    wanted = {_resource_fingerprint(*request): request for request in requests}
+    resources = {
+        resource.fingerprint: ValueResourceDescriptor.from_row(resource)
+        for resource in db.query(ValueResource)
+        .filter(ValueResource.fingerprint.in_(list(wanted)))
+        .all()
+    }
+    pending = {
+        fingerprint: list(_resource_id_candidates(fingerprint))
+        for fingerprint in wanted
+        if fingerprint not in resources
+    }
+    if not pending:
+        return resources
+
+    now = int(time.time())
+    allocated: dict[str, str] = {}
+    for size in range(RESOURCE_ID_MAX_BYTES - RESOURCE_ID_MIN_BYTES + 1):
+        if not pending:
+            break
+        candidates = {fingerprint: ids[size] for fingerprint, ids in pending.items()}
+        taken = {
+            resource_id
+            for (resource_id,) in db.query(ValueResource.id).filter(
+                ValueResource.id.in_(list(candidates.values()))
+            )
+        }
+        for fingerprint, resource_id in candidates.items():
+            if resource_id in taken or resource_id in allocated.values():
+                continue
+            allocated[fingerprint] = resource_id
+            del pending[fingerprint]
+    if pending:
+        raise HTTPException(
+            status_code=409,
+            detail="Could not allocate a unique short resource ID",
+        )
+
+    created = {
+        fingerprint: ValueResource(
+            id=resource_id,
+            fingerprint=fingerprint,
+            source=wanted[fingerprint][0],
+            key=wanted[fingerprint][1],
+            column=wanted[fingerprint][2],
+            parameters=wanted[fingerprint][3],
+            created_at=now,
+        )
+        for fingerprint, resource_id in allocated.items()
+    }
+    db.add_all(created.values())
+    descriptors = {
+        fingerprint: ValueResourceDescriptor.from_row(resource)
+        for fingerprint, resource in created.items()
+    }
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        descriptors = {
+            fingerprint: ValueResourceDescriptor.from_row(
+                _get_or_create_resource(db, *wanted[fingerprint])
+            )
+            for fingerprint in allocated
+        }
+    resources.update(descriptors)
+    return resources
+
+
+def _record_copies(db: Session, account_id: str, resource_ids: list[str]) -> None:
+    """Adds one copy of each resource to the account's history in one transaction."""
+    now = int(time.time())
+    for attempt in range(2):
+        copied = {
+            resource_id
+            for (resource_id,) in db.query(AccountValueResource.resource_id).filter(
+                AccountValueResource.account_id == account_id,
+                AccountValueResource.resource_id.in_(resource_ids),
+            )
+        }
+        if copied:
+            db.query(AccountValueResource).filter(
+                AccountValueResource.account_id == account_id,
+                AccountValueResource.resource_id.in_(copied),
+            ).update(
+                {
+                    AccountValueResource.last_copied_at: now,
+                    AccountValueResource.copy_count: (
+                        AccountValueResource.copy_count + 1
+                    ),
+                },
+                synchronize_session=False,
+            )
+        rows = [
+            {
+                "account_id": account_id,
+                "resource_id": resource_id,
+                "first_copied_at": now,
+                "last_copied_at": now,
+                "copy_count": 1,
+            }
+            for resource_id in resource_ids
+            if resource_id not in copied
+        ]
+        if rows:
+            # A Core executemany skips fetching each generated primary key.
+            db.execute(insert(AccountValueResource), rows)
+        try:
+            db.commit()
+            return
+        except IntegrityError:
+            # A concurrent copy inserted a history row; count it as an update.
+            db.rollback()
+            if attempt:
+                raise
+
+
+def _create_value_resources(
+    db: Session,
+    account_id: str,
+    requests: list[tuple[str, str | None, str | None, dict[str, str]]],
+) -> list[ValueResourceDescriptor]:
+    resources = _get_or_create_resources(db, requests)
+    ordered = [resources[_resource_fingerprint(*request)] for request in requests]
+    _record_copies(db, account_id, list(dict.fromkeys(value.id for value in ordered)))
+    return ordered
+
+
 def _source_error(response: httpx.Response) -> str:
     try:
         payload = response.json()
@@ -362,29 +648,107 @@ def _stable_key_candidates(source: str, key: str) -> tuple[str, ...]:
     return (key,)
 
 
+def is_credential_free_request(path: str, query_items: list[tuple[str, str]]) -> bool:
+    """Returns whether a cached CSV response cannot depend on the caller.
+
+    Credential-free sources and short links read without extra credentials are
+    shared across accounts; capsule and token routes stay keyed by identity and
+    by their credential query parameters.
+    """
+    if path in CREDENTIAL_FREE_SOURCE_PATHS:
+        return True
+    if path == "/value":
+        sources = [value for name, value in query_items if name == "source"]
+        return (
+            len(sources) == 1
+            and _resource_source_path(sources[0]) is not None
+            and not RESOURCE_CREDENTIAL_PARAMS.get(sources[0])
+        )
+    resource_id = path.removeprefix("/v/")
+    return (
+        resource_id != path
+        and RESOURCE_ID_PATTERN.fullmatch(resource_id) is not None
+        and all(name.lower() in CACHE_BUSTER_PARAMS for name, _ in query_items)
+    )
+
+
+def _canonical_value_query(
+    query_items: list[tuple[str, str]],
+) -> list[tuple[str, str]]:
+    sources = [value for name, value in query_items if name == "source"]
+    path = _resource_source_path(sources[0]) if len(sources) == 1 else None
+    if path is None:
+        return query_items
+    return [
+        (name, value) for name, value in query_items if name in VALUE_CONTROL_PARAMS
+    ] + canonical_csv_query(
+        path,
+        [
+            (name, value)
+            for name, value in query_items
+            if name not in VALUE_CONTROL_PARAMS
+        ],
+    )
+
+
+register_csv_query_canonicalizer("/value", _canonical_value_query)
+
+
+def _source_dispatch_app(app) -> ASGIApp:
+    """Returns the CSV cache layer of `app` for internal source reads.
+
+    Internal reads skip CORS, authentication and refresh scheduling, which all
+    pass internal requests through unchanged, but keep the source cache and its
+    single-flight. Apps without the cache run their whole stack.
+    """
+    layer = getattr(app, "middleware_stack", None)
+    while layer is not None:
+        if isinstance(layer, CSVCacheMiddleware):
+            return layer
+        layer = getattr(layer, "app", None)
+    return app
+
+
 async def _request_source(
     request: Request,
+    source: str,
     path: str,
     forwarded_query: list[tuple[str, str]],
 ) -> httpx.Response:
-    forwarded_headers = {
-        DATA_ACCESS_INTERNAL_HEADER: DATA_ACCESS_INTERNAL_TOKEN,
-    }
+    forwarded_headers = [
+        (b"host", b"data-hunt.internal"),
+        (DATA_ACCESS_INTERNAL_HEADER.encode(), DATA_ACCESS_INTERNAL_TOKEN.encode()),
+    ]
     authorization = request.headers.get("authorization")
-    if authorization:
-        forwarded_headers["authorization"] = authorization
-
-    transport = httpx.ASGITransport(app=request.app)
-    async with httpx.AsyncClient(
-        transport=transport,
-        base_url="http://data-hunt.internal",
-        timeout=30.0,
-    ) as client:
-        return await client.get(
-            path,
-            params=forwarded_query,
-            headers=forwarded_headers,
-        )
+    if authorization and RESOURCE_CREDENTIAL_PARAMS.get(source):
+        forwarded_headers.append((b"authorization", authorization.encode()))
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "server": ("data-hunt.internal", 80),
+        "client": request.scope.get("client"),
+        "root_path": "",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": urlencode(forwarded_query).encode(),
+        "headers": forwarded_headers,
+        "app": request.app,
+    }
+    if "state" in request.scope:
+        scope["state"] = request.scope["state"].copy()
+    response = await asyncio.wait_for(
+        call_asgi_app(_source_dispatch_app(request.app), scope),
+        timeout=SOURCE_REQUEST_TIMEOUT_SECONDS,
+    )
+    return httpx.Response(
+        status_code=response.status_code,
+        headers=response.raw_headers,
+        content=response.body,
+    )
 
 
 def _raise_source_error(response: httpx.Response, source: str | None = None) -> None:
@@ -396,13 +760,48 @@ def _raise_source_error(response: httpx.Response, source: str | None = None) ->
         )
 
 
-async def _resolve_stable_value(
-    request: Request,
-    source: str,
-    key: str,
-    column: str,
-    forwarded_query: list[tuple[str, str]],
-) -> Response:
+def _source_row_index(
+    source_response: httpx.Response,
+    key_column: str,
+) -> SourceRowIndex:
+    """Returns the row index of a source CSV, parsing each cached body only once.
+
+    Indexes are keyed by the body's ETag, so every cell read from the same cached
+    CSV, whether served from Redis or memory, is a hash lookup.
+    """
+    body = source_response.content
+    cache_key = (source_response.headers.get("etag") or csv_etag(body), key_column)
+    index = _source_row_indexes.get(cache_key)
+    if index is not None:
+        return index
+
+    reader = csv.reader(io.StringIO(source_response.text))
+    header = next(reader, [])
+    # Like csv.DictReader, a repeated column name resolves to its last position.
+    columns = {name: position for position, name in enumerate(header)}
+    key_position = columns.get(key_column)
+    rows: dict[str, list[tuple[str, ...]]] = {}
+    # Every cell is its own str object, so the index is sized from the objects
+    # it keeps rather than from the body.
+    size = sys.getsizeof(columns) + sum(map(sys.getsizeof, columns))
+    if key_position is not None:
+        for row in reader:
+            if not row:
+                continue
+            row_key = row[key_position] if key_position < len(row) else ""
+            cells = tuple(row)
+            rows.setdefault(row_key, []).append(cells)
+            size += sys.getsizeof(cells) + sum(map(sys.getsizeof, cells))
+    grouped = {row_key: tuple(matches) for row_key, matches in rows.items()}
+    size += sys.getsizeof(grouped) + sum(
+        sys.getsizeof(matches) for matches in grouped.values()
+    )
+    index = SourceRowIndex(columns=columns, rows=grouped, size=size)
+    _source_row_indexes[cache_key] = index
+    return index
+
+
+def _stable_source_config(source: str) -> ValueSource:
     source_config = VALUE_SOURCES.get(source)
     if source_config is None:
         supported = ", ".join(sorted(VALUE_SOURCES))
@@ -410,14 +809,16 @@ async def _resolve_stable_value(
             status_code=400,
             detail=f"Unsupported value source. Supported: {supported}",
         )
+    return source_config
 
-    source_response = await _request_source(
-        request,
-        source_config.path,
-        forwarded_query,
-    )
-    _raise_source_error(source_response, source)
 
+def _stable_cell(
+    source: str,
+    source_config: ValueSource,
+    source_response: httpx.Response,
+    key: str,
+    column: str,
+) -> str:
     content_type = source_response.headers.get("content-type", "").lower()
     if not content_type.startswith("text/csv"):
         raise HTTPException(
@@ -428,24 +829,22 @@ async def _resolve_stable_value(
             ),
         )
 
-    reader = csv.DictReader(io.StringIO(source_response.text))
-    fieldnames = reader.fieldnames or []
-    if source_config.key_column not in fieldnames:
+    index = _source_row_index(source_response, source_config.key_column)
+    if source_config.key_column not in index.columns:
         raise HTTPException(
             status_code=502,
             detail=f"Source CSV is missing key column '{source_config.key_column}'",
         )
-    if column not in fieldnames:
+    if column not in index.columns:
         raise HTTPException(
             status_code=400,
             detail=f"Column '{column}' was not found in the source CSV",
         )
 
-    key_candidates = _stable_key_candidates(source, key)
     matches = [
         row
-        for row in reader
-        if (row.get(source_config.key_column) or "") in key_candidates
+        for candidate in _stable_key_candidates(source, key)
+        for row in index.rows.get(candidate, ())
     ]
     if not matches:
         raise HTTPException(
@@ -458,8 +857,46 @@ async def _resolve_stable_value(
             detail=(f"Stable key {source_config.key_column}='{key}' is not unique"),
         )
 
+    position = index.columns[column]
+    return matches[0][position] if position < len(matches[0]) else ""
+
+
+def _direct_cell(source_response: httpx.Response) -> str:
+    content_type = source_response.headers.get("content-type", "").lower()
+    if content_type.startswith("text/csv"):
+        rows = [row for row in csv.reader(io.StringIO(source_response.text)) if row]
+        if len(rows) != 1 or len(rows[0]) != 1:
+            raise HTTPException(
+                status_code=400,
+                detail="The saved resource did not return exactly one cell",
+            )
+        return rows[0][0]
+    if content_type.startswith("text/plain"):
+        return source_response.text.strip()
+    raise HTTPException(
+        status_code=400,
+        detail="The saved resource did not return a CSV or plain-text value",
+    )
+
+
+async def _resolve_stable_value(
+    request: Request,
+    source: str,
+    key: str,
+    column: str,
+    forwarded_query: list[tuple[str, str]],
+) -> Response:
+    source_config = _stable_source_config(source)
+    source_response = await _request_source(
+        request,
+        source,
+        source_config.path,
+        forwarded_query,
+    )
+    _raise_source_error(source_response, source)
+    value = _stable_cell(source, source_config, source_response, key, column)
     return Response(
-        content=_render_single_cell(matches[0].get(column) or ""),
+        content=_render_single_cell(value),
         media_type="text/csv",
         headers=_forward_data_timestamp(
             source_response,
@@ -480,32 +917,192 @@ async def _resolve_direct_value(
     if path is None:
         raise HTTPException(status_code=400, detail="Unsupported value source")
 
-    source_response = await _request_source(request, path, forwarded_query)
+    source_response = await _request_source(request, source, path, forwarded_query)
     _raise_source_error(source_response, source)
-    content_type = source_response.headers.get("content-type", "").lower()
-    if content_type.startswith("text/csv"):
-        rows = [row for row in csv.reader(io.StringIO(source_response.text)) if row]
-        if len(rows) != 1 or len(rows[0]) != 1:
+    return Response(
+        content=_render_single_cell(_direct_cell(source_response)),
+        media_type="text/csv",
+        headers=_forward_data_timestamp(
+            source_response,
+            {"X-Value-Source": source},
+        ),
+    )
+
+
+def _supplied_credentials(
+    request: Request,
+    accepted: frozenset[str],
+    control_params: set[str],
+) -> list[tuple[str, str]]:
+    supplied: list[tuple[str, str]] = []
+    for name, value in request.query_params.multi_items():
+        if name in control_params:
+            continue
+        if name not in accepted:
             raise HTTPException(
                 status_code=400,
-                detail="The saved resource did not return exactly one cell",
+                detail=f"Unsupported credential parameter '{name}'",
             )
-        value = rows[0][0]
-    elif content_type.startswith("text/plain"):
-        value = source_response.text.strip()
-    else:
+        if len(value) > 65536:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Credential parameter '{name}' is too long",
+            )
+        supplied.append((name, value))
+    return supplied
+
+
+def _resource_query(
+    resource: ValueResourceDescriptor,
+    supplied_credentials: list[tuple[str, str]],
+) -> list[tuple[str, str]]:
+    credentials = RESOURCE_CREDENTIAL_PARAMS.get(resource.source, frozenset())
+    forwarded_query = list(sorted((resource.parameters or {}).items()))
+    forwarded_query.extend(
+        (name, value) for name, value in supplied_credentials if name in credentials
+    )
+    return forwarded_query
+
+
+def _batch_resource_ids(values: list[str]) -> list[str]:
+    resource_ids = [
+        resource_id.strip()
+        for value in values
+        for resource_id in value.split(",")
+        if resource_id.strip()
+    ]
+    if not resource_ids:
+        raise HTTPException(status_code=400, detail="No resource IDs were provided")
+    if len(resource_ids) > VALUE_BATCH_MAX_IDS:
         raise HTTPException(
             status_code=400,
-            detail="The saved resource did not return a CSV or plain-text value",
+            detail=f"At most {VALUE_BATCH_MAX_IDS} resource IDs are allowed",
         )
+    if any(not RESOURCE_ID_PATTERN.fullmatch(value) for value in resource_ids):
+        raise HTTPException(status_code=400, detail="Invalid resource ID")
+    return resource_ids
+
+
+def _batch_error_cell(detail: str) -> str:
+    return f"#ERROR: {detail}"
 
+
+async def _resolve_value_batch(
+    request: Request,
+    db: Session,
+    resource_ids: list[str],
+    layout: Literal["column", "row"],
+) -> Response:
+    """Resolves many short resources, reading each distinct source at most once.
+
+    Resources are grouped by source path and canonical query, and the caller is
+    charged one rate-limit unit per group rather than per cell. Cells that cannot
+    be resolved hold an `#ERROR:` message instead of failing the whole batch.
+    """
+    unique_ids = list(dict.fromkeys(resource_ids))
+    resources = await value_resource_cache.get_many(unique_ids, db)
+    supplied_credentials = _supplied_credentials(
+        request,
+        frozenset().union(
+            *(
+                RESOURCE_CREDENTIAL_PARAMS.get(resource.source, frozenset())
+                for resource in resources.values()
+            )
+        ),
+        VALUE_BATCH_CONTROL_PARAMS,
+    )
+
+    cells: dict[str, str] = {}
+    source_requests: dict[tuple, tuple[str, str, list[tuple[str, str]]]] = {}
+    resource_requests: dict[str, tuple] = {}
+    for resource_id in unique_ids:
+        resource = resources.get(resource_id)
+        if resource is None:
+            cells[resource_id] = _batch_error_cell("Value resource not found")
+            continue
+        path = _resource_source_path(resource.source)
+        if path is None:
+            cells[resource_id] = _batch_error_cell("Unsupported value source")
+            continue
+        forwarded_query = _resource_query(resource, supplied_credentials)
+        request_key = (path, tuple(canonical_csv_query(path, forwarded_query)))
+        source_requests.setdefault(
+            request_key,
+            (resource.source, path, forwarded_query),
+        )
+        resource_requests[resource_id] = request_key
+
+    # The request itself already paid for one unit.
+    await charge_rate_limit(request, len(source_requests) - 1)
+
+    semaphore = asyncio.Semaphore(VALUE_BATCH_SOURCE_CONCURRENCY)
+
+    async def read_source(
+        source: str,
+        path: str,
+        forwarded_query: list[tuple[str, str]],
+    ) -> httpx.Response | None:
+        async with semaphore:
+            try:
+                return await _request_source(request, source, path, forwarded_query)
+            except asyncio.TimeoutError:
+                return None
+
+    request_keys = list(source_requests)
+    source_responses = dict(
+        zip(
+            request_keys,
+            await asyncio.gather(
+                *(read_source(*source_requests[key]) for key in request_keys)
+            ),
+        )
+    )
+
+    for resource_id, request_key in resource_requests.items():
+        resource = resources[resource_id]
+        source_response = source_responses[request_key]
+        try:
+            if source_response is None:
+                raise HTTPException(status_code=504, detail="Source request timed out")
+            _raise_source_error(source_response, resource.source)
+            if resource.key is not None and resource.column is not None:
+                cells[resource_id] = _stable_cell(
+                    resource.source,
+                    _stable_source_config(resource.source),
+                    source_response,
+                    resource.key,
+                    resource.column,
+                )
+            else:
+                cells[resource_id] = _direct_cell(source_response)
+        except HTTPException as exc:
+            cells[resource_id] = _batch_error_cell(str(exc.detail))
+
+    output = io.StringIO()
+    writer = csv.writer(output, lineterminator="\n")
+    values = [cells[resource_id] for resource_id in resource_ids]
+    if layout == "row":
+        writer.writerow(values)
+    else:
+        writer.writerows([value] for value in values)
+
+    sources = {source for source, _, _ in source_requests.values()}
+    headers = {
+        "X-Value-Source": sources.pop() if len(sources) == 1 else "value-batch",
+        "X-Value-Batch-Sources": str(len(source_requests)),
+    }
+    updated_at = [
+        int(response.headers[DATA_UPDATED_AT_HEADER])
+        for response in source_responses.values()
+        if response is not None
+        and response.headers.get(DATA_UPDATED_AT_HEADER, "").isdigit()
+    ]
+    if updated_at:
+        headers[DATA_UPDATED_AT_HEADER] = str(min(updated_at))
     return Response(
-        content=_render_single_cell(value),
+        content=output.getvalue().rstrip("\n"),
         media_type="text/csv",
-        headers=_forward_data_timestamp(
-            source_response,
-            {"X-Value-Source": source},
-        ),
+        headers=headers,
     )
 
 
@@ -553,13 +1150,15 @@ async def create_value_resource(
     db: Session = Depends(get_db),
 ):
     source, key, column, parameters = _normalize_resource_request(payload)
-    resource = _get_or_create_resource(
+    resource = await db_executor.run(
+        _get_or_create_resource,
         db,
         source,
         key,
         column,
         parameters,
     )
+    await value_resource_cache.remember(resource)
     return {
         "id": resource.id,
         "credential_parameters": sorted(
@@ -568,6 +1167,42 @@ async def create_value_resource(
     }
 
 
+@router.post(
+    "/value-resources/bulk",
+    response_model=CreatedValueResources,
+    summary="Create or reuse many short value resources",
+    description=(
+        "Stores up to 500 credential-free value descriptions at once, returns their "
+        "short IDs in request order, and records them as copied by the current "
+        "account. Identical requests reuse the same ID."
+    ),
+)
+async def create_value_resources(
+    payload: CreateValueResourcesBulk,
+    account: Account = Depends(get_current_account),
+    db: Session = Depends(get_db),
+):
+    requests = [_normalize_resource_request(value) for value in payload.resources]
+    resources = await db_executor.run(
+        _create_value_resources,
+        db,
+        account.id,
+        requests,
+    )
+    await value_resource_cache.remember_many(resources)
+    return CreatedValueResources(
+        items=[
+            CreatedValueResource(
+                id=resource.id,
+                credential_parameters=sorted(
+                    RESOURCE_CREDENTIAL_PARAMS.get(resource.source, frozenset())
+                ),
+            )
+            for resource in resources
+        ]
+    )
+
+
 @router.post(
     "/value-resources/{resource_id}/copies",
     response_model=CopiedValueResourceItem,
@@ -587,59 +1222,10 @@ async def record_value_resource_copy(
     account: Account = Depends(get_current_account),
     db: Session = Depends(get_db),
 ):
-    resource = db.get(ValueResource, resource_id)
-    if resource is None:
+    item = await db_executor.run(_record_copy, db, account.id, resource_id)
+    if item is None:
         raise HTTPException(status_code=404, detail="Value resource not found")
-
-    now = int(time.time())
-    filters = (
-        AccountValueResource.account_id == account.id,
-        AccountValueResource.resource_id == resource.id,
-    )
-    updated = (
-        db.query(AccountValueResource)
-        .filter(*filters)
-        .update(
-            {
-                AccountValueResource.last_copied_at: now,
-                AccountValueResource.copy_count: AccountValueResource.copy_count + 1,
-            },
-            synchronize_session=False,
-        )
-    )
-    if updated == 0:
-        db.add(
-            AccountValueResource(
-                account_id=account.id,
-                resource_id=resource.id,
-                first_copied_at=now,
-                last_copied_at=now,
-                copy_count=1,
-            )
-        )
-        try:
-            db.commit()
-        except IntegrityError:
-            db.rollback()
-            (
-                db.query(AccountValueResource)
-                .filter(*filters)
-                .update(
-                    {
-                        AccountValueResource.last_copied_at: now,
-                        AccountValueResource.copy_count: (
-                            AccountValueResource.copy_count + 1
-                        ),
-                    },
-                    synchronize_session=False,
-                )
-            )
-            db.commit()
-    else:
-        db.commit()
-
-    history = db.query(AccountValueResource).filter(*filters).one()
-    return _copied_resource_item(history, resource)
+    return item
 
 
 @router.delete(
@@ -735,18 +1321,7 @@ async def preview_copied_value_resources(
     if any(not RESOURCE_ID_PATTERN.fullmatch(value) for value in resource_ids):
         raise HTTPException(status_code=400, detail="Invalid resource ID")
 
-    rows = (
-        db.query(ValueResource)
-        .join(
-            AccountValueResource,
-            AccountValueResource.resource_id == ValueResource.id,
-        )
-        .filter(
-            AccountValueResource.account_id == account.id,
-            ValueResource.id.in_(resource_ids),
-        )
-        .all()
-    )
+    rows = await db_executor.run(_copied_resources, db, account.id, resource_ids)
     resources = {resource.id: resource for resource in rows}
     if len(resources) != len(resource_ids):
         raise HTTPException(status_code=404, detail="Copied resource not found")
@@ -787,6 +1362,7 @@ async def preview_copied_value_resources(
                 client,
                 cache_requests,
                 stale_ttl_seconds=CSV_CACHE_STALE_TTL_SECONDS,
+                read_legacy=CSV_CACHE_READ_V1,
             )
         except RedisError:
             cached = {}
@@ -810,6 +1386,51 @@ async def preview_copied_value_resources(
     return CachedValuePreviewsResponse(items=items)
 
 
+@router.get(
+    "/v/batch",
+    summary="Get many saved values in one request",
+    description=(
+        "Resolves up to 500 short resource IDs and returns their cells as one CSV "
+        "column, or one row with layout=row, in the requested order. Each distinct "
+        "source is read once. Credentials, when required, are accepted only as "
+        "extra query parameters."
+    ),
+    responses={200: {"content": {"text/csv": {}}}},
+)
+async def get_value_batch(
+    request: Request,
+    ids: list[str] = Query(
+        ...,
+        description="Short resource IDs, comma-separated or repeated.",
+    ),
+    layout: Literal["column", "row"] = Query(default="column"),
+    db: Session = Depends(get_db),
+):
+    return await _resolve_value_batch(request, db, _batch_resource_ids(ids), layout)
+
+
+@router.post(
+    "/v/batch",
+    summary="Get many saved values in one request",
+    description=(
+        "Same as GET /v/batch for ID lists that do not fit in a URL. Credentials, "
+        "when required, are accepted only as extra query parameters."
+    ),
+    responses={200: {"content": {"text/csv": {}}}},
+)
+async def post_value_batch(
+    request: Request,
+    payload: ValueBatchRequest,
+    db: Session = Depends(get_db),
+):
+    return await _resolve_value_batch(
+        request,
+        db,
+        _batch_resource_ids(payload.ids),
+        payload.layout,
+    )
+
+
 @router.get(
     "/v/{resource_id}",
     summary="Get a saved value by short resource ID",
@@ -829,33 +1450,16 @@ async def get_value_resource(
     ),
     db: Session = Depends(get_db),
 ):
-    resource = db.get(ValueResource, resource_id)
+    resource = await value_resource_cache.get(resource_id, db)
     if resource is None:
         raise HTTPException(status_code=404, detail="Value resource not found")
 
-    credentials = RESOURCE_CREDENTIAL_PARAMS.get(
-        resource.source,
-        frozenset(),
+    supplied_credentials = _supplied_credentials(
+        request,
+        RESOURCE_CREDENTIAL_PARAMS.get(resource.source, frozenset()),
+        {"auth_token"},
     )
-    supplied_credentials: list[tuple[str, str]] = []
-    for name, value in request.query_params.multi_items():
-        if name == "auth_token":
-            continue
-        if name not in credentials:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Unsupported credential parameter '{name}'",
-            )
-        if len(value) > 65536:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Credential parameter '{name}' is too long",
-            )
-        supplied_credentials.append((name, value))
-
-    stored_parameters = resource.parameters or {}
-    forwarded_query = list(sorted(stored_parameters.items()))
-    forwarded_query.extend(supplied_credentials)
+    forwarded_query = _resource_query(resource, supplied_credentials)
     if resource.key is not None and resource.column is not None:
         return await _resolve_stable_value(
             request,
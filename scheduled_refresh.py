@@ -7,22 +7,28 @@ import time
 from typing import Callable
 
 import httpx
-from fastapi import Request, Response
+from fastapi import Request
 from redis.asyncio import Redis
 from redis.exceptions import RedisError
 from sqlalchemy.orm import Session
-from starlette.background import BackgroundTask, BackgroundTasks
-from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from config import (
     SHEETS_REFRESH_DELAY_SECONDS,
     SHEETS_REFRESH_ENABLED,
     SHEETS_REFRESH_POLL_SECONDS,
 )
-from csv_cache import CACHE_FORCE_REFRESH_HEADER
-from database import SessionLocal
-from models import ValueResource
+from csv_cache import (
+    CACHE_FORCE_REFRESH_HEADER,
+    CSVCachePolicy,
+    CSVCachePolicyTable,
+    canonical_csv_query,
+    csv_cache_policies,
+)
+from database import SessionLocal, open_session
+from outbound_queue import LANE_REFRESH, outbound_lane
 from redis_client import get_redis_client
+from value_resource_cache import ValueResourceCache, value_resource_cache
 from value_rate_limit import (
     DATA_ACCESS_INTERNAL_HEADER,
     DATA_ACCESS_INTERNAL_TOKEN,
@@ -56,12 +62,16 @@ class ScheduledRefreshQueue:
         poll_seconds: float = SHEETS_REFRESH_POLL_SECONDS,
         redis_client: Redis | None = None,
         session_factory: Callable[[], Session] = SessionLocal,
+        policies: CSVCachePolicyTable = csv_cache_policies,
+        resource_cache: ValueResourceCache = value_resource_cache,
     ):
         self.enabled = enabled
         self.delay_seconds = max(60, delay_seconds)
         self.poll_seconds = max(0.1, poll_seconds)
         self._redis_client = redis_client
         self._session_factory = session_factory
+        self.policies = policies
+        self._resource_cache = resource_cache
         self._app = None
         self._worker: asyncio.Task[None] | None = None
         self._stop = asyncio.Event()
@@ -70,24 +80,47 @@ class ScheduledRefreshQueue:
         return self._redis_client or get_redis_client()
 
     @staticmethod
-    def _refresh_fingerprint(source: str, parameters: dict[str, str]) -> str:
+    def _refresh_fingerprint(
+        source: str,
+        path: str,
+        parameters: dict[str, str],
+    ) -> str:
         canonical = json.dumps(
-            {"source": source, "parameters": parameters},
+            {
+                "source": source,
+                "parameters": dict(
+                    canonical_csv_query(path, sorted(parameters.items()))
+                ),
+            },
             ensure_ascii=True,
             separators=(",", ":"),
             sort_keys=True,
         )
         return hashlib.sha256(canonical.encode()).hexdigest()
 
-    def _load_resource(
+    async def _load_resource(
         self, resource_id: str
     ) -> tuple[str, dict[str, str]] | None:
-        with self._session_factory() as db:
-            resource = db.get(ValueResource, resource_id)
-            if resource is None:
-                return None
-            parameters = resource.parameters or {}
-            return resource.source, dict(sorted(parameters.items()))
+        async with open_session(self._session_factory) as db:
+            resource = await self._resource_cache.get(resource_id, db)
+        if resource is None:
+            return None
+        parameters = resource.parameters or {}
+        return resource.source, dict(sorted(parameters.items()))
+
+    def _refresh_delay(self, policy: CSVCachePolicy) -> float:
+        """Seconds from a read until its source is refreshed.
+
+        Refreshing before the source's cache entry expires would only spend
+        provider quota on data that cannot have changed yet. Where stale bodies
+        may be served, readers keep getting the old body while the refresh
+        runs. Where they may not, a read after expiry blocks on the refill, so
+        the refresh starts `refresh_timeout_seconds` before the entry expires.
+        """
+        fresh_for = policy.ttl_seconds
+        if not policy.serve_stale:
+            fresh_for -= policy.refresh_timeout_seconds
+        return max(self.delay_seconds, fresh_for)
 
     @staticmethod
     def _mapping_key(fingerprint: str) -> str:
@@ -99,18 +132,25 @@ class ScheduledRefreshQueue:
         client = self._redis()
         if client is None:
             return False
-        resource = self._load_resource(resource_id)
+        resource = await self._load_resource(resource_id)
         if resource is None:
             return False
         source, parameters = resource
 
-        from routers.value import RESOURCE_CREDENTIAL_PARAMS
+        from routers.value import (
+            RESOURCE_CREDENTIAL_PARAMS,
+            _resource_source_path,
+        )
 
         if RESOURCE_CREDENTIAL_PARAMS.get(source):
             return False
+        path = _resource_source_path(source)
+        if path is None:
+            return False
 
-        fingerprint = self._refresh_fingerprint(source, parameters)
-        due_at = time.time() + self.delay_seconds
+        policy = self.policies.for_path(path)
+        fingerprint = self._refresh_fingerprint(source, path, parameters)
+        due_at = time.time() + self._refresh_delay(policy)
         try:
             async with client.pipeline(transaction=True) as pipeline:
                 pipeline.set(
@@ -153,7 +193,7 @@ class ScheduledRefreshQueue:
     async def _refresh_resource(self, resource_id: str) -> bool:
         if self._app is None:
             return False
-        resource = self._load_resource(resource_id)
+        resource = await self._load_resource(resource_id)
         if resource is None:
             return False
         source, parameters = resource
@@ -170,19 +210,22 @@ class ScheduledRefreshQueue:
             return False
 
         transport = httpx.ASGITransport(app=self._app)
-        async with httpx.AsyncClient(
-            transport=transport,
-            base_url="http://data-hunt.internal",
-            timeout=180.0,
-        ) as client:
-            response = await client.get(
-                path,
-                params=parameters,
-                headers={
-                    DATA_ACCESS_INTERNAL_HEADER: DATA_ACCESS_INTERNAL_TOKEN,
-                    CACHE_FORCE_REFRESH_HEADER: "1",
-                },
-            )
+        # The in-process request inherits the lane, so its provider calls
+        # yield to interactive traffic.
+        with outbound_lane(LANE_REFRESH):
+            async with httpx.AsyncClient(
+                transport=transport,
+                base_url="http://data-hunt.internal",
+                timeout=180.0,
+            ) as client:
+                response = await client.get(
+                    path,
+                    params=parameters,
+                    headers={
+                        DATA_ACCESS_INTERNAL_HEADER: DATA_ACCESS_INTERNAL_TOKEN,
+                        CACHE_FORCE_REFRESH_HEADER: "1",
+                    },
+                )
         if response.status_code != 200:
             logger.warning(
                 "Scheduled Sheets refresh failed for source=%s status=%s",
@@ -253,31 +296,40 @@ class ScheduledRefreshQueue:
 scheduled_refresh = ScheduledRefreshQueue()
 
 
-class ScheduledRefreshMiddleware(BaseHTTPMiddleware):
-    async def dispatch(
-        self,
-        request: Request,
-        call_next: RequestResponseEndpoint,
-    ) -> Response:
-        response = await call_next(request)
-        match = RESOURCE_ID_PATTERN.fullmatch(request.url.path)
+class ScheduledRefreshMiddleware:
+    """Schedules a Sheets refresh after each successful external `/v/{id}` read.
+
+    A pure ASGI middleware; scheduling runs once the response has been sent.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"].upper() != "GET":
+            await self.app(scope, receive, send)
+            return
+        match = RESOURCE_ID_PATTERN.fullmatch(scope["path"])
+        if match is None:
+            await self.app(scope, receive, send)
+            return
+        request = Request(scope)
         is_internal = (
             request.headers.get(DATA_ACCESS_INTERNAL_HEADER)
             == DATA_ACCESS_INTERNAL_TOKEN
         )
         query_names = {name for name, _ in request.query_params.multi_items()}
-        if (
-            request.method.upper() == "GET"
-            and response.status_code < 400
-            and match is not None
-            and not is_internal
-            and query_names <= {"auth_token"}
-        ):
-            task = BackgroundTask(scheduled_refresh.schedule, match.group(1))
-            if response.background is None:
-                response.background = task
-            elif isinstance(response.background, BackgroundTasks):
-                response.background.tasks.append(task)
-            else:
-                response.background = BackgroundTasks([response.background, task])
-        return response
+        if is_internal or not query_names <= {"auth_token"}:
+            await self.app(scope, receive, send)
+            return
+
+        status_codes: list[int] = []
+
+        async def record_status(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                status_codes.append(message["status"])
+            await send(message)
+
+        await self.app(scope, receive, record_status)
+        if status_codes and status_codes[0] < 400:
+            await scheduled_refresh.schedule(match.group(1))
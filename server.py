@@ -8,8 +8,13 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from analytics_retention import auth_funnel_retention
 from config import (
+    CSV_CACHE_COMPRESS_MIN_BYTES,
+    CSV_CACHE_EARLY_REFRESH_BETA,
     CSV_CACHE_FLIGHT_TIMEOUT_SECONDS,
+    CSV_CACHE_LOCAL_MAX_BYTES,
     CSV_CACHE_MAX_ENTRIES,
+    CSV_CACHE_MEMORY_MAX_BYTES,
+    CSV_CACHE_READ_V1,
     CSV_CACHE_REFRESH_TIMEOUT_SECONDS,
     CSV_CACHE_STALE_TTL_SECONDS,
     CSV_CACHE_TTL_SECONDS,
@@ -17,9 +22,11 @@ from config import (
     VALUE_RATE_LIMIT_AUTHENTICATED,
     VALUE_RATE_LIMIT_WINDOW_SECONDS,
 )
-from csv_cache import CSVCacheMiddleware
+from csv_cache import CSVCacheMiddleware, csv_cache_policies
+from database import db_executor
+from memory_cache import memory_budget
 from outbound_queue import outbound_queue
-from redis_client import close_redis_client
+from redis_client import close_redis_client, redis_broadcast
 from scheduled_refresh import (
     ScheduledRefreshMiddleware,
     scheduled_refresh,
@@ -53,9 +60,9 @@ from routers.stablecoins import router as stablecoins_router
 from routers.stakedao import router as stakedao_router
 from routers.uniswap import router as uniswap_router
 from routers.uniswap_v4 import router as uniswap_v4_router
-from routers.value import router as value_router
+from routers.value import is_credential_free_request, router as value_router
 from utils import load_chains
-from value_rate_limit import ValueRateLimitMiddleware
+from value_rate_limit import ValueRateLimitMiddleware, usage_recorder
 
 
 @asynccontextmanager
@@ -80,7 +87,10 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Error applying migrations: {e}")
 
+    await redis_broadcast.start()
+    outbound_queue.clients.start()
     await outbound_queue.start_analytics()
+    await usage_recorder.start()
     await auth_funnel_retention.start()
     await scheduled_refresh.start(app)
     try:
@@ -88,8 +98,12 @@ async def lifespan(app: FastAPI):
     finally:
         await scheduled_refresh.stop()
         await auth_funnel_retention.stop()
+        await usage_recorder.stop()
         await outbound_queue.stop_analytics()
+        await outbound_queue.clients.aclose()
+        await redis_broadcast.stop()
         await close_redis_client()
+        db_executor.shutdown()
 
 
 def get_description_with_chains():
@@ -122,6 +136,14 @@ app.add_middleware(
     flight_timeout_seconds=CSV_CACHE_FLIGHT_TIMEOUT_SECONDS,
     stale_ttl_seconds=CSV_CACHE_STALE_TTL_SECONDS,
     refresh_timeout_seconds=CSV_CACHE_REFRESH_TIMEOUT_SECONDS,
+    local_max_bytes=CSV_CACHE_LOCAL_MAX_BYTES,
+    memory_max_bytes=CSV_CACHE_MEMORY_MAX_BYTES,
+    read_legacy=CSV_CACHE_READ_V1,
+    compress_min_bytes=CSV_CACHE_COMPRESS_MIN_BYTES,
+    early_refresh_beta=CSV_CACHE_EARLY_REFRESH_BETA,
+    policies=csv_cache_policies,
+    shared_identity=is_credential_free_request,
+    memory_budget=memory_budget,
 )
 app.add_middleware(ScheduledRefreshMiddleware)
 app.add_middleware(
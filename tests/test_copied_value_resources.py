@@ -3,7 +3,7 @@ from unittest.mock import AsyncMock, patch
 
 from fastapi import FastAPI, Response
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
@@ -366,6 +366,103 @@ class CopiedValueResourcesTest(unittest.TestCase):
 
         self.assertEqual(response.status_code, 404)
 
+    def _bulk_descriptors(self, count):
+        return [
+            {
+                "source": "morpho",
+                "key": f"vault:{index}",
+                "column": "supply_usd",
+                "parameters": {"chain_id": "1"},
+            }
+            for index in range(count)
+        ]
+
+    def test_bulk_create_reuses_ids_and_records_copies_in_constant_queries(self):
+        existing_id = self._create_resource(
+            key="vault:0",
+            parameters={"chain_id": "1"},
+        )
+        descriptors = self._bulk_descriptors(300)
+        descriptors.append(descriptors[1])
+        queries = []
+
+        def count_query(*args):
+            queries.append(args[2])
+
+        event.listen(self.engine, "before_cursor_execute", count_query)
+        try:
+            response = self.client.post(
+                "/value-resources/bulk",
+                json={"resources": descriptors},
+            )
+        finally:
+            event.remove(self.engine, "before_cursor_execute", count_query)
+
+        self.assertEqual(response.status_code, 200, response.text)
+        ids = [item["id"] for item in response.json()["items"]]
+        self.assertEqual(len(ids), 301)
+        self.assertEqual(ids[0], existing_id)
+        self.assertEqual(ids[1], ids[-1])
+        self.assertEqual(len(set(ids)), 300)
+        self.assertLessEqual(len(queries), 8)
+        db = self.Session()
+        try:
+            self.assertEqual(db.query(ValueResource).count(), 300)
+            self.assertEqual(
+                {row.copy_count for row in db.query(AccountValueResource)},
+                {1},
+            )
+            self.assertEqual(db.query(AccountValueResource).count(), 300)
+        finally:
+            db.close()
+        self.assertEqual(self.client.get("/value-resources/mine").json()["total"], 300)
+
+    def test_repeated_bulk_create_counts_another_copy(self):
+        descriptors = self._bulk_descriptors(3)
+        first = self.client.post(
+            "/value-resources/bulk",
+            json={"resources": descriptors},
+        )
+        second = self.client.post(
+            "/value-resources/bulk",
+            json={"resources": descriptors[1:]},
+        )
+
+        self.assertEqual(first.json()["items"][1:], second.json()["items"])
+        db = self.Session()
+        try:
+            counts = {
+                row.resource_id: row.copy_count
+                for row in db.query(AccountValueResource)
+            }
+        finally:
+            db.close()
+        self.assertEqual(
+            [counts[item["id"]] for item in first.json()["items"]],
+            [1, 2, 2],
+        )
+
+    def test_bulk_create_rejects_stored_credentials_without_writing(self):
+        response = self.client.post(
+            "/value-resources/bulk",
+            json={
+                "resources": [
+                    *self._bulk_descriptors(2),
+                    {
+                        "source": "coinbase",
+                        "parameters": {"api_secret": "secret"},
+                    },
+                ]
+            },
+        )
+
+        self.assertEqual(response.status_code, 400)
+        db = self.Session()
+        try:
+            self.assertEqual(db.query(ValueResource).count(), 0)
+        finally:
+            db.close()
+
     def test_history_endpoints_require_authentication(self):
         resource_id = self._create_resource()
         del self.app.dependency_overrides[get_current_account]
@@ -377,8 +474,13 @@ class CopiedValueResourcesTest(unittest.TestCase):
             "/value-resources/previews",
             json={"resource_ids": [resource_id]},
         )
+        bulk = self.client.post(
+            "/value-resources/bulk",
+            json={"resources": self._bulk_descriptors(1)},
+        )
 
         self.assertEqual(listed.status_code, 401)
+        self.assertEqual(bulk.status_code, 401)
         self.assertEqual(recorded.status_code, 401)
         self.assertEqual(deleted.status_code, 401)
         self.assertEqual(previewed.status_code, 401)
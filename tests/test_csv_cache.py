@@ -1,19 +1,35 @@
 import asyncio
 import time
 import unittest
+from dataclasses import replace
+from unittest.mock import patch
 
 import httpx
 from fastapi import FastAPI, Header
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import PlainTextResponse, Response
 from fastapi.testclient import TestClient
+from redis.exceptions import NoScriptError
+from starlette.background import BackgroundTask
+from starlette.requests import Request
 
 from csv_cache import (
+    CSV_INVALIDATION_CHANNEL,
     CSVCacheMiddleware,
+    CSVCachePolicy,
+    CSVCachePolicyTable,
+    CSV_FLIGHT_CHANNEL,
     CSVMemoryCacheMiddleware,
+    RELEASE_LOCK_SCRIPT,
+    canonical_bool,
+    canonical_int,
     csv_cache_digest,
+    csv_cache_stats,
+    legacy_redis_csv_cache_key,
     load_cached_csv_previews,
+    query_canonicalizer,
     redis_csv_cache_key,
+    register_csv_query_canonicalizer,
 )
 from csv_cache import CACHE_FORCE_REFRESH_HEADER
 from value_rate_limit import (
@@ -27,8 +43,13 @@ class FakeRedis:
         self.hashes: dict[str, dict[bytes, bytes]] = {}
         self.values: dict[str, bytes] = {}
         self.expirations: dict[str, int] = {}
+        self.subscribers: dict[str, list] = {}
+        self.published: list[tuple[str, str]] = []
+        self.loaded_scripts: set[str] = set()
+        self.reads = 0
 
     async def hgetall(self, key: str):
+        self.reads += 1
         return self.hashes.get(key, {}).copy()
 
     async def hset(self, key: str, mapping):
@@ -58,11 +79,45 @@ class FakeRedis:
     async def exists(self, key: str):
         return key in self.values
 
-    async def eval(self, script: str, key_count: int, key: str, token: str):
-        if self.values.get(key) == token.encode():
-            self.values.pop(key, None)
-            return 1
-        return 0
+    async def publish(self, channel: str, message: str):
+        handlers = self.subscribers.get(channel, [])
+        for handler in handlers:
+            handler(message.encode())
+        return len(handlers)
+
+    async def incr(self, key: str):
+        value = int(self.values.get(key, b"0")) + 1
+        self.values[key] = str(value).encode()
+        return value
+
+    async def script_load(self, source: str):
+        self.loaded_scripts.add(source)
+
+    async def evalsha(self, sha: str, key_count: int, *args):
+        if sha != RELEASE_LOCK_SCRIPT.sha or not self.loaded_scripts:
+            raise NoScriptError("NOSCRIPT No matching script.")
+        lock_key, followers_key = args[:key_count]
+        token, channel, message = args[key_count:]
+        if self.values.get(lock_key) != token.encode():
+            return -1
+        followers = int(self.values.pop(followers_key, b"0"))
+        self.values.pop(lock_key, None)
+        self.published.append((channel, message))
+        await self.publish(channel, message)
+        return followers
+
+
+class FakeBroadcast:
+    def __init__(self, redis: FakeRedis):
+        self.redis = redis
+        self.channels: set[str] = set()
+
+    def subscribe(self, channel: str, handler, *, on_reset=None):
+        self.redis.subscribers.setdefault(channel, []).append(handler)
+        self.channels.add(channel)
+
+    def is_subscribed(self, channel: str) -> bool:
+        return channel in self.channels
 
 
 class FakeRedisPipeline:
@@ -92,11 +147,23 @@ class FakeRedisPipeline:
         self.commands.append(("ttl", key, None))
         return self
 
+    def publish(self, channel: str, message: str):
+        self.commands.append(("publish", channel, message))
+        return self
+
+    def incr(self, key: str):
+        self.commands.append(("incr", key, None))
+        return self
+
     async def execute(self):
         results = []
         for command, key, value in self.commands:
             if command == "hset":
                 results.append(await self.redis.hset(key, value))
+            elif command == "publish":
+                results.append(await self.redis.publish(key, value))
+            elif command == "incr":
+                results.append(await self.redis.incr(key))
             elif command == "expire":
                 results.append(await self.redis.expire(key, value))
             elif command == "hgetall":
@@ -183,6 +250,33 @@ class CSVMemoryCacheMiddlewareTest(unittest.TestCase):
         self.assertNotEqual(first.text, second.text)
         self.assertEqual(calls["csv"], 2)
 
+    def test_credential_free_routes_share_one_entry_across_accounts(self):
+        app = FastAPI()
+        calls = {"csv": 0}
+        app.add_middleware(
+            CSVMemoryCacheMiddleware,
+            ttl_seconds=60,
+            shared_identity=lambda path, query_items: path == "/public.csv",
+        )
+
+        @app.get("/public.csv")
+        async def public_csv():
+            calls["csv"] += 1
+            return Response(content="value\n42\n", media_type="text/csv")
+
+        with TestClient(app) as client:
+            first = client.get(
+                "/public.csv", headers={"Authorization": "Bearer user-one"}
+            )
+            second = client.get(
+                "/public.csv",
+                headers={"Authorization": "Bearer user-two", "Cookie": "a=b"},
+            )
+
+        self.assertEqual(first.headers["x-csv-cache"], "MISS")
+        self.assertEqual(second.headers["x-csv-cache"], "HIT")
+        self.assertEqual(calls["csv"], 1)
+
     def test_cache_buster_does_not_bypass_server_cache(self):
         app, calls = _build_app()
 
@@ -264,6 +358,64 @@ class CSVMemoryCacheMiddlewareTest(unittest.TestCase):
         self.assertEqual(calls["text"], 2)
 
 
+class CSVQueryCanonicalizerTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        register_csv_query_canonicalizer(
+            "/canonical.csv",
+            query_canonicalizer(
+                values={
+                    "address": str.lower,
+                    "chain_id": canonical_int,
+                    "include_closed": canonical_bool,
+                },
+                defaults={"chain_id": "1", "include_closed": "false"},
+            ),
+        )
+
+    @staticmethod
+    def _digest(query_items, path="/canonical.csv"):
+        return csv_cache_digest(method="GET", path=path, query_items=query_items)
+
+    def test_semantically_identical_queries_share_one_digest(self):
+        canonical = self._digest([("address", "0xabc")])
+
+        self.assertEqual(
+            self._digest(
+                [
+                    ("address", "0xAbC"),
+                    ("chain_id", "01"),
+                    ("include_closed", "False"),
+                ]
+            ),
+            canonical,
+        )
+        self.assertEqual(
+            self._digest([("include_closed", "0"), ("address", "0xABC")]),
+            canonical,
+        )
+
+    def test_meaningful_differences_and_unregistered_routes_are_kept(self):
+        canonical = self._digest([("address", "0xabc")])
+
+        self.assertNotEqual(
+            self._digest([("address", "0xabc"), ("chain_id", "8453")]),
+            canonical,
+        )
+        self.assertNotEqual(
+            self._digest([("address", "0xabc"), ("include_closed", "yes")]),
+            canonical,
+        )
+        self.assertNotEqual(
+            self._digest([("address", "0xabc"), ("chain_id", "one")]),
+            canonical,
+        )
+        self.assertNotEqual(
+            self._digest([("address", "0xAbC")], path="/other.csv"),
+            self._digest([("address", "0xabc")], path="/other.csv"),
+        )
+
+
 class CSVMemoryCacheSingleFlightTest(unittest.IsolatedAsyncioTestCase):
     async def test_concurrent_cache_misses_share_one_csv_request(self):
         app = FastAPI()
@@ -354,13 +506,41 @@ class CSVRedisCacheTest(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(first_calls["count"], 1)
         self.assertEqual(second_calls["count"], 0)
         cache_keys = list(redis.hashes)
-        self.assertEqual(len(cache_keys), 2)
-        fresh_key = next(key for key in cache_keys if ":stale:" not in key)
-        stale_key = next(key for key in cache_keys if ":stale:" in key)
-        self.assertEqual(redis.expirations[fresh_key], 60)
-        self.assertEqual(redis.expirations[stale_key], 86400)
-        self.assertIn(b"updated_at", redis.hashes[fresh_key])
-        self.assertIn(b"updated_at", redis.hashes[stale_key])
+        self.assertEqual(len(cache_keys), 1)
+        entry = redis.hashes[cache_keys[0]]
+        self.assertTrue(cache_keys[0].startswith("datahunt:csv:v2:"))
+        self.assertEqual(redis.expirations[cache_keys[0]], 86400)
+        self.assertIn(b"updated_at", entry)
+        self.assertAlmostEqual(
+            float(entry[b"fresh_until"]),
+            time.time() + 60,
+            delta=5,
+        )
+
+    async def test_reads_cached_preview_with_one_command_per_resource(self):
+        redis = FakeRedis()
+        digest = csv_cache_digest(
+            method="GET",
+            path="/v/AbCdEf123456",
+            query_items=[("auth_token", "ignored")],
+        )
+        redis.hashes[redis_csv_cache_key(digest)] = {
+            b"body": b"123.45",
+            b"status_code": b"200",
+            b"headers": b"[]",
+            b"updated_at": b"1700000000",
+            b"fresh_until": str(time.time() + 30).encode(),
+        }
+
+        previews = await load_cached_csv_previews(
+            redis,
+            [("AbCdEf123456", "/v/AbCdEf123456", [])],
+            stale_ttl_seconds=86400,
+        )
+
+        self.assertEqual(redis.reads, 1)
+        self.assertEqual(previews["AbCdEf123456"].body, b"123.45")
+        self.assertEqual(previews["AbCdEf123456"].cache_status, "fresh")
 
     async def test_reads_cached_preview_without_calling_the_application(self):
         redis = FakeRedis()
@@ -369,7 +549,7 @@ class CSVRedisCacheTest(unittest.IsolatedAsyncioTestCase):
             path="/v/AbCdEf123456",
             query_items=[("auth_token", "ignored")],
         )
-        stale_key = redis_csv_cache_key(digest, stale=True)
+        stale_key = legacy_redis_csv_cache_key(digest, stale=True)
         redis.hashes[stale_key] = {
             b"body": b"123.45",
             b"status_code": b"200",
@@ -388,6 +568,28 @@ class CSVRedisCacheTest(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(previews["AbCdEf123456"].updated_at, 1700000000)
         self.assertEqual(previews["AbCdEf123456"].cache_status, "stale")
 
+    async def test_serves_legacy_v1_entry_during_migration(self):
+        redis = FakeRedis()
+        calls = {"count": 0}
+        app = self._redis_app(redis, calls)
+        digest = csv_cache_digest(method="GET", path="/shared.csv", query_items=[])
+        redis.hashes[legacy_redis_csv_cache_key(digest)] = {
+            b"body": b"value\nlegacy\n",
+            b"status_code": b"200",
+            b"headers": b"[]",
+            b"updated_at": b"1700000000",
+        }
+
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://test",
+        ) as client:
+            response = await client.get("/shared.csv")
+
+        self.assertEqual(response.text, "value\nlegacy\n")
+        self.assertEqual(response.headers["x-csv-cache"], "HIT")
+        self.assertEqual(calls["count"], 0)
+
     async def test_distributed_single_flight_coalesces_instances(self):
         redis = FakeRedis()
         calls = {"count": 0}
@@ -498,8 +700,8 @@ class CSVRedisCacheTest(unittest.IsolatedAsyncioTestCase):
             base_url="http://test",
         ) as client:
             first = await client.get("/slow.csv")
-            fresh_key = next(key for key in redis.hashes if ":stale:" not in key)
-            redis.hashes.pop(fresh_key)
+            cache_key = next(iter(redis.hashes))
+            redis.hashes[cache_key][b"fresh_until"] = b"0"
             value = "new"
 
             started_at = time.monotonic()
@@ -513,7 +715,7 @@ class CSVRedisCacheTest(unittest.IsolatedAsyncioTestCase):
             release_refresh.set()
             for _ in range(20):
                 await asyncio.sleep(0.01)
-                if fresh_key in redis.hashes:
+                if redis.hashes[cache_key][b"fresh_until"] != b"0":
                     break
             refreshed = await client.get("/slow.csv")
 
@@ -549,8 +751,8 @@ class CSVRedisCacheTest(unittest.IsolatedAsyncioTestCase):
             base_url="http://test",
         ) as client:
             await client.get("/failure.csv")
-            fresh_key = next(key for key in redis.hashes if ":stale:" not in key)
-            redis.hashes.pop(fresh_key)
+            cache_key = next(iter(redis.hashes))
+            redis.hashes[cache_key][b"fresh_until"] = b"0"
             failing = True
             response = await client.get("/failure.csv")
 
@@ -559,5 +761,461 @@ class CSVRedisCacheTest(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(response.headers["x-csv-cache"], "STALE")
 
 
+class CSVCachePolicyTest(unittest.IsolatedAsyncioTestCase):
+    DEFAULT = CSVCachePolicy(
+        ttl_seconds=60,
+        stale_ttl_seconds=86400,
+        refresh_timeout_seconds=8,
+    )
+
+    def test_longest_prefix_or_source_alias_wins(self):
+        table = CSVCachePolicyTable(
+            self.DEFAULT,
+            {
+                "/cmc/": {"ttl_seconds": 3600},
+                "cmc-price": {"ttl_seconds": 1800, "serve_stale": False},
+            },
+            aliases={"cmc-price": "/cmc/price.csv"},
+        )
+
+        self.assertEqual(table.for_path("/cmc/price.csv").ttl_seconds, 1800)
+        self.assertFalse(table.for_path("/cmc/price.csv").serve_stale)
+        self.assertEqual(table.for_path("/cmc/other.csv").ttl_seconds, 3600)
+        self.assertEqual(table.for_path("/aave/positions.csv"), self.DEFAULT)
+
+    def test_json_overrides_extend_defaults_and_invalid_json_is_ignored(self):
+        with self.assertLogs("csv_cache", level="ERROR"):
+            table = CSVCachePolicyTable.from_json(
+                '{"/pendle/": {"ttl_seconds": 1200}, "/bad/": {"ttl": 5}}',
+                self.DEFAULT,
+            )
+            fallback = CSVCachePolicyTable.from_json("{not json", self.DEFAULT)
+
+        self.assertEqual(table.for_path("/pendle/positions.csv").ttl_seconds, 1200)
+        self.assertEqual(table.for_path("/cmc/price.csv").ttl_seconds, 3600)
+        self.assertEqual(table.for_path("/bad/data.csv"), self.DEFAULT)
+        self.assertEqual(fallback.for_path("/pendle/positions.csv").ttl_seconds, 600)
+
+    def test_policy_is_clamped_to_safe_bounds(self):
+        table = CSVCachePolicyTable(
+            self.DEFAULT,
+            {"/fast/": {"ttl_seconds": 1, "stale_ttl_seconds": 10}},
+            aliases={},
+        )
+
+        policy = table.for_path("/fast/data.csv")
+
+        self.assertEqual(policy.ttl_seconds, 60)
+        self.assertEqual(policy.stale_ttl_seconds, 3600)
+
+    async def test_route_policy_sets_fresh_and_stale_windows(self):
+        redis = FakeRedis()
+        app = FastAPI()
+        app.add_middleware(
+            CSVCacheMiddleware,
+            policies=CSVCachePolicyTable(
+                self.DEFAULT,
+                {"/slow-source/": {"ttl_seconds": 3600, "stale_ttl_seconds": 7200}},
+                aliases={},
+            ),
+            redis_client=redis,
+        )
+
+        @app.get("/slow-source/data.csv")
+        async def slow_source_csv():
+            return Response(content="value\n1\n", media_type="text/csv")
+
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://test",
+        ) as client:
+            started_at = time.time()
+            await client.get("/slow-source/data.csv")
+
+        cache_key = next(iter(redis.hashes))
+        fresh_until = float(redis.hashes[cache_key][b"fresh_until"])
+        self.assertGreaterEqual(fresh_until, started_at + 3600)
+        self.assertEqual(redis.expirations[cache_key], 7200)
+
+    async def test_route_without_serve_stale_waits_for_refresh(self):
+        redis = FakeRedis()
+        app = FastAPI()
+        value = "old"
+        app.add_middleware(
+            CSVCacheMiddleware,
+            policies=CSVCachePolicyTable(
+                replace(self.DEFAULT, refresh_timeout_seconds=0.01),
+                {"/exact/": {"serve_stale": False}},
+                aliases={},
+            ),
+            redis_client=redis,
+        )
+
+        @app.get("/exact/data.csv")
+        async def exact_csv():
+            await asyncio.sleep(0.05)
+            return Response(content=f"value\n{value}\n", media_type="text/csv")
+
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://test",
+        ) as client:
+            await client.get("/exact/data.csv")
+            cache_key = next(iter(redis.hashes))
+            redis.hashes[cache_key][b"fresh_until"] = b"0"
+            value = "new"
+            response = await client.get("/exact/data.csv")
+
+        self.assertEqual(response.text, "value\nnew\n")
+        self.assertEqual(response.headers["x-csv-cache"], "MISS")
+
+
+class CSVLocalCacheTest(unittest.IsolatedAsyncioTestCase):
+    @staticmethod
+    def _replica(redis: FakeRedis, state: dict[str, object]) -> FastAPI:
+        app = FastAPI()
+        app.add_middleware(
+            CSVCacheMiddleware,
+            ttl_seconds=60,
+            redis_client=redis,
+            broadcast=FakeBroadcast(redis),
+        )
+
+        @app.get("/hot.csv")
+        async def hot_csv():
+            state["calls"] += 1
+            return Response(
+                content=f"value\n{state['value']}\n",
+                media_type="text/csv",
+            )
+
+        return app
+
+    async def test_hot_key_is_served_without_redis_round_trip(self):
+        redis = FakeRedis()
+        state = {"calls": 0, "value": "42"}
+        app = self._replica(redis, state)
+
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://test",
+        ) as client:
+            first = await client.get("/hot.csv")
+            reads = redis.reads
+            second = await client.get("/hot.csv")
+            third = await client.get("/hot.csv")
+
+        self.assertEqual(first.headers["x-csv-cache"], "MISS")
+        self.assertEqual(second.headers["x-csv-cache"], "HIT")
+        self.assertEqual(second.headers["x-csv-cache-backend"], "local")
+        self.assertEqual(third.text, "value\n42\n")
+        self.assertEqual(redis.reads, reads)
+        self.assertEqual(state["calls"], 1)
+
+    async def test_newer_body_from_another_replica_invalidates_local_entry(self):
+        redis = FakeRedis()
+        state = {"calls": 0, "value": "old"}
+        first_app = self._replica(redis, state)
+        second_app = self._replica(redis, state)
+
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=first_app),
+            base_url="http://first",
+        ) as first_client, httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=second_app),
+            base_url="http://second",
+        ) as second_client:
+            await first_client.get("/hot.csv")
+            await second_client.get("/hot.csv")
+            local = await second_client.get("/hot.csv")
+            state["value"] = "new"
+            forced = await first_client.get(
+                "/hot.csv",
+                headers={
+                    DATA_ACCESS_INTERNAL_HEADER: DATA_ACCESS_INTERNAL_TOKEN,
+                    CACHE_FORCE_REFRESH_HEADER: "1",
+                },
+            )
+            refreshed = await second_client.get("/hot.csv")
+
+        self.assertEqual(local.headers["x-csv-cache-backend"], "local")
+        self.assertEqual(forced.text, "value\nnew\n")
+        self.assertEqual(refreshed.text, "value\nnew\n")
+        self.assertEqual(refreshed.headers["x-csv-cache-backend"], "redis")
+        self.assertIn(CSV_INVALIDATION_CHANNEL, redis.subscribers)
+
+
+class CSVEarlyRefreshTest(unittest.IsolatedAsyncioTestCase):
+    async def test_hit_near_expiry_refreshes_in_background(self):
+        redis = FakeRedis()
+        state = {"calls": 0}
+        app = FastAPI()
+        app.add_middleware(
+            CSVCacheMiddleware,
+            ttl_seconds=60,
+            early_refresh_beta=10_000,
+            redis_client=redis,
+        )
+
+        @app.get("/slow.csv")
+        async def slow_csv():
+            state["calls"] += 1
+            await asyncio.sleep(0.01)
+            return Response(
+                content=f"value\n{state['calls']}\n",
+                media_type="text/csv",
+            )
+
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://test",
+        ) as client:
+            first = await client.get("/slow.csv")
+            key = next(iter(redis.hashes))
+            self.assertGreater(float(redis.hashes[key][b"recompute_seconds"]), 0)
+            with patch("csv_cache.random.random", return_value=0.5):
+                early = await client.get("/slow.csv")
+            for _ in range(50):
+                if state["calls"] == 2:
+                    break
+                await asyncio.sleep(0.01)
+            await asyncio.sleep(0.01)
+            refreshed = await client.get("/slow.csv")
+
+        self.assertEqual(first.headers["x-csv-cache"], "MISS")
+        self.assertEqual(early.headers["x-csv-cache"], "HIT")
+        self.assertEqual(early.text, "value\n1\n")
+        self.assertEqual(state["calls"], 2)
+        self.assertEqual(refreshed.text, "value\n2\n")
+
+    async def test_early_refresh_runs_the_response_background_tasks(self):
+        redis = FakeRedis()
+        calls = []
+        ran = []
+        middleware = CSVCacheMiddleware(
+            None,
+            ttl_seconds=60,
+            early_refresh_beta=10_000,
+            redis_client=redis,
+        )
+        request = Request(
+            {
+                "type": "http",
+                "method": "GET",
+                "path": "/tracked.csv",
+                "query_string": b"",
+                "headers": [],
+            }
+        )
+
+        async def call_next(_):
+            calls.append(len(calls) + 1)
+            await asyncio.sleep(0.01)
+            return Response(
+                content="value\n1\n",
+                media_type="text/csv",
+                background=BackgroundTask(ran.append, len(calls)),
+            )
+
+        await middleware.dispatch(request, call_next)
+        with patch("csv_cache.random.random", return_value=0.5):
+            early = await middleware.dispatch(request, call_next)
+        await asyncio.gather(*middleware._background_refreshes)
+
+        # Nobody sends the refreshed response, so the refresh runs its tasks.
+        self.assertEqual(early.headers["x-csv-cache"], "HIT")
+        self.assertEqual(ran, [2])
+
+    async def test_hit_far_from_expiry_does_not_refresh(self):
+        redis = FakeRedis()
+        state = {"calls": 0}
+        app = FastAPI()
+        app.add_middleware(CSVCacheMiddleware, ttl_seconds=60, redis_client=redis)
+
+        @app.get("/fast.csv")
+        async def fast_csv():
+            state["calls"] += 1
+            return Response(content="value\n1\n", media_type="text/csv")
+
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://test",
+        ) as client:
+            await client.get("/fast.csv")
+            with patch("csv_cache.random.random", return_value=0.5):
+                second = await client.get("/fast.csv")
+            await asyncio.sleep(0.02)
+
+        self.assertEqual(second.headers["x-csv-cache"], "HIT")
+        self.assertEqual(state["calls"], 1)
+
+
+class CSVCompressionTest(unittest.IsolatedAsyncioTestCase):
+    async def test_compressed_entry_is_served_without_decompression(self):
+        redis = FakeRedis()
+        body = "id,value\n" + "".join(f"row-{index},42\n" for index in range(200))
+        app = FastAPI()
+        app.add_middleware(CSVCacheMiddleware, ttl_seconds=60, redis_client=redis)
+
+        @app.get("/large.csv")
+        async def large_csv():
+            return Response(content=body, media_type="text/csv")
+
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://test",
+        ) as client:
+            first = await client.get("/large.csv")
+            compressed = await client.get(
+                "/large.csv", headers={"Accept-Encoding": "gzip"}
+            )
+            plain = await client.get(
+                "/large.csv", headers={"Accept-Encoding": "identity"}
+            )
+
+        entry = next(iter(redis.hashes.values()))
+        self.assertEqual(entry[b"encoding"], b"gzip")
+        self.assertLess(len(entry[b"body"]), len(body) // 4)
+        self.assertEqual(first.text, body)
+        self.assertEqual(compressed.headers["content-encoding"], "gzip")
+        self.assertEqual(compressed.headers["vary"], "Accept-Encoding")
+        self.assertEqual(compressed.text, body)
+        self.assertNotIn("content-encoding", plain.headers)
+        self.assertEqual(plain.text, body)
+        self.assertEqual(plain.headers["content-length"], str(len(body)))
+
+    async def test_small_body_is_stored_uncompressed(self):
+        redis = FakeRedis()
+        calls = {"count": 0}
+        app = CSVRedisCacheTest._redis_app(redis, calls)
+
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://test",
+        ) as client:
+            await client.get("/shared.csv")
+            hit = await client.get("/shared.csv")
+
+        entry = next(iter(redis.hashes.values()))
+        self.assertEqual(entry[b"encoding"], b"identity")
+        self.assertEqual(entry[b"body"], b"value\n42\n")
+        self.assertNotIn("content-encoding", hit.headers)
+
+
+class CSVConditionalRequestTest(unittest.IsolatedAsyncioTestCase):
+    async def test_etag_is_emitted_and_matching_validator_gets_304(self):
+        redis = FakeRedis()
+        calls = {"count": 0}
+        app = CSVRedisCacheTest._redis_app(redis, calls)
+
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://test",
+        ) as client:
+            first = await client.get("/shared.csv")
+            hit = await client.get("/shared.csv")
+            not_modified = await client.get(
+                "/shared.csv",
+                headers={"If-None-Match": first.headers["etag"]},
+            )
+            changed = await client.get(
+                "/shared.csv",
+                headers={"If-None-Match": '"outdated"'},
+            )
+            cache_key = next(iter(redis.hashes))
+            redis.hashes[cache_key][b"fresh_until"] = b"0"
+            stale = await client.get(
+                "/shared.csv",
+                headers={"If-None-Match": f'W/{first.headers["etag"]}'},
+            )
+
+        self.assertEqual(first.headers["x-csv-cache"], "MISS")
+        self.assertTrue(first.headers["etag"].startswith('"'))
+        self.assertEqual(hit.headers["etag"], first.headers["etag"])
+        self.assertEqual(
+            redis.hashes[cache_key][b"etag"].decode(),
+            first.headers["etag"],
+        )
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.content, b"")
+        self.assertEqual(not_modified.headers["etag"], first.headers["etag"])
+        self.assertEqual(not_modified.headers["x-csv-cache"], "HIT")
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(changed.text, "value\n42\n")
+        self.assertEqual(stale.status_code, 304)
+        self.assertEqual(stale.headers["etag"], first.headers["etag"])
+
+    def test_memory_backend_answers_if_none_match(self):
+        app, calls = _build_app()
+
+        with TestClient(app) as client:
+            first = client.get("/report.csv?value=one")
+            repeated = client.get(
+                "/report.csv?value=one",
+                headers={"If-None-Match": first.headers["etag"]},
+            )
+
+        self.assertEqual(repeated.status_code, 304)
+        self.assertEqual(repeated.headers["x-csv-cache-backend"], "memory")
+        self.assertEqual(calls["csv"], 1)
+
+
+class CSVFlightNotificationTest(unittest.IsolatedAsyncioTestCase):
+    async def test_followers_wake_on_published_completion(self):
+        redis = FakeRedis()
+        calls = 0
+
+        def build_app() -> FastAPI:
+            app = FastAPI()
+            app.add_middleware(
+                CSVCacheMiddleware,
+                ttl_seconds=60,
+                redis_client=redis,
+                broadcast=FakeBroadcast(redis),
+            )
+
+            @app.get("/slow.csv")
+            async def slow_csv():
+                nonlocal calls
+                calls += 1
+                await asyncio.sleep(0.05)
+                return Response(content="value\n42\n", media_type="text/csv")
+
+            return app
+
+        flights = csv_cache_stats.flights
+        followers = csv_cache_stats.coalesced_followers
+        pushed = csv_cache_stats.pushed_wakeups
+        clients = [
+            httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=build_app()),
+                base_url=f"http://replica-{index}",
+            )
+            for index in range(3)
+        ]
+        try:
+            started_at = time.monotonic()
+            responses = await asyncio.gather(
+                *(client.get("/slow.csv") for client in clients)
+            )
+            elapsed = time.monotonic() - started_at
+        finally:
+            for client in clients:
+                await client.aclose()
+
+        self.assertEqual(calls, 1)
+        self.assertLess(elapsed, 0.2)
+        self.assertEqual(
+            sorted(response.headers["x-csv-cache"] for response in responses),
+            ["HIT", "HIT", "MISS"],
+        )
+        self.assertEqual(len(redis.published), 1)
+        self.assertEqual(redis.published[0][0], CSV_FLIGHT_CHANNEL)
+        self.assertTrue(redis.published[0][1].endswith(" filled"))
+        self.assertEqual(csv_cache_stats.flights, flights + 1)
+        self.assertEqual(csv_cache_stats.coalesced_followers, followers + 2)
+        self.assertEqual(csv_cache_stats.pushed_wakeups, pushed + 2)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,95 @@
+import asyncio
+import contextvars
+import threading
+import time
+import unittest
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from database import DatabaseExecutor, open_session
+
+
+request_label = contextvars.ContextVar("request_label", default="")
+
+
+class DatabaseExecutorTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.executor = DatabaseExecutor(max_workers=1)
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    async def test_slow_queries_do_not_block_the_event_loop(self):
+        loop_thread = threading.get_ident()
+        ticks = 0
+
+        def slow_query():
+            time.sleep(0.2)
+            return threading.get_ident(), request_label.get()
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        request_label.set("value-read")
+        ticker = asyncio.create_task(tick())
+        try:
+            query_thread, label = await self.executor.run(slow_query)
+        finally:
+            ticker.cancel()
+
+        self.assertNotEqual(query_thread, loop_thread)
+        self.assertEqual(label, "value-read")
+        self.assertGreater(ticks, 5)
+
+    async def test_stats_report_queued_running_and_failed_calls(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def blocked():
+            started.set()
+            release.wait(5)
+
+        def failing():
+            raise RuntimeError("database unavailable")
+
+        first = asyncio.ensure_future(self.executor.run(blocked))
+        second = asyncio.ensure_future(self.executor.run(failing))
+        await asyncio.to_thread(started.wait, 5)
+        busy = self.executor.stats()
+        release.set()
+        await first
+        with self.assertRaises(RuntimeError):
+            await second
+        idle = self.executor.stats()
+
+        self.assertEqual((busy["running"], busy["waiting"]), (1, 1))
+        self.assertEqual((idle["running"], idle["waiting"]), (0, 0))
+        self.assertEqual((idle["completed"], idle["failed"]), (2, 1))
+        self.assertGreater(idle["max_wait_ms"], 0)
+
+    async def test_session_with_an_open_transaction_is_closed_on_the_pool(self):
+        engine = create_engine(
+            "sqlite://",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        Session = sessionmaker(bind=engine)
+
+        async with open_session(Session, self.executor) as unused:
+            pass
+        async with open_session(Session, self.executor) as db:
+            await self.executor.run(db.execute, text("SELECT 1"))
+
+        self.assertFalse(unused.in_transaction())
+        self.assertFalse(db.in_transaction())
+        self.assertEqual(self.executor.stats()["completed"], 2)
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+import sys
+import threading
+import time
+import unittest
+
+from memory_cache import MemoryBudget
+
+
+class ByteLRUCacheTest(unittest.TestCase):
+    def test_namespace_evicts_least_recently_used_by_bytes(self):
+        budget = MemoryBudget(1000)
+        cache = budget.namespace("csv", max_bytes=100, sizeof=len)
+
+        cache["a"] = "x" * 40
+        cache["b"] = "y" * 40
+        self.assertEqual(cache["a"], "x" * 40)
+        cache["c"] = "z" * 40
+
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertIn("c", cache)
+        self.assertEqual(cache.bytes, 80)
+        self.assertEqual(cache.stats()["evictions"], 1)
+        self.assertEqual(cache.stats()["evicted_bytes"], 40)
+
+    def test_entry_larger_than_quota_is_not_stored(self):
+        budget = MemoryBudget(1000)
+        cache = budget.namespace("csv", max_bytes=100, sizeof=len)
+        cache["small"] = "x" * 10
+
+        cache["large"] = "y" * 101
+
+        self.assertNotIn("large", cache)
+        self.assertIn("small", cache)
+        self.assertEqual(cache.stats()["rejected"], 1)
+
+    def test_entry_cap_still_applies_within_byte_quota(self):
+        budget = MemoryBudget(1000)
+        cache = budget.namespace("csv", max_bytes=1000, max_entries=2, sizeof=len)
+
+        for key in ("a", "b", "c"):
+            cache[key] = key
+
+        self.assertEqual(list(cache), ["b", "c"])
+
+    def test_budget_evicts_oldest_entry_across_namespaces(self):
+        budget = MemoryBudget(100)
+        first = budget.namespace("first", max_bytes=100, sizeof=len)
+        second = budget.namespace("second", max_bytes=100, sizeof=len)
+
+        first["a"] = "x" * 40
+        second["b"] = "y" * 40
+        first.get("a")
+        second["c"] = "z" * 40
+
+        self.assertIn("a", first)
+        self.assertNotIn("b", second)
+        self.assertEqual(budget.bytes, 80)
+        self.assertEqual(budget.stats()["namespaces"]["second"]["evictions"], 1)
+
+    def test_ttl_expires_entries(self):
+        budget = MemoryBudget(1000)
+        cache = budget.namespace("fluid", max_bytes=1000, ttl_seconds=0.01, sizeof=len)
+        cache["a"] = "value"
+
+        time.sleep(0.02)
+
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.bytes, 0)
+        self.assertEqual(cache.stats()["expirations"], 1)
+
+    def test_pop_and_clear_release_bytes(self):
+        budget = MemoryBudget(1000)
+        cache = budget.namespace("csv", max_bytes=1000, sizeof=len)
+        cache["a"] = "x" * 10
+        cache["b"] = "y" * 10
+
+        self.assertEqual(cache.pop("a"), "x" * 10)
+        cache.clear()
+
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(budget.bytes, 0)
+
+    def test_threads_share_the_budget_consistently(self):
+        budget = MemoryBudget(2000)
+        caches = [
+            budget.namespace(name, max_bytes=1500, sizeof=len)
+            for name in ("tokens", "csv", "fluid")
+        ]
+        errors = []
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        self.addCleanup(sys.setswitchinterval, interval)
+
+        def work(cache, offset):
+            try:
+                for i in range(2000):
+                    key = (offset + i) % 50
+                    cache[key] = "x" * (10 + key)
+                    cache.get((key + 7) % 50)
+                    if i % 11 == 0:
+                        cache.pop((key + 3) % 50)
+            except Exception as exc:
+                errors.append(exc)
+
+        threads = [
+            threading.Thread(target=work, args=(cache, offset))
+            for offset, cache in enumerate(caches * 2)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(budget.bytes, sum(cache.bytes for cache in caches))
+        self.assertEqual(len(budget._order), sum(len(cache) for cache in caches))
+        self.assertLessEqual(budget.bytes, budget.max_bytes)
+
+
+if __name__ == "__main__":
+    unittest.main()
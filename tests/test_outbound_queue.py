@@ -1,9 +1,10 @@
 import json
 import unittest
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, nullcontext
 from unittest.mock import AsyncMock, patch
 
 import httpx
+from redis.exceptions import NoScriptError
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
@@ -12,15 +13,47 @@ import outbound_queue as queue_module
 from database import Base
 from models import ExternalRequestDaily
 from outbound_queue import (
+    ADJUST_RATE_SCRIPT,
+    LANE_REFRESH,
+    LANE_VALIDATION,
+    RATE_SLOT_SCRIPT,
+    RESERVE_UNTIL_SCRIPT,
+    RETURN_SLOTS_SCRIPT,
+    OutboundClientRegistry,
     OutboundRequestQueue,
     ProviderPolicy,
     QueuedAsyncHTTPTransport,
+    _load_policies,
+    _reported_usage,
+    _LaneSemaphore,
+    _ReportedUsage,
     _request_cost,
+    outbound_lane,
     outbound_queue,
 )
 
 
 class OutboundRequestQueueTest(unittest.IsolatedAsyncioTestCase):
+    def test_limit_overrides_raise_the_rate_without_an_explicit_ceiling(self):
+        overrides = json.dumps(
+            {
+                "coinbase": {"requests": 20},
+                "ethereum_rpc": {"requests": 6, "max_requests": 5},
+            }
+        )
+        with patch("outbound_queue.OUTBOUND_API_LIMITS_JSON", overrides):
+            policies = {policy.name: policy for policy in _load_policies()}
+
+        self.assertEqual(
+            (policies["coinbase"].requests, policies["coinbase"].ceiling),
+            (20, 20),
+        )
+        self.assertEqual(
+            (policies["ethereum_rpc"].requests, policies["ethereum_rpc"].ceiling),
+            (5, 5),
+        )
+        self.assertEqual(policies["base_rpc"].ceiling, 12)
+
     def test_each_known_host_has_its_own_provider_policy(self):
         expected = {
             "pro-api.coinmarketcap.com": "coinmarketcap",
@@ -157,6 +190,97 @@ class OutboundRequestQueueTest(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(final_provider["in_flight"], 0)
         self.assertEqual(final_provider["waiting"], 0)
 
+    async def test_interactive_requests_preempt_queued_background_requests(self):
+        queue = OutboundRequestQueue()
+        policy = queue.policy_for_host("mainnet.zklighter.elliot.ai")
+        release = queue_module.asyncio.Event()
+        order = []
+
+        async def worker(name, lane=None):
+            with outbound_lane(lane) if lane else nullcontext():
+                async with queue.slot(policy, 1):
+                    order.append(name)
+                    await release.wait()
+
+        with (
+            patch("outbound_queue.get_redis_client", return_value=None),
+            patch.object(queue, "_reserve_redis", AsyncMock(return_value=0)),
+        ):
+            busy = [
+                queue_module.asyncio.create_task(worker(f"busy-{index}"))
+                for index in range(policy.concurrency)
+            ]
+            queued = [
+                queue_module.asyncio.create_task(worker("refresh", LANE_REFRESH)),
+                queue_module.asyncio.create_task(worker("capsule", LANE_VALIDATION)),
+                queue_module.asyncio.create_task(worker("user")),
+            ]
+            for _ in range(20):
+                await queue_module.asyncio.sleep(0)
+
+            status = await queue.status(include_activity=True)
+            provider = next(
+                item for item in status["providers"] if item["provider"] == policy.name
+            )
+            self.assertEqual(
+                provider["lanes"],
+                {
+                    "interactive": {"waiting": 1, "in_flight": policy.concurrency},
+                    "validation": {"waiting": 1, "in_flight": 0},
+                    "refresh": {"waiting": 1, "in_flight": 0},
+                },
+            )
+
+            release.set()
+            await queue_module.asyncio.gather(*busy, *queued)
+
+        self.assertEqual(order[policy.concurrency :], ["user", "capsule", "refresh"])
+
+    async def test_cancelled_waiter_does_not_leak_a_slot(self):
+        queue = OutboundRequestQueue()
+        policy = queue.policy_for_host("mainnet.zklighter.elliot.ai")
+        release = queue_module.asyncio.Event()
+
+        async def worker():
+            async with queue.slot(policy, 1):
+                await release.wait()
+
+        with (
+            patch("outbound_queue.get_redis_client", return_value=None),
+            patch.object(queue, "_reserve_redis", AsyncMock(return_value=0)),
+        ):
+            busy = [
+                queue_module.asyncio.create_task(worker())
+                for _ in range(policy.concurrency)
+            ]
+            cancelled = queue_module.asyncio.create_task(worker())
+            for _ in range(20):
+                await queue_module.asyncio.sleep(0)
+            cancelled.cancel()
+            release.set()
+            await queue_module.asyncio.gather(*busy, cancelled, return_exceptions=True)
+            await queue_module.asyncio.wait_for(
+                queue_module.asyncio.gather(
+                    *(worker() for _ in range(policy.concurrency))
+                ),
+                timeout=1,
+            )
+
+        self.assertEqual(queue._local_waiting.get(policy.name), 0)
+
+    async def test_waiter_cancelled_before_a_release_keeps_the_permit(self):
+        semaphore = _LaneSemaphore(1)
+        await semaphore.acquire(LANE_REFRESH)
+        waiter = queue_module.asyncio.create_task(semaphore.acquire(LANE_REFRESH))
+        await queue_module.asyncio.sleep(0)
+
+        waiter.cancel()
+        semaphore.release()
+
+        with self.assertRaises(queue_module.asyncio.CancelledError):
+            await waiter
+        await queue_module.asyncio.wait_for(semaphore.acquire(LANE_REFRESH), 1)
+
     async def test_external_requests_are_flushed_to_daily_database_rows(self):
         engine = create_engine(
             "sqlite://",
@@ -185,6 +309,324 @@ class OutboundRequestQueueTest(unittest.IsolatedAsyncioTestCase):
         engine.dispose()
 
 
+class FakeSlotRedis:
+    """Runs the slot scripts' arithmetic in Python against a fixed clock."""
+
+    def __init__(self):
+        self.now_ms = 1_000_000
+        self.values: dict[str, bytes] = {}
+        self.hashes: dict[str, dict[str, float]] = {}
+        self.loaded: set[str] = set()
+        self.reservations: list[int] = []
+        self.returns: list[int] = []
+
+    async def script_load(self, source: str):
+        for script in (
+            RATE_SLOT_SCRIPT,
+            RETURN_SLOTS_SCRIPT,
+            ADJUST_RATE_SCRIPT,
+            RESERVE_UNTIL_SCRIPT,
+        ):
+            if script.source == source:
+                self.loaded.add(script.sha)
+
+    async def evalsha(self, sha: str, key_count: int, *args):
+        await queue_module.asyncio.sleep(0)
+        if sha not in self.loaded:
+            raise NoScriptError("NOSCRIPT No matching script.")
+        keys, argv = args[:key_count], args[key_count:]
+        if sha == RATE_SLOT_SCRIPT.sha:
+            interval_ms, cost, _, max_backlog_ms, min_interval_ms = argv
+            adaptive = self.hashes.get(keys[2], {}).get("interval_ms")
+            if adaptive is not None:
+                interval_ms = max(min_interval_ms, adaptive)
+            current = float(self.values.get(keys[0], self.now_ms))
+            scheduled = max(self.now_ms, current)
+            if max_backlog_ms >= 0 and scheduled - self.now_ms > max_backlog_ms:
+                return [-2, int(scheduled - self.now_ms)]
+            self.reservations.append(cost)
+            end = repr(scheduled + interval_ms * cost).encode()
+            self.values[keys[0]] = end
+            return [int(scheduled - self.now_ms), end, repr(interval_ms).encode()]
+        if sha == ADJUST_RATE_SCRIPT.sha:
+            default, floor, ceiling, period_ms, mode, amount, hold_ms, _ = argv
+            state = self.hashes.setdefault(keys[0], {})
+            rate = min(ceiling, state.get("rate", default))
+            cut_at = state.get("cut_at", 0)
+            if mode == "cut" and self.now_ms - cut_at >= hold_ms:
+                rate = max(floor, rate * amount)
+                state["cut_at"] = self.now_ms
+            elif mode != "cut" and self.now_ms - max(
+                cut_at,
+                state.get("raised_at", 0),
+            ) >= hold_ms:
+                rate = min(ceiling, rate + amount)
+                state["raised_at"] = self.now_ms
+            state.update(rate=rate, interval_ms=period_ms / rate)
+            return repr(rate).encode()
+        if sha == RESERVE_UNTIL_SCRIPT.sha:
+            target = self.now_ms + argv[0]
+            if float(self.values.get(keys[0], 0)) >= target:
+                return 0
+            self.values[keys[0]] = repr(float(target)).encode()
+            return 1
+        end, returned_ms = argv
+        if self.values.get(keys[0]) != end:
+            return 0
+        self.returns.append(returned_ms)
+        self.values[keys[0]] = repr(float(end) - returned_ms).encode()
+        return 1
+
+
+class SlotLeaseTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.redis = FakeSlotRedis()
+        self.queue = OutboundRequestQueue(lease_ms=250)
+        self.policy = self.queue.policy_for_host("api.binance.com")
+        self.key = f"datahunt:queue:slot:{self.policy.name}"
+
+    async def test_concurrent_requests_share_one_reserved_block(self):
+        with patch("outbound_queue.get_redis_client", return_value=self.redis):
+            waits = await queue_module.asyncio.gather(
+                *(self.queue._reserve_redis(self.policy, 1) for _ in range(6))
+            )
+
+        # The first request reserves for itself; the five queued behind it share
+        # one block and take consecutive slots without calling Redis.
+        self.assertEqual(self.redis.reservations, [1, 5])
+        self.assertEqual(waits, sorted(waits))
+        self.assertAlmostEqual(waits[-1] - waits[1], 4 * 0.025, delta=0.02)
+        self.assertEqual(
+            float(self.redis.values[self.key]),
+            self.redis.now_ms + 6 * self.policy.interval_ms,
+        )
+        self.assertEqual(self.queue._slot_leases, {})
+
+    async def test_unused_slots_are_returned_once_nothing_is_waiting(self):
+        with patch("outbound_queue.get_redis_client", return_value=self.redis):
+            self.queue._slot_demand[self.policy.name, "interactive"] = 2
+            await self.queue._reserve_redis(self.policy, 1)
+            self.queue._slot_demand[self.policy.name, "interactive"] = 0
+            await self.queue._reserve_redis(self.policy, 1)
+            await queue_module.asyncio.gather(*self.queue._slot_returns)
+
+        self.assertEqual(self.redis.reservations, [3])
+        self.assertEqual(self.redis.returns, [self.policy.interval_ms])
+        self.assertEqual(
+            float(self.redis.values[self.key]),
+            self.redis.now_ms + 2 * self.policy.interval_ms,
+        )
+
+    async def test_slots_are_not_returned_after_another_reservation(self):
+        with patch("outbound_queue.get_redis_client", return_value=self.redis):
+            self.queue._slot_demand[self.policy.name, "interactive"] = 2
+            await self.queue._reserve_redis(self.policy, 1)
+            other = OutboundRequestQueue(lease_ms=250)
+            await other._reserve_redis(self.policy, 1)
+            self.queue._slot_demand[self.policy.name, "interactive"] = 0
+            await self.queue._reserve_redis(self.policy, 1)
+            await queue_module.asyncio.gather(*self.queue._slot_returns)
+
+        self.assertEqual(self.redis.reservations, [3, 1])
+        self.assertEqual(self.redis.returns, [])
+        self.assertEqual(
+            float(self.redis.values[self.key]),
+            self.redis.now_ms + 4 * self.policy.interval_ms,
+        )
+
+    async def test_slow_providers_reserve_one_request_at_a_time(self):
+        policy = self.queue.policy_for_host("api.v3.aave.com")
+        with patch("outbound_queue.get_redis_client", return_value=self.redis):
+            await queue_module.asyncio.gather(
+                *(self.queue._reserve_redis(policy, 1) for _ in range(3))
+            )
+
+        self.assertEqual(self.redis.reservations, [1, 1, 1])
+
+
+    async def test_background_lane_waits_for_a_booked_timeline_to_drain(self):
+        self.redis.values[self.key] = repr(self.redis.now_ms + 3000.0).encode()
+        drains = []
+
+        async def drain(policy, seconds, deadline):
+            drains.append(seconds)
+            self.redis.now_ms += 2500
+
+        with (
+            patch("outbound_queue.get_redis_client", return_value=self.redis),
+            patch.object(self.queue, "_wait_for_backlog", drain),
+        ):
+            wait = await self.queue._reserve_redis(self.policy, 1, LANE_REFRESH)
+
+        # Nothing is reserved until at most one second of the timeline is booked.
+        self.assertEqual(drains, [2.0])
+        self.assertEqual(self.redis.reservations, [1])
+        self.assertAlmostEqual(wait, 0.5, delta=0.05)
+
+
+class AdaptiveRateTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.queue = OutboundRequestQueue(adaptive_window_seconds=10)
+        self.policy = self.queue.policy_for_host("ethereum-rpc.publicnode.com")
+        self.now = [100.0]
+
+    async def _window(self, latency: float = 0.1) -> None:
+        for _ in range(5):
+            await self.queue.observe(self.policy, 200, latency)
+        self.now[0] += 10
+        await self.queue.observe(self.policy, 200, latency)
+
+    def _rate(self) -> float:
+        return round(self.queue._effective_rates.get(self.policy.name, 4), 3)
+
+    async def test_rate_rises_additively_and_falls_multiplicatively(self):
+        with (
+            patch("outbound_queue.get_redis_client", return_value=None),
+            patch("outbound_queue.time", monotonic=lambda: self.now[0]),
+        ):
+            await self._window()
+            await self._window()
+            raised = self._rate()
+            await self._window(latency=0.5)
+            slower = self._rate()
+
+            await self.queue.observe(self.policy, 429, 0.1)
+            await self.queue.observe(self.policy, 429, 0.1)
+            halved = self._rate()
+            self.now[0] += 2
+            for _ in range(3):
+                await self.queue.observe(self.policy, 503, 0.1)
+            burst = self._rate()
+            for _ in range(3):
+                self.now[0] += 2
+                await self.queue.observe(self.policy, 429, 0.1)
+
+        self.assertEqual(raised, 4.4)
+        self.assertEqual(slower, 4.4)
+        # Concurrent 429s from one overload cut the rate once.
+        self.assertEqual(halved, 2.2)
+        self.assertEqual(burst, 1.1)
+        self.assertEqual(self._rate(), 0.4)
+
+    async def test_rate_never_exceeds_the_ceiling(self):
+        self.queue._effective_rates[self.policy.name] = 11.9
+        with (
+            patch("outbound_queue.get_redis_client", return_value=None),
+            patch("outbound_queue.time", monotonic=lambda: self.now[0]),
+            patch.object(
+                self.queue,
+                "_adjust_rate",
+                wraps=self.queue._adjust_rate,
+            ) as adjust,
+        ):
+            await self._window()
+            await self._window()
+
+        self.assertEqual(self._rate(), self.policy.ceiling)
+        self.assertEqual(adjust.await_count, 1)
+
+    async def test_replicas_share_the_effective_rate_through_redis(self):
+        redis = FakeSlotRedis()
+        other = OutboundRequestQueue(lease_ms=0)
+        key = f"datahunt:queue:slot:{self.policy.name}"
+
+        with patch("outbound_queue.get_redis_client", return_value=redis):
+            await self.queue._adjust_rate(self.policy, cut=True)
+            await other._reserve_redis(self.policy, 1)
+            await other._reserve_redis(self.policy, 1)
+
+        self.assertEqual(other._effective_rates[self.policy.name], 2.0)
+        self.assertEqual(float(redis.values[key]), redis.now_ms + 2 * 500)
+
+
+class ReportedWeightTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.redis = FakeSlotRedis()
+        self.queue = OutboundRequestQueue()
+        self.policy = self.queue.policy_for_host("api.binance.com")
+        self.request = httpx.Request("GET", "https://api.binance.com/api/v3/account")
+        self.key = f"datahunt:queue:slot:{self.policy.name}"
+
+    def test_binance_and_bybit_headers_are_parsed_per_counter(self):
+        binance = _reported_usage(
+            "binance",
+            self.request,
+            httpx.Response(200, headers={"X-MBX-USED-WEIGHT-1M": "1240"}),
+        )
+        bybit_request = httpx.Request(
+            "GET",
+            "https://api.bybit.com/v5/account/wallet-balance",
+        )
+        with patch("outbound_queue.time", time=lambda: 1_700_000_000.0):
+            bybit = _reported_usage(
+                "bybit",
+                bybit_request,
+                httpx.Response(
+                    200,
+                    headers={
+                        "X-Bapi-Limit": "50",
+                        "X-Bapi-Limit-Status": "46",
+                        "X-Bapi-Limit-Reset-Timestamp": "1700000000500",
+                    },
+                ),
+            )
+
+        self.assertEqual(
+            (binance.scope, binance.used, binance.limit),
+            ("api.binance.com", 1240, 6000),
+        )
+        self.assertEqual(bybit.scope, "/v5/account/wallet-balance")
+        self.assertEqual((bybit.used, bybit.limit, bybit.reset_after), (4, 50, 0.5))
+        self.assertIsNone(
+            _reported_usage("coinbase", self.request, httpx.Response(200))
+        )
+
+    async def test_timeline_slows_down_before_the_provider_quota_runs_out(self):
+        with patch("outbound_queue.get_redis_client", return_value=self.redis):
+            await self.queue.reconcile(
+                self.policy,
+                self.request,
+                20,
+                _ReportedUsage("api.binance.com", 1000, 6000, 30.0, 1),
+            )
+            untouched = self.key in self.redis.values
+            await self.queue.reconcile(
+                self.policy,
+                self.request,
+                20,
+                _ReportedUsage("api.binance.com", 5000, 6000, 30.0, 1),
+            )
+
+        # 400 weight is left above the reserve; at 25 ms per unit it lasts the
+        # final 10 s of the window, so nothing is handed out for the first 20 s.
+        self.assertFalse(untouched)
+        self.assertEqual(float(self.redis.values[self.key]), self.redis.now_ms + 20_000)
+
+    async def test_observed_weight_is_recorded_per_endpoint(self):
+        with patch("outbound_queue.get_redis_client", return_value=None):
+            for used, window in ((100, 1), (120, 1), (160, 1), (170, 1), (5, 2)):
+                await self.queue.reconcile(
+                    self.policy,
+                    self.request,
+                    20,
+                    _ReportedUsage("api.binance.com", used, 6000, 30.0, window),
+                )
+
+        self.assertEqual(
+            self.queue.reported_weights(),
+            [
+                {
+                    "provider": "binance",
+                    "endpoint": "/api/v3/account",
+                    "static_cost": 20,
+                    "observed_cost": 10,
+                    "max_observed_cost": 40,
+                    "samples": 3,
+                }
+            ],
+        )
+
+
 class QueuedTransportTest(unittest.IsolatedAsyncioTestCase):
     async def test_429_is_delayed_and_retried(self):
         calls = 0
@@ -223,6 +665,148 @@ class QueuedTransportTest(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(record_external_request.await_count, 2)
         record_external_request.assert_awaited_with("coinbase")
 
+    async def test_slot_is_held_until_the_response_body_is_closed(self):
+        events = []
+
+        class UnreadBody(httpx.AsyncByteStream):
+            async def __aiter__(self):
+                yield b"body"
+
+        transport = QueuedAsyncHTTPTransport(
+            transport=httpx.MockTransport(
+                lambda request: httpx.Response(200, stream=UnreadBody())
+            )
+        )
+
+        @asynccontextmanager
+        async def recording_slot(policy, cost):
+            events.append("acquired")
+            try:
+                yield
+            finally:
+                events.append("released")
+
+        with (
+            patch.object(outbound_queue, "slot", recording_slot),
+            patch.object(outbound_queue, "record_external_request", AsyncMock()),
+        ):
+            async with httpx.AsyncClient(transport=transport) as client:
+                async with client.stream("GET", "https://api.coinbase.com/test") as r:
+                    held = list(events)
+                    body = await r.aread()
+                released = list(events)
+
+        self.assertEqual(held, ["acquired"])
+        self.assertEqual(body, b"body")
+        self.assertEqual(released, ["acquired", "released"])
+
+    async def test_reported_weight_is_reconciled_after_each_response(self):
+        transport = QueuedAsyncHTTPTransport(
+            transport=httpx.MockTransport(
+                lambda request: httpx.Response(
+                    200,
+                    headers={"X-MBX-USED-WEIGHT-1M": "5900"},
+                )
+            )
+        )
+
+        @asynccontextmanager
+        async def immediate_slot(policy, cost):
+            yield
+
+        with (
+            patch.object(outbound_queue, "slot", immediate_slot),
+            patch.object(outbound_queue, "record_external_request", AsyncMock()),
+            patch.object(outbound_queue, "reconcile", AsyncMock()) as reconcile,
+        ):
+            async with httpx.AsyncClient(transport=transport) as client:
+                await client.get("https://fapi.binance.com/fapi/v3/account")
+
+        policy, request, cost, usage = reconcile.await_args.args
+        self.assertEqual(
+            (policy.name, request.url.path, cost),
+            ("binance", "/fapi/v3/account", 5),
+        )
+        self.assertEqual((usage.used, usage.limit), (5900, 2400))
+
+
+class RecordingTransport(httpx.MockTransport):
+    def __init__(self, **kwargs):
+        super().__init__(lambda request: httpx.Response(200, json={"ok": True}))
+        self.options = kwargs
+        self.closed = False
+
+    async def aclose(self):
+        self.closed = True
+
+
+class OutboundClientRegistryTest(unittest.IsolatedAsyncioTestCase):
+    async def _get(self, url: str, *, trust_env: bool = True) -> httpx.Response:
+        @asynccontextmanager
+        async def immediate_slot(policy, cost):
+            yield
+
+        with (
+            patch.object(outbound_queue, "slot", immediate_slot),
+            patch.object(outbound_queue, "record_external_request", AsyncMock()),
+        ):
+            async with queue_module.queued_async_client(trust_env=trust_env) as client:
+                return await client.get(url)
+
+    async def test_started_registry_shares_one_pool_per_provider(self):
+        transports = []
+
+        def factory(**kwargs):
+            transports.append(RecordingTransport(**kwargs))
+            return transports[-1]
+
+        registry = OutboundClientRegistry(
+            keepalive_seconds=15,
+            transport_factory=factory,
+        )
+        registry.start()
+        with patch.object(outbound_queue, "clients", registry):
+            await self._get("https://api.coinbase.com/v2/accounts")
+            await self._get("https://api.coinbase.com/v2/prices")
+            await self._get("https://api.binance.com/api/v3/time")
+
+        self.assertEqual(len(transports), 2)
+        coinbase = transports[0]
+        self.assertFalse(coinbase.closed)
+        self.assertEqual(coinbase.options["limits"].max_connections, 4)
+        self.assertEqual(coinbase.options["limits"].keepalive_expiry, 15)
+        self.assertFalse(coinbase.options["http2"])
+        self.assertEqual(
+            [(item["provider"], item["requests"]) for item in registry.stats()],
+            [("binance", 1), ("coinbase", 2)],
+        )
+
+        await registry.aclose()
+
+        self.assertTrue(all(transport.closed for transport in transports))
+        self.assertEqual(registry.stats(), [])
+        self.assertIsNone(
+            registry.transport(outbound_queue.policy_for_host("api.coinbase.com"), True)
+        )
+
+    async def test_unstarted_registry_leaves_each_client_its_own_transport(self):
+        registry = OutboundClientRegistry(transport_factory=RecordingTransport)
+        closed = []
+
+        class PrivateTransport(RecordingTransport):
+            async def aclose(self):
+                closed.append(self)
+
+        with (
+            patch.object(outbound_queue, "clients", registry),
+            patch.object(queue_module.httpx, "AsyncHTTPTransport", PrivateTransport),
+        ):
+            response = await self._get("https://api.coinbase.com/v2/accounts")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(closed), 1)
+        self.assertEqual(registry.stats(), [])
+
 
 if __name__ == "__main__":
     unittest.main()
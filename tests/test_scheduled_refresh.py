@@ -1,3 +1,4 @@
+import time
 import unittest
 from unittest.mock import AsyncMock, patch
 
@@ -9,9 +10,10 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
-from csv_cache import CSVCacheMiddleware
+from csv_cache import CSVCacheMiddleware, CSVCachePolicy, CSVCachePolicyTable
 from database import Base
 from models import ValueResource
+import routers.aave  # noqa: F401  registers the Aave query canonicalizer
 from routers.value import (
     RESOURCE_CREDENTIAL_PARAMS,
     VALUE_SOURCES,
@@ -27,6 +29,7 @@ from value_rate_limit import (
     DATA_ACCESS_INTERNAL_HEADER,
     DATA_ACCESS_INTERNAL_TOKEN,
 )
+from value_resource_cache import value_resource_cache
 
 
 class FakeRefreshRedis:
@@ -62,6 +65,14 @@ class FakeRefreshRedis:
     async def get(self, key: str):
         return self.values.get(key)
 
+    async def publish(self, channel: str, message: str):
+        return 0
+
+    async def incr(self, key: str):
+        value = int(self.values.get(key, b"0")) + 1
+        self.values[key] = str(value).encode()
+        return value
+
     async def exists(self, key: str):
         return key in self.values
 
@@ -99,11 +110,15 @@ class FakeRefreshRedis:
             _, member = min(due)
             self.zsets[key].pop(member, None)
             return member
-        token = str(args[0]).encode()
+        raise AssertionError("unexpected script")
+
+    async def evalsha(self, sha: str, key_count: int, key: str, *args):
+        token = str(args[1]).encode()
         if self.values.get(key) == token:
             self.values.pop(key, None)
-            return 1
-        return 0
+            self.values.pop(args[0], None)
+            return 0
+        return -1
 
     def pipeline(self, transaction=True):
         return FakeRefreshPipeline(self)
@@ -128,6 +143,10 @@ class FakeRefreshPipeline:
         self.commands.append(("expire", (key, seconds), {}))
         return self
 
+    def hgetall(self, key: str):
+        self.commands.append(("hgetall", (key,), {}))
+        return self
+
     def set(self, key: str, value: str, **kwargs):
         self.commands.append(("set", (key, value), kwargs))
         return self
@@ -136,6 +155,10 @@ class FakeRefreshPipeline:
         self.commands.append(("zadd", (key, mapping), kwargs))
         return self
 
+    def publish(self, channel: str, message: str):
+        self.commands.append(("publish", (channel, message), {}))
+        return self
+
     async def execute(self):
         results = []
         for method, args, kwargs in self.commands:
@@ -152,6 +175,7 @@ class ScheduledRefreshTest(unittest.IsolatedAsyncioTestCase):
         )
         Base.metadata.create_all(self.engine)
         self.Session = sessionmaker(bind=self.engine)
+        value_resource_cache.clear()
 
     def tearDown(self):
         Base.metadata.drop_all(self.engine)
@@ -198,6 +222,87 @@ class ScheduledRefreshTest(unittest.IsolatedAsyncioTestCase):
         self.assertNotIn("chain_id", stored)
         self.assertNotIn("auth_token", stored)
 
+    async def test_source_with_longer_cache_ttl_is_not_refreshed_early(self):
+        self._resource("ResourceCmc1", "5" * 64, source="cmc-price")
+        redis = FakeRefreshRedis()
+        queue = ScheduledRefreshQueue(
+            redis_client=redis,
+            session_factory=self.Session,
+            delay_seconds=600,
+            policies=CSVCachePolicyTable(
+                CSVCachePolicy(
+                    ttl_seconds=60,
+                    stale_ttl_seconds=86400,
+                    refresh_timeout_seconds=8,
+                ),
+                {"/cmc/": {"ttl_seconds": 3600}},
+                aliases={},
+            ),
+        )
+
+        started_at = time.time()
+        scheduled = await queue.schedule("ResourceCmc1")
+
+        self.assertTrue(scheduled)
+        (due_at,) = redis.zsets[REFRESH_QUEUE_KEY].values()
+        self.assertGreaterEqual(due_at, started_at + 3600)
+
+    async def test_source_without_stale_reads_is_refreshed_before_it_expires(self):
+        self._resource("ResourceCmc1", "5" * 64, source="cmc-price")
+        redis = FakeRefreshRedis()
+        queue = ScheduledRefreshQueue(
+            redis_client=redis,
+            session_factory=self.Session,
+            delay_seconds=600,
+            policies=CSVCachePolicyTable(
+                CSVCachePolicy(
+                    ttl_seconds=60,
+                    stale_ttl_seconds=86400,
+                    refresh_timeout_seconds=8,
+                ),
+                {
+                    "/cmc/": {
+                        "ttl_seconds": 3600,
+                        "refresh_timeout_seconds": 30,
+                        "serve_stale": False,
+                    }
+                },
+                aliases={},
+            ),
+        )
+
+        started_at = time.time()
+        scheduled = await queue.schedule("ResourceCmc1")
+
+        self.assertTrue(scheduled)
+        (due_at,) = redis.zsets[REFRESH_QUEUE_KEY].values()
+        self.assertGreaterEqual(due_at, started_at + 3570)
+        self.assertLess(due_at, started_at + 3600)
+
+    async def test_equivalent_parameters_share_one_refresh(self):
+        self._resource(
+            "ResourceAave",
+            "6" * 64,
+            source="aave",
+            parameters={"address": "0x" + "AB" * 20},
+        )
+        self._resource(
+            "ResourceAav2",
+            "7" * 64,
+            source="aave",
+            parameters={"address": "0x" + "ab" * 20, "chain_id": "1"},
+        )
+        redis = FakeRefreshRedis()
+        queue = ScheduledRefreshQueue(
+            redis_client=redis,
+            session_factory=self.Session,
+        )
+
+        await queue.schedule("ResourceAave")
+        await queue.schedule("ResourceAav2")
+
+        self.assertEqual(len(redis.zsets[REFRESH_QUEUE_KEY]), 1)
+
     async def test_credential_source_is_not_scheduled(self):
         self._resource("CoinbaseRes1", "3" * 64, source="coinbase")
         redis = FakeRefreshRedis()
@@ -1,9 +1,10 @@
+import asyncio
 import unittest
 from unittest.mock import patch
 
 import jwt
-from fastapi import FastAPI
-from fastapi.responses import Response
+from fastapi import FastAPI, Request
+from fastapi.responses import Response, StreamingResponse
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
@@ -15,11 +16,15 @@ from database import Base, get_db
 from models import Account, AccountAddress, AccountToken, UsageDaily, ValueResource
 from routers.auth import router as auth_router
 from security import create_access_token, create_sheets_access_token
+from token_cache import verified_tokens
 from value_rate_limit import (
     DATA_ACCESS_INTERNAL_HEADER,
     DATA_ACCESS_INTERNAL_TOKEN,
+    UsageRecorder,
     ValueRateLimitMiddleware,
+    charge_rate_limit,
 )
+from value_resource_cache import value_resource_cache
 
 
 class SheetsAccessTest(unittest.TestCase):
@@ -30,11 +35,14 @@ class SheetsAccessTest(unittest.TestCase):
             poolclass=StaticPool,
         )
         Base.metadata.create_all(self.engine)
+        value_resource_cache.clear()
+        verified_tokens.clear()
         self.Session = sessionmaker(
             autocommit=False,
             autoflush=False,
             bind=self.engine,
         )
+        self.usage = UsageRecorder(session_factory=self.Session)
         with self.Session() as db:
             db.add(
                 Account(
@@ -131,6 +139,7 @@ class SheetsAccessTest(unittest.TestCase):
             authenticated_limit=3,
             window_seconds=60,
             session_factory=self.Session,
+            usage=self.usage,
         )
 
         @app.get("/v/{resource_id}")
@@ -167,6 +176,7 @@ class SheetsAccessTest(unittest.TestCase):
                 )
                 self.assertEqual(invalid.status_code, 401)
 
+        asyncio.run(self.usage.flush())
         with self.Session() as db:
             usage = db.query(UsageDaily).all()
             self.assertEqual(
@@ -187,6 +197,7 @@ class SheetsAccessTest(unittest.TestCase):
             authenticated_limit=5,
             window_seconds=60,
             session_factory=self.Session,
+            usage=self.usage,
         )
 
         @app.get("/v/{resource_id}")
@@ -209,6 +220,7 @@ class SheetsAccessTest(unittest.TestCase):
                 )
 
         self.assertEqual(response.status_code, 200)
+        asyncio.run(self.usage.flush())
         with self.Session() as db:
             usage = db.query(UsageDaily).one()
             self.assertEqual(usage.account_id, "account-one")
@@ -238,6 +250,7 @@ class SheetsAccessTest(unittest.TestCase):
             authenticated_limit=5,
             window_seconds=60,
             session_factory=self.Session,
+            usage=self.usage,
         )
 
         @app.get("/v/{current_resource_id}")
@@ -257,6 +270,7 @@ class SheetsAccessTest(unittest.TestCase):
                 )
 
         self.assertEqual(response.status_code, 502)
+        asyncio.run(self.usage.flush())
         with self.Session() as db:
             usage = db.query(UsageDaily).one()
             self.assertEqual(usage.source, "morpho")
@@ -269,6 +283,7 @@ class SheetsAccessTest(unittest.TestCase):
             authenticated_limit=5,
             window_seconds=60,
             session_factory=self.Session,
+            usage=self.usage,
         )
 
         @app.get("/stablecoins/balances.csv")
@@ -328,6 +343,7 @@ class SheetsAccessTest(unittest.TestCase):
             authenticated_limit=2,
             window_seconds=60,
             session_factory=self.Session,
+            usage=self.usage,
         )
 
         @app.get("/v/{resource_id}")
@@ -349,6 +365,129 @@ class SheetsAccessTest(unittest.TestCase):
         self.assertEqual(limited.status_code, 429)
         self.assertEqual(calls["value"], 1)
 
+    def test_batch_reads_are_charged_by_distinct_source_work(self):
+        app = FastAPI()
+        app.add_middleware(
+            ValueRateLimitMiddleware,
+            authenticated_limit=4,
+            window_seconds=60,
+            session_factory=self.Session,
+            usage=self.usage,
+        )
+
+        @app.post("/v/batch")
+        async def batch(request: Request, sources: int):
+            await charge_rate_limit(request, sources - 1)
+            return Response(
+                content="1\n2",
+                media_type="text/csv",
+                headers={"X-Value-Source": "value-batch"},
+            )
+
+        sheet_token = self._create_sheets_token()
+        with patch("value_rate_limit.get_redis_client", return_value=None):
+            with TestClient(app) as client:
+                params = {"auth_token": sheet_token, "sources": 3}
+                first = client.post("/v/batch", params=params)
+                limited = client.post("/v/batch", params=params)
+
+        self.assertEqual(first.status_code, 200, first.text)
+        self.assertEqual(first.headers["x-ratelimit-remaining"], "1")
+        self.assertEqual(limited.status_code, 429)
+        self.assertIn("retry-after", limited.headers)
+        self.assertEqual(limited.headers["x-ratelimit-remaining"], "0")
+        asyncio.run(self.usage.flush())
+        with self.Session() as db:
+            usage = db.query(UsageDaily).all()
+            self.assertEqual({item.source for item in usage}, {"value-batch"})
+
+    def test_deactivated_sheets_token_is_rejected_despite_cached_verification(self):
+        app = FastAPI()
+        app.include_router(auth_router)
+        app.dependency_overrides[get_db] = self._override_db
+        app.add_middleware(
+            ValueRateLimitMiddleware,
+            authenticated_limit=10,
+            window_seconds=60,
+            session_factory=self.Session,
+            usage=self.usage,
+        )
+
+        @app.get("/v/{resource_id}")
+        async def value(resource_id: str):
+            return Response(content=resource_id, media_type="text/csv")
+
+        sheet_token = self._create_sheets_token("sheets-revoked")
+        with patch("value_rate_limit.get_redis_client", return_value=None):
+            with TestClient(app) as client:
+                params = {"auth_token": sheet_token}
+                before = client.get("/v/AbCdEf123456", params=params)
+                deactivated = client.post(
+                    "/web3/deactivate",
+                    json={"token_id": "sheets-revoked"},
+                    headers={"Authorization": f"Bearer {self.session_token}"},
+                )
+                after = client.get("/v/AbCdEf123456", params=params)
+
+        self.assertEqual(before.status_code, 200)
+        self.assertEqual(deactivated.status_code, 200, deactivated.text)
+        self.assertEqual(after.status_code, 401)
+        self.assertIn("revoked", after.json()["detail"])
+
+    def test_streamed_responses_pass_through_with_rate_limit_headers(self):
+        app = FastAPI()
+        app.add_middleware(
+            ValueRateLimitMiddleware,
+            authenticated_limit=5,
+            window_seconds=60,
+            session_factory=self.Session,
+            usage=self.usage,
+        )
+
+        @app.get("/stablecoins/balances.csv")
+        async def balances():
+            async def rows():
+                yield b"id,balance\n"
+                yield b"usdc,1\n"
+
+            return StreamingResponse(
+                rows(),
+                media_type="text/csv",
+                headers={"X-Value-Source": "stablecoins"},
+            )
+
+        sheet_token = self._create_sheets_token()
+        with patch("value_rate_limit.get_redis_client", return_value=None):
+            with TestClient(app) as client:
+                response = client.get(
+                    "/stablecoins/balances.csv",
+                    params={"auth_token": sheet_token},
+                )
+
+        self.assertEqual(response.text, "id,balance\nusdc,1\n")
+        self.assertEqual(response.headers["x-ratelimit-remaining"], "4")
+        self.assertEqual(response.headers["cache-control"], "private, max-age=60")
+        asyncio.run(self.usage.flush())
+        with self.Session() as db:
+            usage = db.query(UsageDaily).one()
+        self.assertEqual(usage.source, "stablecoins")
+        self.assertEqual(usage.status_group, "success")
+
+    def test_buffered_usage_is_added_to_daily_counts_in_bulk(self):
+        timestamp = 3 * 86400 + 5
+        for status_code in (200, 200, 404):
+            self.usage.record("account-one", "morpho", status_code, timestamp)
+        asyncio.run(self.usage.flush())
+        self.usage.record("account-one", "morpho", 200, timestamp)
+        asyncio.run(self.usage.flush())
+
+        with self.Session() as db:
+            counts = {
+                item.status_group: item.request_count
+                for item in db.query(UsageDaily).filter(UsageDaily.day == 3)
+            }
+        self.assertEqual(counts, {"success": 3, "client_error": 1})
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -6,6 +6,7 @@ from unittest.mock import AsyncMock, patch
 import httpx
 from fastapi import HTTPException
 
+from csv_cache import csv_cache_digest
 from routers.stablecoins import (
     ETHEREUM_TOKENS,
     ARBITRUM_TOKENS,
@@ -235,6 +236,34 @@ class StablecoinBalanceTest(unittest.IsolatedAsyncioTestCase):
 
         self.assertEqual(wallets, [EVM_WALLET, other_wallet.lower()])
 
+    def test_equivalent_wallet_lists_share_one_cache_entry(self):
+        other_wallet = "0x94CE9ae15c739552EeBB8A8746C0CA33c3d369Ce"
+
+        def digest(query_items):
+            return csv_cache_digest(
+                method="GET",
+                path="/stablecoins/balances.csv",
+                query_items=query_items,
+            )
+
+        self.assertEqual(
+            digest([("address", f"{EVM_WALLET},{other_wallet}")]),
+            digest(
+                [
+                    (
+                        "address",
+                        f"{EVM_WALLET.upper().replace('0X', '0x')};{other_wallet}",
+                    ),
+                    ("chain_id", "1"),
+                    ("wallet", ""),
+                ]
+            ),
+        )
+        self.assertNotEqual(
+            digest([("address", f"{EVM_WALLET},{other_wallet}")]),
+            digest([("address", f"{other_wallet},{EVM_WALLET}")]),
+        )
+
     async def test_fetches_multiple_wallets_in_one_table(self):
         other_wallet = "0x94ce9ae15c739552eebb8a8746c0ca33c3d369ce"
         first_rows = [{"balance_id": "first"}]
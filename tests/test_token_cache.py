@@ -0,0 +1,143 @@
+import unittest
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from database import Base
+from memory_cache import MemoryBudget
+from models import AccountToken
+from token_cache import TOKEN_REVOCATION_CHANNEL, VerifiedTokenCache
+
+
+class FakeBroadcast:
+    def __init__(self):
+        self.handlers = {}
+        self.reset_handlers = {}
+
+    def subscribe(self, channel, handler, *, on_reset=None):
+        self.handlers[channel] = handler
+        self.reset_handlers[channel] = on_reset
+
+
+class FakePublishRedis:
+    def __init__(self):
+        self.published = []
+
+    async def publish(self, channel, message):
+        self.published.append((channel, message))
+        return 1
+
+
+class VerifiedTokenCacheTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.engine = create_engine(
+            "sqlite://",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        Base.metadata.create_all(self.engine)
+        self.Session = sessionmaker(bind=self.engine)
+        with self.Session() as db:
+            db.add(
+                AccountToken(
+                    id="sheets-one",
+                    account_id="account-one",
+                    created_at=1,
+                    is_active=True,
+                    purpose="sheets",
+                )
+            )
+            db.commit()
+        self.queries = 0
+
+        @event.listens_for(self.engine, "before_cursor_execute")
+        def count_query(*args):
+            self.queries += 1
+
+        self.broadcast = FakeBroadcast()
+        self.redis = FakePublishRedis()
+        self.cache = VerifiedTokenCache(
+            ttl_seconds=30,
+            redis_client=self.redis,
+            broadcast=self.broadcast,
+            budget=MemoryBudget(1024 * 1024),
+        )
+
+    def tearDown(self):
+        Base.metadata.drop_all(self.engine)
+        self.engine.dispose()
+
+    def _deactivate(self):
+        with self.Session() as db:
+            db.get(AccountToken, "sheets-one").is_active = False
+            db.commit()
+        self.queries = 0
+
+    def test_active_token_is_verified_once_within_ttl(self):
+        with self.Session() as db:
+            first = self.cache.lookup("sheets-one", db)
+            second = self.cache.lookup("sheets-one", db)
+
+        self.assertEqual(self.queries, 1)
+        self.assertEqual(first, second)
+        self.assertEqual(first.account_id, "account-one")
+        self.assertTrue(first.is_active)
+
+    async def test_revocation_is_applied_locally_and_published(self):
+        with self.Session() as db:
+            self.cache.lookup("sheets-one", db)
+            self._deactivate()
+            await self.cache.revoke("sheets-one")
+            revoked = self.cache.lookup("sheets-one", db)
+            repeated = self.cache.lookup("sheets-one", db)
+
+        self.assertFalse(revoked.is_active)
+        self.assertFalse(repeated.is_active)
+        self.assertEqual(self.queries, 2)
+        self.assertEqual(
+            self.redis.published,
+            [(TOKEN_REVOCATION_CHANNEL, "sheets-one")],
+        )
+
+    def test_revocation_from_another_replica_drops_the_cached_token(self):
+        with self.Session() as db:
+            self.cache.lookup("sheets-one", db)
+            self._deactivate()
+            self.broadcast.handlers[TOKEN_REVOCATION_CHANNEL](b"sheets-one")
+            revoked = self.cache.lookup("sheets-one", db)
+
+        self.assertFalse(revoked.is_active)
+
+    def test_lost_subscription_clears_cached_tokens(self):
+        with self.Session() as db:
+            self.cache.lookup("sheets-one", db)
+            self._deactivate()
+            self.broadcast.reset_handlers[TOKEN_REVOCATION_CHANNEL]()
+            revoked = self.cache.lookup("sheets-one", db)
+
+        self.assertFalse(revoked.is_active)
+
+    def test_read_leaves_caching_to_the_caller(self):
+        generation = self.cache.generation
+        with self.Session() as db:
+            token = self.cache.read("sheets-one", db)
+        self.assertIsNone(self.cache.peek("sheets-one"))
+
+        self.cache.remember(token, generation)
+
+        self.assertEqual(self.cache.peek("sheets-one"), token)
+
+    def test_token_read_before_a_revocation_is_not_remembered(self):
+        generation = self.cache.generation
+        with self.Session() as db:
+            token = self.cache.read("sheets-one", db)
+        self.broadcast.handlers[TOKEN_REVOCATION_CHANNEL](b"sheets-one")
+
+        self.cache.remember(token, generation)
+
+        self.assertIsNone(self.cache.peek("sheets-one"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,11 +1,22 @@
+import csv
+import sys
 import unittest
 from unittest.mock import patch
 
-from fastapi import FastAPI, HTTPException
+import httpx
+from fastapi import FastAPI, Header, HTTPException
 from fastapi.responses import PlainTextResponse, Response
 from fastapi.testclient import TestClient
 
-from routers.value import VALUE_SOURCES, ValueSource, router
+from csv_cache import CSVCacheMiddleware
+from routers.value import (
+    VALUE_SOURCES,
+    ValueSource,
+    _source_row_index,
+    _source_row_indexes,
+    is_credential_free_request,
+    router,
+)
 
 
 def _build_app() -> FastAPI:
@@ -27,6 +38,13 @@ def _build_app() -> FastAPI:
             media_type="text/csv",
         )
 
+    @app.get("/caller.csv")
+    async def caller_csv(authorization: str | None = Header(None)):
+        return Response(
+            content=f"id,caller\none,{authorization or 'shared'}\n",
+            media_type="text/csv",
+        )
+
     @app.get("/plain")
     async def plain():
         return PlainTextResponse("42")
@@ -57,6 +75,7 @@ class StableValueRouteTest(unittest.TestCase):
             {
                 "test": ValueSource("/test.csv", "id"),
                 "plain": ValueSource("/plain", "id"),
+                "caller": ValueSource("/caller.csv", "id"),
                 "failure": ValueSource("/failure", "id"),
                 "stablecoins": ValueSource(
                     "/stablecoins-test.csv", "balance_id"
@@ -64,6 +83,7 @@ class StableValueRouteTest(unittest.TestCase):
             },
         )
         self.sources.start()
+        _source_row_indexes.clear()
 
     def tearDown(self):
         self.sources.stop()
@@ -148,6 +168,114 @@ class StableValueRouteTest(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.text, "1.692943")
 
+    def test_credential_free_source_request_does_not_carry_caller_identity(self):
+        with TestClient(self.app) as client:
+            response = client.get(
+                "/value?source=caller&key=one&column=caller",
+                headers={"Authorization": "Bearer session-token"},
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.text, "shared")
+
+    def test_source_is_read_in_process_below_outer_middleware(self):
+        app = _build_app()
+        app.add_middleware(CSVCacheMiddleware, ttl_seconds=60)
+        outer_paths = []
+
+        @app.middleware("http")
+        async def record_outer_path(request, call_next):
+            outer_paths.append(request.url.path)
+            return await call_next(request)
+
+        with (
+            patch("routers.value.httpx.AsyncClient", side_effect=AssertionError),
+            TestClient(app) as client,
+        ):
+            response = client.get("/value?source=test&key=two&column=amount")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.text, "20")
+        self.assertEqual(response.headers["x-value-source"], "test")
+        self.assertEqual(outer_paths, ["/value"])
+
+    def test_cached_source_body_is_indexed_once_for_every_cell(self):
+        app = _build_app()
+        app.add_middleware(CSVCacheMiddleware, ttl_seconds=60)
+
+        with (
+            patch("routers.value.csv.reader", wraps=csv.reader) as reader,
+            TestClient(app) as client,
+        ):
+            amount = client.get("/value?source=test&key=two&column=amount")
+            other = client.get("/value?source=test&key=one&column=amount")
+            missing = client.get("/value?source=test&key=two&column=missing")
+
+        self.assertEqual(amount.text, "20")
+        self.assertEqual(other.text, "10")
+        self.assertEqual(missing.status_code, 400)
+        self.assertEqual(reader.call_count, 1)
+
+
+class SourceRowIndexTest(unittest.TestCase):
+    def tearDown(self):
+        _source_row_indexes.clear()
+
+    def test_index_size_covers_every_cell_object(self):
+        header = ",".join(["symbol", *(f"c{column}" for column in range(40))])
+        lines = [
+            ",".join([f"row{row}", *("1" for _ in range(40))]) for row in range(200)
+        ]
+        response = httpx.Response(
+            200,
+            headers={"content-type": "text/csv"},
+            text="\n".join([header, *lines]),
+        )
+
+        index = _source_row_index(response, "symbol")
+
+        cells = sum(
+            sys.getsizeof(row) + sum(map(sys.getsizeof, row))
+            for matches in index.rows.values()
+            for row in matches
+        )
+        self.assertGreaterEqual(index.size, cells)
+        self.assertGreater(index.size, 10 * len(response.content))
+
+
+class CredentialFreeRequestTest(unittest.TestCase):
+    def test_public_wallet_sources_are_shared_across_accounts(self):
+        self.assertTrue(
+            is_credential_free_request(
+                "/aave/positions.csv",
+                [("address", "0xwallet"), ("chain_id", "1")],
+            )
+        )
+        self.assertTrue(
+            is_credential_free_request("/value", [("source", "aave")])
+        )
+        self.assertTrue(
+            is_credential_free_request(
+                "/v/ResourceOne1",
+                [("auth_token", "sheets-token")],
+            )
+        )
+
+    def test_credential_sources_stay_isolated(self):
+        self.assertFalse(
+            is_credential_free_request("/bybit/account.csv", [("capsule", "x")])
+        )
+        self.assertFalse(
+            is_credential_free_request(
+                "/value",
+                [("source", "coinbase"), ("capsule", "x")],
+            )
+        )
+        self.assertFalse(
+            is_credential_free_request("/v/ResourceOne1", [("capsule", "x")])
+        )
+        self.assertFalse(is_credential_free_request("/admin/report.csv", []))
+
 
 if __name__ == "__main__":
     unittest.main()
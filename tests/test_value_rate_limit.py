@@ -0,0 +1,159 @@
+import asyncio
+import math
+import unittest
+from unittest.mock import patch
+
+from redis.exceptions import NoScriptError
+
+from value_rate_limit import GCRA_RATE_LIMIT_SCRIPT, ValueRateLimitMiddleware
+
+
+class FakeGCRARedis:
+    """Runs the GCRA script's arithmetic in Python against a settable clock."""
+
+    def __init__(self, *, loaded: bool = True):
+        self.now_ms = 1_000_000
+        self.tats: dict[str, float] = {}
+        self.scripts = {GCRA_RATE_LIMIT_SCRIPT.sha} if loaded else set()
+        self.calls = []
+
+    async def script_load(self, source: str):
+        self.scripts.add(GCRA_RATE_LIMIT_SCRIPT.sha)
+        return GCRA_RATE_LIMIT_SCRIPT.sha
+
+    async def evalsha(self, sha: str, key_count: int, key: str, period, limit, cost):
+        if sha not in self.scripts:
+            raise NoScriptError("NOSCRIPT No matching script.")
+        self.calls.append(cost)
+        now = self.now_ms
+        interval = period / limit
+        tat = max(now, self.tats.get(key, now))
+        new_tat = max(now, tat + cost * interval)
+        allowed = cost <= 0 or new_tat - now <= period
+        if allowed:
+            self.tats[key] = new_tat
+            tat = new_tat
+        retry_after = 0 if allowed else math.ceil(new_tat - period - now)
+        return [
+            int(allowed),
+            math.floor((period - (tat - now)) / interval),
+            retry_after,
+            math.ceil(tat - now),
+        ]
+
+
+class ValueRateLimitTest(unittest.IsolatedAsyncioTestCase):
+    def _limiter(self, redis=None, **kwargs) -> ValueRateLimitMiddleware:
+        return ValueRateLimitMiddleware(
+            None,
+            authenticated_limit=3,
+            window_seconds=60,
+            redis_client=redis,
+            **kwargs,
+        )
+
+    async def test_memory_fallback_spaces_requests_after_the_burst(self):
+        limiter = self._limiter()
+        now = [100.0]
+
+        with (
+            patch("value_rate_limit.get_redis_client", return_value=None),
+            patch("value_rate_limit.time", monotonic=lambda: now[0]),
+        ):
+            allowed = [await limiter._increment("account", 3) for _ in range(3)]
+            denied = await limiter._increment("account", 3)
+            now[0] += 20
+            refilled = await limiter._increment("account", 3)
+            denied_again = await limiter._increment("account", 3)
+
+        self.assertEqual([rate.remaining for rate in allowed], [2, 1, 0])
+        self.assertFalse(any(rate.exceeded for rate in allowed))
+        self.assertTrue(denied.exceeded)
+        self.assertEqual(denied.retry_after, 20)
+        self.assertFalse(refilled.exceeded)
+        self.assertTrue(denied_again.exceeded)
+
+    async def test_script_is_loaded_once_when_redis_does_not_know_its_sha(self):
+        redis = FakeGCRARedis(loaded=False)
+        limiter = self._limiter(redis)
+
+        first = await limiter._increment("account", 3, cost=2)
+        second = await limiter._increment("account", 3)
+        third = await limiter._increment("account", 3)
+
+        self.assertEqual(redis.calls, [2, 1, 1])
+        self.assertEqual((first.remaining, first.retry_after), (1, 40))
+        self.assertFalse(second.exceeded)
+        self.assertTrue(third.exceeded)
+        self.assertEqual(third.retry_after, 20)
+
+    async def test_leased_tokens_are_spent_locally_and_carried_into_the_next_lease(
+        self,
+    ):
+        redis = FakeGCRARedis()
+        limiter = self._limiter(redis, lease_size=3, lease_seconds=1)
+        now = [100.0]
+
+        with patch("value_rate_limit.time", monotonic=lambda: now[0]):
+            leased = await limiter._increment("account", 3)
+            local = await limiter._increment("account", 3)
+            self.assertEqual(redis.calls, [3])
+            self.assertEqual((leased.remaining, local.remaining), (2, 1))
+
+            now[0] += 40
+            redis.now_ms += 40_000
+            renewed = await limiter._increment("account", 3)
+
+        # Two tokens refilled; the unused leased token was carried over.
+        self.assertEqual(redis.calls, [3, 2])
+        self.assertFalse(renewed.exceeded)
+        self.assertEqual(renewed.remaining, 2)
+        self.assertEqual(limiter._leases["account"].tokens, 2)
+        self.assertEqual(limiter._lease_returns, set())
+
+    async def test_expired_leases_are_returned_without_further_requests(self):
+        redis = FakeGCRARedis()
+        limiter = self._limiter(redis, lease_size=3, lease_seconds=0.1)
+
+        await limiter._increment("idle", 3)
+        await asyncio.sleep(0.15)
+        await asyncio.gather(*limiter._lease_returns)
+
+        self.assertEqual(redis.calls, [3, -2])
+        self.assertNotIn("idle", limiter._leases)
+        self.assertEqual(redis.tats["idle"], redis.now_ms + 20_000)
+
+    async def test_denied_lease_falls_back_to_the_exact_cost(self):
+        redis = FakeGCRARedis()
+        limiter = self._limiter(redis, lease_size=3)
+        await limiter._increment_redis(redis, "account", 3, 2)
+
+        rate = await limiter._increment("account", 3)
+        denied = await limiter._increment("account", 3)
+
+        self.assertFalse(rate.exceeded)
+        self.assertEqual(rate.remaining, 0)
+        self.assertTrue(denied.exceeded)
+        self.assertEqual(redis.calls, [2, 3, 1, 3, 1])
+
+    async def test_denied_lease_spends_the_carried_tokens_first(self):
+        redis = FakeGCRARedis()
+        limiter = self._limiter(redis, lease_size=3, lease_seconds=1)
+        now = [100.0]
+
+        with patch("value_rate_limit.time", monotonic=lambda: now[0]):
+            await limiter._increment("account", 3)
+            now[0] += 2
+            redis.now_ms += 2_000
+            rate = await limiter._increment("account", 3)
+            await asyncio.gather(*limiter._lease_returns)
+
+        # The renewal asks for one more token and is denied; the two still held
+        # pay for this request and the other one goes back.
+        self.assertFalse(rate.exceeded)
+        self.assertEqual(redis.calls, [3, 1, -1])
+        self.assertNotIn("account", limiter._leases)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,208 @@
+import unittest
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from database import Base
+from memory_cache import MemoryBudget
+from models import ValueResource
+from value_resource_cache import (
+    VALUE_RESOURCE_CREATED_CHANNEL,
+    VALUE_RESOURCE_KEY_PREFIX,
+    ValueResourceCache,
+)
+
+
+class FakeBroadcast:
+    def __init__(self):
+        self.handlers = {}
+        self.reset_handlers = {}
+
+    def subscribe(self, channel, handler, *, on_reset=None):
+        self.handlers.setdefault(channel, []).append(handler)
+        self.reset_handlers[channel] = on_reset
+
+
+class FakeDescriptorRedis:
+    def __init__(self):
+        self.values: dict[str, bytes] = {}
+        self.expirations: dict[str, int] = {}
+        self.published = []
+
+    async def mget(self, keys):
+        return [self.values.get(key) for key in keys]
+
+    def pipeline(self, transaction=True):
+        return FakeDescriptorPipeline(self)
+
+
+class FakeDescriptorPipeline:
+    def __init__(self, redis: FakeDescriptorRedis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, traceback):
+        return False
+
+    def set(self, key, value, ex=None, nx=False):
+        self.commands.append((key, value, ex, nx))
+        return self
+
+    def publish(self, channel, message):
+        self.redis.published.append((channel, message))
+        return self
+
+    async def execute(self):
+        for key, value, ex, nx in self.commands:
+            if nx and key in self.redis.values:
+                continue
+            self.redis.values[key] = value
+            self.redis.expirations[key] = ex
+        return [True] * len(self.commands)
+
+
+class ValueResourceCacheTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.engine = create_engine(
+            "sqlite://",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        Base.metadata.create_all(self.engine)
+        self.Session = sessionmaker(bind=self.engine)
+        self.queries = 0
+
+        @event.listens_for(self.engine, "before_cursor_execute")
+        def count_query(*args):
+            self.queries += 1
+
+        with self.Session() as db:
+            db.add(
+                ValueResource(
+                    id="ResourceOne1",
+                    fingerprint="1" * 64,
+                    source="morpho",
+                    key="position",
+                    column="supply_usd",
+                    parameters={"chain_id": "1"},
+                    created_at=1,
+                )
+            )
+            db.commit()
+        self.queries = 0
+
+    def tearDown(self):
+        Base.metadata.drop_all(self.engine)
+        self.engine.dispose()
+
+    async def test_found_and_unknown_ids_are_read_from_the_database_once(self):
+        cache = ValueResourceCache(budget=MemoryBudget(1024 * 1024))
+
+        with self.Session() as db:
+            first = await cache.get_many(["ResourceOne1", "MissingOne12"], db)
+            second = await cache.get_many(["ResourceOne1", "MissingOne12"], db)
+
+        self.assertEqual(self.queries, 1)
+        self.assertEqual(first, second)
+        self.assertEqual(set(first), {"ResourceOne1"})
+        descriptor = first["ResourceOne1"]
+        self.assertEqual(descriptor.source, "morpho")
+        self.assertEqual(dict(descriptor.parameters), {"chain_id": "1"})
+        with self.assertRaises(TypeError):
+            descriptor.parameters["chain_id"] = "2"
+
+    async def test_other_instances_read_descriptors_and_misses_from_redis(self):
+        redis = FakeDescriptorRedis()
+        writer = ValueResourceCache(
+            redis_client=redis,
+            budget=MemoryBudget(1024 * 1024),
+        )
+        reader = ValueResourceCache(
+            redis_client=redis,
+            budget=MemoryBudget(1024 * 1024),
+        )
+
+        with self.Session() as db:
+            await writer.get_many(["ResourceOne1", "MissingOne12"], db)
+            self.queries = 0
+            found = await reader.get("ResourceOne1", db)
+            missing = await reader.get("MissingOne12", db)
+
+        self.assertEqual(self.queries, 0)
+        self.assertEqual(found.column, "supply_usd")
+        self.assertIsNone(missing)
+        self.assertEqual(
+            redis.expirations[f"{VALUE_RESOURCE_KEY_PREFIX}MissingOne12"],
+            writer.missing_ttl_seconds,
+        )
+
+    async def test_created_resource_replaces_a_cached_miss(self):
+        redis = FakeDescriptorRedis()
+        cache = ValueResourceCache(
+            redis_client=redis,
+            budget=MemoryBudget(1024 * 1024),
+        )
+        with self.Session() as db:
+            self.assertIsNone(await cache.get("ResourceTwo2", db))
+            resource = ValueResource(
+                id="ResourceTwo2",
+                fingerprint="2" * 64,
+                source="aave",
+                key=None,
+                column=None,
+                parameters={},
+                created_at=1,
+            )
+            db.add(resource)
+            db.commit()
+
+            await cache.remember(resource)
+            found = await cache.get("ResourceTwo2", db)
+
+        self.assertEqual(found.source, "aave")
+        self.assertIn(b'"aave"', redis.values[f"{VALUE_RESOURCE_KEY_PREFIX}ResourceTwo2"])
+
+    async def test_created_resource_clears_misses_cached_by_other_replicas(self):
+        redis = FakeDescriptorRedis()
+        broadcast = FakeBroadcast()
+        writer, reader = (
+            ValueResourceCache(
+                redis_client=redis,
+                budget=MemoryBudget(1024 * 1024),
+                broadcast=broadcast,
+            )
+            for _ in range(2)
+        )
+        with self.Session() as db:
+            self.assertIsNone(await reader.get("ResourceTwo2", db))
+            resource = ValueResource(
+                id="ResourceTwo2",
+                fingerprint="2" * 64,
+                source="aave",
+                key=None,
+                column=None,
+                parameters={},
+                created_at=1,
+            )
+            db.add(resource)
+            db.commit()
+
+            await writer.remember(resource)
+            self.assertIsNone(await reader.get("ResourceTwo2", db))
+            self.assertEqual(
+                redis.published,
+                [(VALUE_RESOURCE_CREATED_CHANNEL, "ResourceTwo2")],
+            )
+            for handler in broadcast.handlers[VALUE_RESOURCE_CREATED_CHANNEL]:
+                handler(b"ResourceTwo2")
+            found = await reader.get("ResourceTwo2", db)
+
+        self.assertEqual(found.source, "aave")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -20,6 +20,7 @@ from routers.value import (
     ValueSource,
     router,
 )
+from value_resource_cache import value_resource_cache
 
 
 class ValueResourcesTest(unittest.TestCase):
@@ -30,6 +31,7 @@ class ValueResourcesTest(unittest.TestCase):
             poolclass=StaticPool,
         )
         Base.metadata.create_all(self.engine)
+        value_resource_cache.clear()
         self.Session = sessionmaker(
             autocommit=False,
             autoflush=False,
@@ -87,12 +89,12 @@ class ValueResourcesTest(unittest.TestCase):
         Base.metadata.drop_all(self.engine)
         self.engine.dispose()
 
-    def _create_stable_resource(self, parameters=None):
+    def _create_stable_resource(self, parameters=None, key="two"):
         response = self.client.post(
             "/value-resources",
             json={
                 "source": "test",
-                "key": "two",
+                "key": key,
                 "column": "amount",
                 "parameters": parameters or {"value": "123.45"},
             },
@@ -289,6 +291,45 @@ class ValueResourcesTest(unittest.TestCase):
         self.assertEqual(response.status_code, 200, response.text)
         self.assertEqual(response.text, "99.5")
 
+    def test_batch_reads_each_distinct_source_once_in_requested_order(self):
+        two = self._create_stable_resource()
+        one = self._create_stable_resource(key="one")
+        other = self._create_stable_resource({"value": "7"})
+        missing = "AbCdEf123456"
+
+        response = self.client.get(
+            "/v/batch",
+            params={"ids": f"{two},{one},{other},{two},{missing}"},
+        )
+
+        self.assertEqual(response.status_code, 200, response.text)
+        self.assertEqual(
+            response.text.splitlines(),
+            ["123.45", "10", "7", "123.45", "#ERROR: Value resource not found"],
+        )
+        self.assertEqual(response.headers["x-value-source"], "test")
+        self.assertEqual(response.headers["x-value-batch-sources"], "2")
+        self.assertEqual(self.source_calls, 2)
+
+    def test_batch_post_form_returns_one_row_and_passes_credentials(self):
+        stable = self._create_stable_resource({"value": "10"})
+        created = self.client.post(
+            "/value-resources",
+            json={"source": "scalar-test", "parameters": {"value": "99.5"}},
+        )
+
+        response = self.client.post(
+            "/v/batch?token=readonly-secret",
+            json={"ids": [stable, created.json()["id"]], "layout": "row"},
+        )
+        rejected = self.client.get(f"/v/batch?ids={stable}&value=override")
+
+        self.assertEqual(response.status_code, 200, response.text)
+        self.assertEqual(response.text, "readonly-secret,99.5")
+        self.assertEqual(response.headers["x-value-source"], "value-batch")
+        self.assertEqual(rejected.status_code, 400)
+        self.assertIn("Unsupported credential parameter", rejected.json()["detail"])
+
 
 if __name__ == "__main__":
     unittest.main()
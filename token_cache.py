@@ -0,0 +1,142 @@
+import logging
+import time
+from dataclasses import dataclass
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy.orm import Session
+
+from config import AUTH_TOKEN_CACHE_TTL_SECONDS
+from memory_cache import MemoryBudget, memory_budget
+from models import AccountToken
+from redis_client import RedisBroadcast, get_redis_client, redis_broadcast
+
+
+logger = logging.getLogger(__name__)
+
+TOKEN_REVOCATION_CHANNEL = "datahunt:auth:revoke:v1"
+VERIFIED_TOKEN_CACHE_MAX_BYTES = 2 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class VerifiedToken:
+    """The stored state of one access token, looked up by its `jti`."""
+
+    id: str
+    account_id: str
+    purpose: str
+    is_active: bool
+
+
+class VerifiedTokenCache:
+    """Short-lived cache of active access tokens, keyed by `jti`.
+
+    Only active tokens are cached, for at most `ttl_seconds`. Revocations drop
+    the entry locally and are published on `TOKEN_REVOCATION_CHANNEL`, so other
+    replicas drop it as well; when that subscription is down, the TTL bounds how
+    long a revoked token may still be accepted.
+    """
+
+    def __init__(
+        self,
+        *,
+        ttl_seconds: int = AUTH_TOKEN_CACHE_TTL_SECONDS,
+        redis_client: Redis | None = None,
+        broadcast: RedisBroadcast | None = None,
+        budget: MemoryBudget = memory_budget,
+        max_bytes: int = VERIFIED_TOKEN_CACHE_MAX_BYTES,
+    ):
+        self.ttl_seconds = max(0, ttl_seconds)
+        self._redis_client = redis_client
+        self._tokens = budget.namespace(
+            "auth-tokens",
+            max_bytes=max_bytes,
+            ttl_seconds=self.ttl_seconds,
+            sizeof=lambda _: 256,
+        )
+        self._generation = 0
+        self._broadcast = broadcast or redis_broadcast
+        self._broadcast.subscribe(
+            TOKEN_REVOCATION_CHANNEL,
+            self._on_revocation,
+            on_reset=self.clear,
+        )
+        self._last_redis_warning = 0.0
+
+    def _redis(self) -> Redis | None:
+        return self._redis_client or get_redis_client()
+
+    def _warn_redis(self, exc: Exception) -> None:
+        now = time.monotonic()
+        if now - self._last_redis_warning >= 30:
+            logger.warning("Redis token revocation broadcast unavailable: %s", exc)
+            self._last_redis_warning = now
+
+    def peek(self, token_id: str) -> VerifiedToken | None:
+        """Returns the cached token without reading the database."""
+        return self._tokens.get(token_id)
+
+    @property
+    def generation(self) -> int:
+        """Changes whenever tokens are dropped; pass it to `remember`."""
+        return self._generation
+
+    def lookup(self, token_id: str, db: Session) -> VerifiedToken | None:
+        """Returns the stored token, reading `db` only when it is not cached."""
+        cached = self.peek(token_id)
+        if cached is not None:
+            return cached
+        generation = self._generation
+        token = self.read(token_id, db)
+        self.remember(token, generation)
+        return token
+
+    @staticmethod
+    def read(token_id: str, db: Session) -> VerifiedToken | None:
+        """Reads the token from `db` without touching the cache."""
+        stored = db.query(AccountToken).filter(AccountToken.id == token_id).first()
+        if stored is None:
+            return None
+        return VerifiedToken(
+            id=stored.id,
+            account_id=stored.account_id,
+            purpose=stored.purpose,
+            is_active=bool(stored.is_active),
+        )
+
+    def remember(self, token: VerifiedToken | None, generation: int) -> None:
+        """Caches a token read while the cache was at `generation`."""
+        # A revocation received during the read may predate the row we loaded.
+        if (
+            token is not None
+            and token.is_active
+            and self.ttl_seconds
+            and generation == self._generation
+        ):
+            self._tokens[token.id] = token
+
+    def _drop(self, token_ids) -> None:
+        self._generation += 1
+        for token_id in token_ids:
+            self._tokens.pop(token_id)
+
+    def _on_revocation(self, message: bytes) -> None:
+        self._drop(message.decode(errors="replace").split())
+
+    async def revoke(self, *token_ids: str) -> None:
+        """Drops revoked tokens here and asks every other replica to do the same."""
+        self._drop(token_ids)
+        client = self._redis()
+        if client is None or not token_ids:
+            return
+        try:
+            await client.publish(TOKEN_REVOCATION_CHANNEL, " ".join(token_ids))
+        except RedisError as exc:
+            self._warn_redis(exc)
+
+    def clear(self) -> None:
+        self._generation += 1
+        self._tokens.clear()
+
+
+verified_tokens = VerifiedTokenCache()
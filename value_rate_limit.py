@@ -1,29 +1,40 @@
 import asyncio
 import hashlib
 import logging
+import math
 import secrets
 import time
 from dataclasses import dataclass
 from urllib.parse import parse_qsl
 
 import jwt
-from fastapi import Request, Response, status
+from fastapi import HTTPException, Request, status
 from redis.asyncio import Redis
 from redis.exceptions import RedisError
-from sqlalchemy.exc import IntegrityError
-from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
-from starlette.background import BackgroundTask, BackgroundTasks
+from starlette.datastructures import MutableHeaders
 from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from config import (
     ALGORITHM,
     SECRET_KEY,
+    USAGE_ANALYTICS_FLUSH_SECONDS,
     VALUE_RATE_LIMIT_AUTHENTICATED,
+    VALUE_RATE_LIMIT_LEASE_SECONDS,
+    VALUE_RATE_LIMIT_LEASE_SIZE,
     VALUE_RATE_LIMIT_WINDOW_SECONDS,
 )
-from database import SessionLocal
-from models import AccountToken, UsageDaily, ValueResource
-from redis_client import get_redis_client
+from database import (
+    DatabaseExecutor,
+    SessionLocal,
+    add_daily_counts,
+    db_executor,
+    open_session,
+)
+from models import UsageDaily
+from redis_client import RedisScript, get_redis_client
+from token_cache import VerifiedToken, VerifiedTokenCache, verified_tokens
+from value_resource_cache import ValueResourceCache, value_resource_cache
 
 
 logger = logging.getLogger(__name__)
@@ -57,15 +68,42 @@ PROTECTED_DATA_PREFIXES = (
     "/value-resources",
     "/v",
 )
-
-INCREMENT_RATE_LIMIT_SCRIPT = """
-local count = redis.call('INCR', KEYS[1])
-if count == 1 then
-    redis.call('EXPIRE', KEYS[1], ARGV[1])
+# Read-only POST routes that also accept the scoped Sheets token.
+READ_ONLY_POST_PATHS = frozenset({"/v/batch"})
+RATE_LIMIT_STATE = "value_rate_limit"
+
+# Generic cell rate algorithm: KEYS[1] holds the theoretical arrival time (TAT)
+# in milliseconds. A request costing n advances it by n emission intervals and
+# is allowed while the TAT stays within one window of now, so at most `limit`
+# requests fit in any window. Negative costs return unused leased tokens.
+GCRA_RATE_LIMIT_SCRIPT = RedisScript("""
+local period = tonumber(ARGV[1])
+local limit = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local interval = period / limit
+local tat = tonumber(redis.call('GET', KEYS[1])) or now
+if tat < now then
+    tat = now
+end
+local new_tat = math.max(now, tat + cost * interval)
+local allowed = cost <= 0 or new_tat - now <= period
+if allowed then
+    if new_tat > now then
+        redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil(new_tat - now))
+    else
+        redis.call('DEL', KEYS[1])
+    end
+    tat = new_tat
+end
+local remaining = math.floor((period - (tat - now)) / interval)
+local retry_after = 0
+if not allowed then
+    retry_after = math.ceil(new_tat - period - now)
 end
-local ttl = redis.call('TTL', KEYS[1])
-return {count, ttl}
-"""
+return {allowed and 1 or 0, remaining, retry_after, math.ceil(tat - now)}
+""")
 
 
 @dataclass(frozen=True)
@@ -76,8 +114,159 @@ class RateLimitStatus:
     exceeded: bool
 
 
-class ValueRateLimitMiddleware(BaseHTTPMiddleware):
-    """Require authentication and rate-limit every data request by account."""
+@dataclass
+class _RateLease:
+    """Tokens taken from the shared limit ahead of time for one account."""
+
+    tokens: int
+    status: RateLimitStatus
+    expires_at: float
+    expiry: asyncio.TimerHandle | None = None
+
+
+@dataclass
+class RateLimitCharge:
+    """The caller's rate-limit window, kept on request state for extra charges."""
+
+    limiter: "ValueRateLimitMiddleware"
+    key: str
+    status: RateLimitStatus
+
+    async def charge(self, cost: int) -> RateLimitStatus:
+        self.status = await self.limiter._increment(
+            self.key,
+            self.status.limit,
+            cost,
+        )
+        return self.status
+
+
+async def charge_rate_limit(request: Request, cost: int) -> None:
+    """Charges `cost` more requests to the caller, on top of the request itself.
+
+    Routes whose work grows with their input call this once they know the cost.
+    Raises 429 when the extra charge exceeds the limit; internal requests are
+    never charged.
+    """
+    account = getattr(request.state, RATE_LIMIT_STATE, None)
+    if account is None or cost <= 0:
+        return
+    rate = await account.charge(cost)
+    if rate.exceeded:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Rate limit exceeded. Try again later.",
+            headers={"Retry-After": str(rate.retry_after)},
+        )
+
+
+class UsageRecorder:
+    """Buffers daily usage counts in memory and writes them in bulk.
+
+    Requests only increment a counter; a background task adds the buffered
+    counts to `UsageDaily` every `flush_seconds` and once more at shutdown.
+    """
+
+    def __init__(
+        self,
+        *,
+        session_factory=SessionLocal,
+        flush_seconds: float = USAGE_ANALYTICS_FLUSH_SECONDS,
+        executor: DatabaseExecutor = db_executor,
+    ):
+        self._session_factory = session_factory
+        self._executor = executor
+        self.flush_seconds = max(0.1, flush_seconds)
+        self._usage: dict[tuple[int, str, str, str], int] = {}
+        self._worker: asyncio.Task[None] | None = None
+        self._stop = asyncio.Event()
+
+    @staticmethod
+    def _status_group(status_code: int) -> str:
+        if status_code < 400:
+            return "success"
+        if status_code < 500:
+            return "client_error"
+        return "server_error"
+
+    def record(
+        self,
+        account_id: str,
+        source: str,
+        status_code: int,
+        timestamp: int,
+    ) -> None:
+        dimension = (
+            timestamp // 86400,
+            account_id,
+            source,
+            self._status_group(status_code),
+        )
+        self._usage[dimension] = self._usage.get(dimension, 0) + 1
+
+    def _persist(self, usage: dict[tuple[int, str, str, str], int]) -> None:
+        rows = [
+            {
+                "day": day,
+                "account_id": account_id,
+                "source": source,
+                "status_group": status_group,
+                "request_count": count,
+            }
+            for (day, account_id, source, status_group), count in usage.items()
+        ]
+        with self._session_factory() as db:
+            add_daily_counts(
+                db,
+                UsageDaily,
+                ("day", "account_id", "source", "status_group"),
+                rows,
+            )
+            db.commit()
+
+    async def flush(self) -> None:
+        usage = self._usage
+        self._usage = {}
+        if not usage:
+            return
+        try:
+            await self._executor.run(self._persist, usage)
+        except Exception:
+            for dimension, count in usage.items():
+                self._usage[dimension] = self._usage.get(dimension, 0) + count
+            logger.exception("Could not persist usage analytics")
+
+    async def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            await self.flush()
+
+    async def start(self) -> None:
+        if self._worker is not None:
+            return
+        self._stop.clear()
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._worker is not None:
+            await self._worker
+        self._worker = None
+        await self.flush()
+
+
+usage_recorder = UsageRecorder()
+
+
+class ValueRateLimitMiddleware:
+    """Require authentication and rate-limit every data request by account.
+
+    A pure ASGI middleware: responses stream through unchanged apart from the
+    rate-limit and Cache-Control headers added to their start message.
+    """
 
     def __init__(
         self,
@@ -86,14 +275,27 @@ class ValueRateLimitMiddleware(BaseHTTPMiddleware):
         window_seconds: int = VALUE_RATE_LIMIT_WINDOW_SECONDS,
         redis_client: Redis | None = None,
         session_factory=SessionLocal,
+        resource_cache: ValueResourceCache = value_resource_cache,
+        token_cache: VerifiedTokenCache = verified_tokens,
+        usage: UsageRecorder = usage_recorder,
+        lease_size: int = VALUE_RATE_LIMIT_LEASE_SIZE,
+        lease_seconds: float = VALUE_RATE_LIMIT_LEASE_SECONDS,
+        executor: DatabaseExecutor = db_executor,
     ):
-        super().__init__(app)
+        self.app = app
         self.authenticated_limit = max(1, authenticated_limit)
         self.window_seconds = max(1, window_seconds)
         self._redis_client = redis_client
         self._session_factory = session_factory
-        self._memory: dict[str, tuple[int, float]] = {}
-        self._memory_lock = asyncio.Lock()
+        self._resource_cache = resource_cache
+        self._token_cache = token_cache
+        self._usage = usage
+        self._executor = executor
+        self.lease_size = max(0, lease_size)
+        self.lease_seconds = max(0.1, lease_seconds)
+        self._memory: dict[str, float] = {}
+        self._leases: dict[str, _RateLease] = {}
+        self._lease_returns: set[asyncio.Task[None]] = set()
         self._last_redis_warning = 0.0
 
     @staticmethod
@@ -131,11 +333,14 @@ class ValueRateLimitMiddleware(BaseHTTPMiddleware):
             return True, ""
         return True, token.strip()
 
-    def _account_identity(self, request: Request) -> str | None:
+    async def _account_identity(self, request: Request) -> str | None:
         query_supplied, query_token = self._query_token(request)
         header_supplied, header_token = self._bearer_token(request)
         if query_supplied:
-            if request.method.upper() != "GET":
+            if (
+                request.method.upper() != "GET"
+                and request.url.path not in READ_ONLY_POST_PATHS
+            ):
                 raise ValueError("A login token is required for this operation")
             token = query_token
             expected_purpose = "sheets"
@@ -161,25 +366,30 @@ class ValueRateLimitMiddleware(BaseHTTPMiddleware):
         if expected_purpose == "session" and payload.get("scope") == "sheets":
             raise ValueError("A login token is required")
 
-        with self._session_factory() as db:
-            stored_token = (
-                db.query(AccountToken)
-                .filter(
-                    AccountToken.id == token_id,
-                    AccountToken.account_id == account_id,
-                    AccountToken.purpose == expected_purpose,
-                    AccountToken.is_active.is_(True),
-                )
-                .first()
-            )
+        stored_token = self._token_cache.peek(token_id)
         if stored_token is None:
+            # Only the database read runs in the executor; the cache is
+            # updated here on the event loop.
+            generation = self._token_cache.generation
+            stored_token = await self._executor.run(self._read_token, token_id)
+            self._token_cache.remember(stored_token, generation)
+        if (
+            stored_token is None
+            or stored_token.account_id != account_id
+            or stored_token.purpose != expected_purpose
+            or not stored_token.is_active
+        ):
             raise ValueError("Access token is invalid or revoked")
         return account_id
 
+    def _read_token(self, token_id: str) -> VerifiedToken | None:
+        with self._session_factory() as db:
+            return self._token_cache.read(token_id, db)
+
     @staticmethod
     def _rate_key(identity: str) -> str:
         digest = hashlib.sha256(identity.encode()).hexdigest()
-        return f"datahunt:rate:value:v1:{digest}"
+        return f"datahunt:rate:value:v2:{digest}"
 
     def _redis(self) -> Redis | None:
         return self._redis_client or get_redis_client()
@@ -193,44 +403,170 @@ class ValueRateLimitMiddleware(BaseHTTPMiddleware):
             )
             self._last_redis_warning = now
 
-    async def _increment_memory(self, key: str, limit: int) -> RateLimitStatus:
+    async def _increment_memory(
+        self,
+        key: str,
+        limit: int,
+        cost: int = 1,
+    ) -> RateLimitStatus:
         now = time.monotonic()
-        async with self._memory_lock:
-            count, expires_at = self._memory.get(key, (0, now + self.window_seconds))
-            if expires_at <= now:
-                count = 0
-                expires_at = now + self.window_seconds
-            count += 1
-            self._memory[key] = (count, expires_at)
-        retry_after = max(1, int(expires_at - now + 0.999))
+        period = float(self.window_seconds)
+        interval = period / limit
+        tat = max(now, self._memory.get(key, now))
+        new_tat = tat + cost * interval
+        exceeded = new_tat - now > period
+        if not exceeded:
+            tat = new_tat
+            self._memory[key] = tat
+        if len(self._memory) > 10_000:
+            self._memory = {
+                name: value for name, value in self._memory.items() if value > now
+            }
         return RateLimitStatus(
             limit=limit,
-            remaining=max(0, limit - count),
-            retry_after=retry_after,
-            exceeded=count > limit,
+            remaining=max(0, math.floor((period - (tat - now)) / interval)),
+            retry_after=max(
+                1,
+                math.ceil((new_tat - period - now) if exceeded else (tat - now)),
+            ),
+            exceeded=exceeded,
         )
 
-    async def _increment(self, key: str, limit: int) -> RateLimitStatus:
-        client = self._redis()
-        if client is not None:
+    async def _increment_redis(
+        self,
+        client: Redis,
+        key: str,
+        limit: int,
+        cost: int,
+    ) -> RateLimitStatus:
+        allowed, remaining, retry_after_ms, reset_ms = await GCRA_RATE_LIMIT_SCRIPT(
+            client,
+            [key],
+            [self.window_seconds * 1000, limit, cost],
+        )
+        exceeded = not int(allowed)
+        return RateLimitStatus(
+            limit=limit,
+            remaining=max(0, int(remaining)),
+            retry_after=max(
+                1,
+                math.ceil(int(retry_after_ms if exceeded else reset_ms) / 1000),
+            ),
+            exceeded=exceeded,
+        )
+
+    def _return_lease(self, client: Redis, key: str, lease: _RateLease) -> None:
+        if lease.tokens <= 0:
+            return
+
+        async def return_tokens() -> None:
             try:
-                result = await client.eval(
-                    INCREMENT_RATE_LIMIT_SCRIPT,
-                    1,
+                await self._increment_redis(
+                    client,
                     key,
-                    self.window_seconds,
+                    lease.status.limit,
+                    -lease.tokens,
                 )
-                count = int(result[0])
-                ttl = max(1, int(result[1]))
+            except (RedisError, TypeError, ValueError) as exc:
+                self._warn_redis(exc)
+
+        task = asyncio.create_task(return_tokens())
+        self._lease_returns.add(task)
+        task.add_done_callback(self._lease_returns.discard)
+
+    def _spend_lease(self, key: str, cost: int) -> RateLimitStatus | None:
+        lease = self._leases.get(key)
+        if lease is None or lease.expires_at <= time.monotonic():
+            return None
+        if lease.tokens < cost:
+            return None
+        lease.tokens -= cost
+        return RateLimitStatus(
+            limit=lease.status.limit,
+            remaining=lease.status.remaining + lease.tokens,
+            retry_after=lease.status.retry_after,
+            exceeded=False,
+        )
+
+    def _expire_lease(self, client: Redis, key: str, lease: _RateLease) -> None:
+        if self._leases.get(key) is lease:
+            del self._leases[key]
+            self._return_lease(client, key, lease)
+
+    async def _lease(
+        self,
+        client: Redis,
+        key: str,
+        limit: int,
+        cost: int,
+    ) -> RateLimitStatus:
+        """Takes `lease_size` tokens at once and serves later requests locally.
+
+        Unused tokens are returned to Redis in the background when the lease
+        expires, so other replicas are held back by at most one lease per account
+        for at most `lease_seconds`. Tokens still held when this account needs a
+        new lease are carried into it, or spent first if the new lease is denied.
+        """
+        now = time.monotonic()
+        previous = self._leases.pop(key, None)
+        if previous is not None and previous.expiry is not None:
+            previous.expiry.cancel()
+
+        size = min(limit, max(self.lease_size, cost))
+        carried = min(previous.tokens, size - 1) if previous is not None else 0
+        rate = await self._increment_redis(client, key, limit, size - carried)
+        if rate.exceeded:
+            spare = previous.tokens if previous is not None else 0
+            if spare >= cost:
+                previous.tokens -= cost
+                self._return_lease(client, key, previous)
                 return RateLimitStatus(
                     limit=limit,
-                    remaining=max(0, limit - count),
-                    retry_after=ttl,
-                    exceeded=count > limit,
+                    remaining=rate.remaining,
+                    retry_after=previous.status.retry_after,
+                    exceeded=False,
                 )
+            charged = await self._increment_redis(client, key, limit, cost - spare)
+            if charged.exceeded and previous is not None:
+                self._return_lease(client, key, previous)
+            return charged
+        if previous is not None and previous.tokens > carried:
+            previous.tokens -= carried
+            self._return_lease(client, key, previous)
+        lease = _RateLease(
+            tokens=size - cost,
+            status=rate,
+            expires_at=now + self.lease_seconds,
+        )
+        lease.expiry = asyncio.get_running_loop().call_later(
+            self.lease_seconds, self._expire_lease, client, key, lease
+        )
+        self._leases[key] = lease
+        return RateLimitStatus(
+            limit=limit,
+            remaining=rate.remaining + size - cost,
+            retry_after=rate.retry_after,
+            exceeded=False,
+        )
+
+    async def _increment(
+        self,
+        key: str,
+        limit: int,
+        cost: int = 1,
+    ) -> RateLimitStatus:
+        client = self._redis()
+        if client is not None:
+            try:
+                if self.lease_size > 1:
+                    leased = self._spend_lease(key, cost)
+                    if leased is not None:
+                        return leased
+                    return await self._lease(client, key, limit, cost)
+                return await self._increment_redis(client, key, limit, cost)
             except (RedisError, TypeError, ValueError) as exc:
                 self._warn_redis(exc)
-        return await self._increment_memory(key, limit)
+        return await self._increment_memory(key, limit, cost)
 
     @staticmethod
     def _headers(rate: RateLimitStatus) -> dict[str, str]:
@@ -240,125 +576,65 @@ class ValueRateLimitMiddleware(BaseHTTPMiddleware):
             "X-RateLimit-Reset": str(rate.retry_after),
         }
 
-    @staticmethod
-    def _status_group(status_code: int) -> str:
-        if status_code < 400:
-            return "success"
-        if status_code < 500:
-            return "client_error"
-        return "server_error"
-
-    def _usage_source(self, request: Request, response: Response | None = None) -> str:
-        if response is not None:
-            resolved = response.headers.get("x-value-source", "").strip()
-            if resolved:
-                return resolved[:64]
+    async def _usage_source(self, request: Request, resolved: str = "") -> str:
+        resolved = resolved.strip()
+        if resolved:
+            return resolved[:64]
         path = request.url.path.strip("/")
         if path == "value":
             return (request.query_params.get("source") or "value")[:64]
+        if path == "v/batch":
+            return "value-batch"
         if path.startswith("v/"):
             resource_id = path.removeprefix("v/").split("/", 1)[0]
             if resource_id:
-                with self._session_factory() as db:
-                    resource = db.get(ValueResource, resource_id)
-                    if resource is not None and resource.source:
-                        return resource.source[:64]
+                async with open_session(self._session_factory) as db:
+                    resource = await self._resource_cache.get(resource_id, db)
+                if resource is not None and resource.source:
+                    return resource.source[:64]
             return "short-value"
-        if path == "value-resources":
+        if path in {"value-resources", "value-resources/bulk"}:
             return "resource-setup"
         return (path.split("/", 1)[0] or "unknown")[:64]
 
-    def _record_usage(
+    async def _track_usage(
         self,
+        request: Request,
         account_id: str,
-        source: str,
         status_code: int,
-        timestamp: int,
+        resolved_source: str = "",
     ) -> None:
-        day = timestamp // 86400
-        status_group = self._status_group(status_code)
-        with self._session_factory() as db:
-            dimensions = (
-                UsageDaily.day == day,
-                UsageDaily.account_id == account_id,
-                UsageDaily.source == source,
-                UsageDaily.status_group == status_group,
-            )
-            updated = (
-                db.query(UsageDaily)
-                .filter(*dimensions)
-                .update(
-                    {UsageDaily.request_count: UsageDaily.request_count + 1},
-                    synchronize_session=False,
-                )
-            )
-            if updated:
-                db.commit()
-                return
-            db.add(
-                UsageDaily(
-                    day=day,
-                    account_id=account_id,
-                    source=source,
-                    status_group=status_group,
-                    request_count=1,
-                )
-            )
-            try:
-                db.commit()
-            except IntegrityError:
-                db.rollback()
-                (
-                    db.query(UsageDaily)
-                    .filter(*dimensions)
-                    .update(
-                        {UsageDaily.request_count: UsageDaily.request_count + 1},
-                        synchronize_session=False,
-                    )
-                )
-                db.commit()
-
-    def _track_usage(
-        self,
-        response: Response,
-        request: Request,
-        account_id: str,
-    ) -> Response:
-        task = BackgroundTask(
-            self._record_usage,
+        self._usage.record(
             account_id,
-            self._usage_source(request, response),
-            response.status_code,
+            await self._usage_source(request, resolved_source),
+            status_code,
             int(time.time()),
         )
-        if response.background is None:
-            response.background = task
-        elif isinstance(response.background, BackgroundTasks):
-            response.background.tasks.append(task)
-        else:
-            response.background = BackgroundTasks([response.background, task])
-        return response
 
-    async def dispatch(
-        self,
-        request: Request,
-        call_next: RequestResponseEndpoint,
-    ) -> Response:
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request = Request(scope)
         if not self._is_limited_request(request):
-            return await call_next(request)
+            await self.app(scope, receive, send)
+            return
         if self._is_internal_request(request):
-            return await call_next(request)
+            await self.app(scope, receive, send)
+            return
 
         try:
-            account_id = self._account_identity(request)
+            account_id = await self._account_identity(request)
         except ValueError as exc:
-            return JSONResponse(
+            response = JSONResponse(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 content={"detail": str(exc)},
             )
+            await response(scope, receive, send)
+            return
 
         if account_id is None:
-            return JSONResponse(
+            response = JSONResponse(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 content={
                     "detail": (
@@ -367,13 +643,16 @@ class ValueRateLimitMiddleware(BaseHTTPMiddleware):
                     )
                 },
             )
+            await response(scope, receive, send)
+            return
 
         identity = f"account:{account_id}"
         limit = self.authenticated_limit
 
-        rate = await self._increment(self._rate_key(identity), limit)
-        headers = self._headers(rate)
+        key = self._rate_key(identity)
+        rate = await self._increment(key, limit)
         if rate.exceeded:
+            headers = self._headers(rate)
             headers["Retry-After"] = str(rate.retry_after)
             response = JSONResponse(
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
@@ -382,11 +661,31 @@ class ValueRateLimitMiddleware(BaseHTTPMiddleware):
                 },
                 headers=headers,
             )
-            return self._track_usage(response, request, account_id)
-
-        response = await call_next(request)
-        for name, value in headers.items():
-            response.headers[name] = value
-        if request.method.upper() == "GET" and response.status_code < 400:
-            response.headers["Cache-Control"] = "private, max-age=60"
-        return self._track_usage(response, request, account_id)
+            await response(scope, receive, send)
+            await self._track_usage(request, account_id, response.status_code)
+            return
+
+        account = RateLimitCharge(self, key, rate)
+        setattr(request.state, RATE_LIMIT_STATE, account)
+        is_get = request.method.upper() == "GET"
+        started: dict[str, object] = {}
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                for name, value in self._headers(account.status).items():
+                    headers[name] = value
+                if is_get and message["status"] < 400:
+                    headers["Cache-Control"] = "private, max-age=60"
+                started["status"] = message["status"]
+                started["source"] = headers.get("x-value-source", "")
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+        if "status" in started:
+            await self._track_usage(
+                request,
+                account_id,
+                int(started["status"]),
+                str(started["source"]),
+            )
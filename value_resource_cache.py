@@ -0,0 +1,290 @@
+import json
+import logging
+import time
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+from types import MappingProxyType
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy.orm import Session
+
+from database import DatabaseExecutor, db_executor
+from memory_cache import MemoryBudget, memory_budget
+from models import ValueResource
+from redis_client import RedisBroadcast, get_redis_client, redis_broadcast
+
+
+logger = logging.getLogger(__name__)
+
+VALUE_RESOURCE_KEY_PREFIX = "datahunt:value-resource:v1:"
+VALUE_RESOURCE_CACHE_MAX_BYTES = 4 * 1024 * 1024
+VALUE_RESOURCE_TTL_SECONDS = 7 * 24 * 60 * 60
+VALUE_RESOURCE_MISSING_TTL_SECONDS = 30
+VALUE_RESOURCE_CREATED_CHANNEL = "datahunt:value-resource:created:v1"
+_MISSING_MARKER = b"-"
+
+
+@dataclass(frozen=True)
+class ValueResourceDescriptor:
+    """Immutable copy of a ValueResource row, shared between requests."""
+
+    id: str
+    source: str
+    key: str | None
+    column: str | None
+    parameters: Mapping[str, str]
+
+    @classmethod
+    def from_row(cls, resource: ValueResource) -> "ValueResourceDescriptor":
+        return cls(
+            id=resource.id,
+            source=resource.source,
+            key=resource.key,
+            column=resource.column,
+            parameters=MappingProxyType(dict(resource.parameters or {})),
+        )
+
+    @classmethod
+    def from_json(cls, raw: bytes) -> "ValueResourceDescriptor":
+        payload = json.loads(raw)
+        return cls(
+            id=str(payload["id"]),
+            source=str(payload["source"]),
+            key=payload["key"],
+            column=payload["column"],
+            parameters=MappingProxyType(dict(payload["parameters"])),
+        )
+
+    def to_json(self) -> bytes:
+        return json.dumps(
+            {
+                "id": self.id,
+                "source": self.source,
+                "key": self.key,
+                "column": self.column,
+                "parameters": dict(self.parameters),
+            },
+            ensure_ascii=True,
+            separators=(",", ":"),
+        ).encode()
+
+
+def _descriptor_size(descriptor: ValueResourceDescriptor) -> int:
+    return 256 + 2 * sum(
+        len(value or "")
+        for value in (
+            descriptor.id,
+            descriptor.source,
+            descriptor.key,
+            descriptor.column,
+            *descriptor.parameters.keys(),
+            *descriptor.parameters.values(),
+        )
+    )
+
+
+class ValueResourceCache:
+    """Read-through cache of ValueResource descriptors.
+
+    Resources are content-addressed and never change once created, so found
+    descriptors are kept in process without expiry and in Redis for a week.
+    Unknown IDs are remembered briefly so repeated misses do not reach the
+    database either. Created IDs are published on `VALUE_RESOURCE_CREATED_CHANNEL`
+    so other replicas drop their cached miss; when that subscription is down,
+    the miss TTL bounds how long a new ID may still be reported as unknown.
+    """
+
+    def __init__(
+        self,
+        *,
+        redis_client: Redis | None = None,
+        budget: MemoryBudget = memory_budget,
+        max_bytes: int = VALUE_RESOURCE_CACHE_MAX_BYTES,
+        ttl_seconds: int = VALUE_RESOURCE_TTL_SECONDS,
+        missing_ttl_seconds: int = VALUE_RESOURCE_MISSING_TTL_SECONDS,
+        executor: DatabaseExecutor = db_executor,
+        broadcast: RedisBroadcast | None = None,
+    ):
+        self.ttl_seconds = max(1, ttl_seconds)
+        self.missing_ttl_seconds = max(1, missing_ttl_seconds)
+        self._redis_client = redis_client
+        self._executor = executor
+        self._descriptors = budget.namespace(
+            "value-resources",
+            max_bytes=max_bytes,
+            sizeof=_descriptor_size,
+        )
+        self._missing = budget.namespace(
+            "value-resources-missing",
+            max_bytes=max(1, max_bytes // 8),
+            ttl_seconds=self.missing_ttl_seconds,
+            sizeof=lambda _: 64,
+        )
+        self._broadcast = broadcast or redis_broadcast
+        self._broadcast.subscribe(
+            VALUE_RESOURCE_CREATED_CHANNEL,
+            self._on_created,
+            on_reset=self._missing.clear,
+        )
+        self._last_redis_warning = 0.0
+
+    def _redis(self) -> Redis | None:
+        return self._redis_client or get_redis_client()
+
+    def _warn_redis(self, exc: Exception) -> None:
+        now = time.monotonic()
+        if now - self._last_redis_warning >= 30:
+            logger.warning("Redis value resource cache unavailable: %s", exc)
+            self._last_redis_warning = now
+
+    @staticmethod
+    def _key(resource_id: str) -> str:
+        return f"{VALUE_RESOURCE_KEY_PREFIX}{resource_id}"
+
+    def _on_created(self, message: bytes) -> None:
+        for resource_id in message.decode(errors="replace").split():
+            self._missing.pop(resource_id)
+
+    def _remember_local(self, descriptor: ValueResourceDescriptor) -> None:
+        self._missing.pop(descriptor.id)
+        self._descriptors[descriptor.id] = descriptor
+
+    async def _read_redis(
+        self,
+        client: Redis,
+        resource_ids: list[str],
+        found: dict[str, ValueResourceDescriptor],
+    ) -> list[str]:
+        try:
+            values = await client.mget([self._key(value) for value in resource_ids])
+        except RedisError as exc:
+            self._warn_redis(exc)
+            return resource_ids
+        pending = []
+        for resource_id, raw in zip(resource_ids, values):
+            if raw == _MISSING_MARKER:
+                self._missing[resource_id] = True
+                continue
+            if raw is None:
+                pending.append(resource_id)
+                continue
+            try:
+                descriptor = ValueResourceDescriptor.from_json(raw)
+            except (KeyError, TypeError, ValueError):
+                pending.append(resource_id)
+                continue
+            self._remember_local(descriptor)
+            found[resource_id] = descriptor
+        return pending
+
+    async def _write_redis(
+        self,
+        client: Redis,
+        descriptors: list[ValueResourceDescriptor],
+        missing: list[str],
+        *,
+        announce: bool = False,
+    ) -> None:
+        try:
+            async with client.pipeline(transaction=False) as pipeline:
+                for descriptor in descriptors:
+                    pipeline.set(
+                        self._key(descriptor.id),
+                        descriptor.to_json(),
+                        ex=self.ttl_seconds,
+                    )
+                for resource_id in missing:
+                    # Never overwrite a descriptor stored by a concurrent create.
+                    pipeline.set(
+                        self._key(resource_id),
+                        _MISSING_MARKER,
+                        ex=self.missing_ttl_seconds,
+                        nx=True,
+                    )
+                if announce and descriptors:
+                    pipeline.publish(
+                        VALUE_RESOURCE_CREATED_CHANNEL,
+                        " ".join(descriptor.id for descriptor in descriptors),
+                    )
+                await pipeline.execute()
+        except RedisError as exc:
+            self._warn_redis(exc)
+
+    @staticmethod
+    def _read_database(
+        db: Session,
+        resource_ids: list[str],
+    ) -> list[ValueResourceDescriptor]:
+        return [
+            ValueResourceDescriptor.from_row(resource)
+            for resource in db.query(ValueResource)
+            .filter(ValueResource.id.in_(resource_ids))
+            .all()
+        ]
+
+    async def get(
+        self,
+        resource_id: str,
+        db: Session,
+    ) -> ValueResourceDescriptor | None:
+        return (await self.get_many([resource_id], db)).get(resource_id)
+
+    async def get_many(
+        self,
+        resource_ids: Iterable[str],
+        db: Session,
+    ) -> dict[str, ValueResourceDescriptor]:
+        """Returns the descriptors of the known IDs; `db` is queried only on misses."""
+        found: dict[str, ValueResourceDescriptor] = {}
+        pending = []
+        for resource_id in dict.fromkeys(resource_ids):
+            descriptor = self._descriptors.get(resource_id)
+            if descriptor is not None:
+                found[resource_id] = descriptor
+            elif resource_id not in self._missing:
+                pending.append(resource_id)
+        if not pending:
+            return found
+
+        client = self._redis()
+        if client is not None:
+            pending = await self._read_redis(client, pending, found)
+            if not pending:
+                return found
+
+        loaded = await self._executor.run(self._read_database, db, pending)
+        for descriptor in loaded:
+            self._remember_local(descriptor)
+            found[descriptor.id] = descriptor
+        missing = [resource_id for resource_id in pending if resource_id not in found]
+        for resource_id in missing:
+            self._missing[resource_id] = True
+        if client is not None:
+            await self._write_redis(client, loaded, missing)
+        return found
+
+    async def remember(self, resource: ValueResource) -> ValueResourceDescriptor:
+        """Stores a newly created or reused resource, replacing a cached miss."""
+        descriptor = ValueResourceDescriptor.from_row(resource)
+        await self.remember_many([descriptor])
+        return descriptor
+
+    async def remember_many(
+        self,
+        descriptors: Iterable[ValueResourceDescriptor],
+    ) -> None:
+        """Stores several descriptors and announces them with one Redis round trip."""
+        descriptors = list({value.id: value for value in descriptors}.values())
+        for descriptor in descriptors:
+            self._remember_local(descriptor)
+        client = self._redis()
+        if client is not None and descriptors:
+            await self._write_redis(client, descriptors, [], announce=True)
+
+    def clear(self) -> None:
+        self._descriptors.clear()
+        self._missing.clear()
+
+
+value_resource_cache = ValueResourceCache()